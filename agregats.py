@@ -0,0 +1,255 @@
+"""
+Agrégats pré-calculés pour le dashboard
+Cube jour × catégorie × mode de paiement et agrégats client × jour × catégorie
+"""
+
+import pandas as pd
+
+from grand_livre import GrandLivreClients
+from index_donnees import IndexTemporel
+
+# Granularités temporelles : nom -> (période pandas, durée moyenne en jours, libellé)
+GRAINS = {
+    'jour': ('D', 1, 'journalières'),
+    'semaine': ('W-SUN', 7, 'hebdomadaires'),
+    'mois': ('M', 30.44, 'mensuelles'),
+}
+
+# Nombre maximal de points d'une série temporelle : la granularité la plus fine qui le respecte est retenue
+BUDGET_POINTS = 366
+
+# Mode approché : en deçà de ce nombre de clients échantillonnés (sélection étroite),
+# les indicateurs clients sont calculés exactement sur le grand livre
+MIN_CLIENTS_ECHANTILLON = 500
+
+
+class CubeKPI:
+    """Cube d'agrégats sur les transactions nettoyées
+
+    Les filtres de période et de catégorie sont appliqués sur le cube (quelques
+    milliers de cellules) au lieu des transactions brutes. Les indicateurs non
+    additifs par client (récurrence, CLV) proviennent d'une table client × jour
+    × catégorie séparée, rangée en grand livre par client.
+    """
+
+    def __init__(self, df):
+        self.cube, self.clients = self._agreger(df)
+        self._indexer()
+
+    @staticmethod
+    def _agreger(df):
+        """Construit les tables (cube, clients) à partir de transactions"""
+        jours = df['Date'].dt.normalize()
+
+        # Cube jour × catégorie × mode de paiement
+        cube = (df.groupby([jours, 'Categorie', 'Mode_Paiement'], sort=True, observed=True)['Montant']
+                  .agg(['sum', 'count', 'min', 'max'])
+                  .reset_index())
+        cube.columns = ['Date', 'Categorie', 'Mode_Paiement', 'CA', 'Nb_Transactions',
+                        'Montant_Min', 'Montant_Max']
+
+        # Agrégats client × jour × catégorie (indicateurs non additifs)
+        clients = (df.groupby([jours, 'Categorie', 'ID_Client'], sort=True, observed=True)['Montant']
+                     .agg(['sum', 'count'])
+                     .reset_index())
+        clients.columns = ['Date', 'Categorie', 'ID_Client', 'CA', 'Nb_Transactions']
+        return cube, clients
+
+    def _indexer(self):
+        # Cube trié par jour : filtrage par recherche dichotomique (clients : grand livre)
+        self.index_cube = IndexTemporel(self.cube)
+        self.grand_livre = GrandLivreClients(self.clients)
+        
+        # Cumuls CA / transactions par période × catégorie à chaque granularité (Date = début de période)
+        self.cumuls = {}
+        for grain, (periode, _, _) in GRAINS.items():
+            debuts = self.cube['Date'].dt.to_period(periode).dt.start_time
+            cumul = (self.cube.groupby([debuts, 'Categorie'], sort=True, observed=True)[['CA', 'Nb_Transactions']]
+                              .sum()
+                              .reset_index())
+            self.cumuls[grain] = IndexTemporel(cumul)
+
+    def avec_delta(self, df_nouveau):
+        """Retourne un nouveau cube intégrant de nouvelles transactions
+
+        Seul le delta est agrégé ; il est fusionné aux cellules existantes
+        (sommes et comptes additionnés, min/max combinés) sans relire l'historique.
+        """
+        cube_delta, clients_delta = self._agreger(df_nouveau)
+
+        nouveau = CubeKPI.__new__(CubeKPI)
+        nouveau.cube = (pd.concat([self.cube, cube_delta], ignore_index=True)
+                          .groupby(['Date', 'Categorie', 'Mode_Paiement'], sort=True, observed=True)
+                          .agg({'CA': 'sum', 'Nb_Transactions': 'sum',
+                                'Montant_Min': 'min', 'Montant_Max': 'max'})
+                          .reset_index())
+        nouveau.clients = (pd.concat([self.clients, clients_delta], ignore_index=True)
+                             .groupby(['Date', 'Categorie', 'ID_Client'], sort=True, observed=True)
+                             [['CA', 'Nb_Transactions']].sum()
+                             .reset_index())
+        nouveau._indexer()
+        return nouveau
+
+    def filtrer(self, start_date=None, end_date=None, category='ALL'):
+        """Retourne la tranche du cube correspondant aux filtres (au jour près)"""
+        return self.index_cube.filtrer(start_date, end_date, category)
+
+    @staticmethod
+    def choisir_grain(start_date, end_date, budget=BUDGET_POINTS, date_min=None, date_max=None):
+        """Granularité la plus fine dont le nombre de périodes sur la sélection reste dans le budget"""
+        debut = pd.Timestamp(start_date) if start_date and end_date else date_min
+        fin = pd.Timestamp(end_date) if start_date and end_date else date_max
+        if debut is None or fin is None:
+            return 'jour'
+        nb_jours = (fin - debut).days + 1
+        for grain, (_, duree, _) in GRAINS.items():
+            if nb_jours / duree <= budget:
+                return grain
+        return 'mois'
+    
+    def serie_ventes(self, start_date=None, end_date=None, category='ALL', budget=BUDGET_POINTS):
+        """CA par période (Date = début de période, colonne Montant) et granularité retenue
+        
+        Les périodes entièrement comprises dans la sélection sont lues dans les
+        cumuls de la granularité ; seules les périodes coupées par les bornes (au
+        plus deux) sont recomposées à partir des cumuls journaliers. Le coût ne
+        dépend donc que du nombre de points, pas de la durée de la sélection.
+        """
+        cumuls_jour = self.cumuls['jour']
+        date_min = date_max = None
+        if len(cumuls_jour):
+            date_min, date_max = pd.Timestamp(cumuls_jour.dates[0]), pd.Timestamp(cumuls_jour.dates[-1])
+        grain = self.choisir_grain(start_date, end_date, budget, date_min, date_max)
+        cumuls = self.cumuls[grain]
+        
+        if grain == 'jour' or not (start_date and end_date):
+            morceaux = [cumuls.filtrer(start_date, end_date, category)]
+        else:
+            periode = GRAINS[grain][0]
+            debut, fin = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+            # Périodes complètes : de la première période commençant dans la sélection
+            # à la dernière se terminant avant fin
+            debut_complet = pd.Period(debut - pd.Timedelta(days=1), periode).end_time.normalize() + pd.Timedelta(days=1)
+            fin_complet = pd.Period(fin + pd.Timedelta(days=1), periode).start_time - pd.Timedelta(days=1)
+            if debut_complet > fin_complet:
+                bords = [cumuls_jour.filtrer(debut, fin, category)]
+                morceaux = []
+            else:
+                bords = [cumuls_jour.filtrer(debut, debut_complet - pd.Timedelta(days=1), category),
+                         cumuls_jour.filtrer(fin_complet + pd.Timedelta(days=1), fin, category)]
+                morceaux = [cumuls.filtrer(debut_complet, fin_complet, category)]
+            for bord in bords:
+                if len(bord):
+                    bord = bord.assign(Date=bord['Date'].dt.to_period(periode).dt.start_time)
+                    morceaux.append(bord)
+        
+        serie = pd.concat(morceaux) if len(morceaux) > 1 else morceaux[0]
+        serie = serie.groupby('Date')['CA'].sum().rename('Montant').reset_index()
+        return serie, grain
+    
+    def donnees_clients(self, start_date=None, end_date=None, category='ALL'):
+        """CA (CLV) et nombre de transactions par client sur la sélection (lus dans le grand livre)"""
+        return self.grand_livre.donnees_clients(start_date, end_date, category)
+
+    def calculer_kpis(self, start_date=None, end_date=None, category='ALL'):
+        """Calcule les mêmes KPI que benchmarks.reference.calculer_kpis à partir du cube"""
+        return self.kpis_depuis_tranche(self.filtrer(start_date, end_date, category),
+                                        lambda: self.donnees_clients(start_date, end_date, category))
+
+    def kpis_depuis_tranche(self, tranche, donnees_clients):
+        """Calcule les KPI d'une tranche du cube ; donnees_clients() fournit la table par client"""
+        kpis = {}
+
+        kpis['nb_transactions'] = int(tranche['Nb_Transactions'].sum())
+        kpis['ca_total'] = tranche['CA'].sum()
+        if kpis['nb_transactions'] == 0:
+            return kpis
+
+        # KPI 1: Valeur moyenne des transactions
+        kpis['montant_moyen'] = kpis['ca_total'] / kpis['nb_transactions']
+        kpis['montant_min'] = tranche['Montant_Min'].min()
+        kpis['montant_max'] = tranche['Montant_Max'].max()
+
+        # KPI 2: Répartition par catégorie
+        kpis['repartition_categorie'] = tranche.groupby('Categorie', observed=True)['CA'].sum().rename('Montant')
+        kpis['pourcentage_categorie'] = (kpis['repartition_categorie'] /
+                                         kpis['repartition_categorie'].sum() * 100)
+
+        # KPI 3 et 5: Taux de récurrence et CLV (table client)
+        client_data = donnees_clients()
+        clients_recurrents = (client_data['Nb_Transactions'] > 1).sum()
+        kpis['taux_recurrence'] = (clients_recurrents / len(client_data) * 100)
+        kpis['clv_moyenne'] = client_data['CLV'].mean()
+        kpis['clv_distribution'] = client_data.set_index('ID_Client')['CLV'].rename('Montant')
+        kpis['nb_clients'] = len(client_data)
+
+        # KPI 4: Modes de paiement
+        kpis['modes_paiement'] = (tranche.groupby('Mode_Paiement', observed=True)['Nb_Transactions'].sum()
+                                  .sort_values(ascending=False).rename('count'))
+        kpis['pourcentage_paiement'] = (kpis['modes_paiement'] /
+                                        kpis['modes_paiement'].sum() * 100)
+
+        # KPI 6: Performance par catégorie
+        kpis['top_categorie'] = kpis['repartition_categorie'].idxmax()
+        kpis['ca_top_categorie'] = kpis['repartition_categorie'].max()
+
+        return kpis
+
+
+class VueFiltree:
+    """Sélection filtrée partagée par les callbacks
+
+    Les résultats dérivés (KPI, table client, transactions) sont calculés à la
+    première demande puis réutilisés par les autres callbacks. Avec des
+    esquisses (mode approché), les KPI clients sont estimés par fusion de
+    cellules et la table client se limite à l'échantillon de clients ; si
+    l'échantillon compte moins de MIN_CLIENTS_ECHANTILLON clients, le calcul
+    exact est utilisé (approche reste False).
+    """
+
+    def __init__(self, cube, index_transactions, start_date=None, end_date=None, category='ALL',
+                 esquisses=None):
+        self.cube = cube
+        self.index_transactions = index_transactions
+        self.esquisses = esquisses
+        self.filtres = (start_date, end_date, category)
+        self.tranche = cube.filtrer(*self.filtres)
+        self._client_data = None
+        self._kpis = None
+        self._transactions = None
+        # Vrai si les indicateurs clients proviennent de l'échantillon (mode approché)
+        self.approche = False
+
+    @staticmethod
+    def cle(start_date, end_date, category):
+        """Clé normalisée des filtres ('2023-01-01' et '2023-01-01T10:30:00' sont équivalentes : journées entières)"""
+        if start_date and end_date:
+            return pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), category or 'ALL'
+        return None, None, category or 'ALL'
+
+    @property
+    def client_data(self):
+        if self._client_data is None:
+            if self.esquisses is not None:
+                echantillon = self.esquisses.clients_echantillon(*self.filtres)
+                self.approche = len(echantillon) >= MIN_CLIENTS_ECHANTILLON
+                if self.approche:
+                    self._client_data = echantillon
+            if self._client_data is None:
+                self._client_data = self.cube.donnees_clients(*self.filtres)
+        return self._client_data
+
+    @property
+    def kpis(self):
+        if self._kpis is None:
+            kpis = self.cube.kpis_depuis_tranche(self.tranche, lambda: self.client_data)
+            if self.approche and kpis['nb_transactions'] > 0:
+                kpis.update(self.esquisses.kpis_approches(kpis['ca_total'], *self.filtres))
+            self._kpis = kpis
+        return self._kpis
+
+    @property
+    def transactions(self):
+        if self._transactions is None:
+            self._transactions = self.index_transactions.filtrer(*self.filtres)
+        return self._transactions
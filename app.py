@@ -1,159 +1,199 @@
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, dash_table, Input, Output
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import plotly
+import json
+import logging
+import os
+import threading
+import flask
 from datetime import datetime
-from data_processing import DataProcessor
+from agregats import VueFiltree, GRAINS
+from cache import creer_cache
+from metriques import creer_registre
+from reduction import histogramme, agreger_nuage
+from table_transactions import page_transactions, COLONNES_TABLE, TAILLE_PAGE
+from rechargement import construire_instantane, Rechargeur, VARIABLE_RECHARGEMENT, VARIABLE_AJOUTS
+
+FICHIER_DONNEES = 'data/data_kpi.xlsx'
+
+# Mode incrémental (optionnel) : FICHIER_DONNEES est l'historique, les exports de ce dossier y sont ajoutés
+DOSSIER_AJOUTS = os.environ.get(VARIABLE_AJOUTS) or None
+
+# Journal du pipeline de données (mode serve : chargement, nettoyage et cache, sans diagnostics)
+logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 # Charger et traiter les données
 print("🚀 Initialisation du Dashboard...")
 print("="*80)
 
-processor = DataProcessor('data/data_kpi.xlsx')
-df = processor.executer_pipeline_complet()
+instantane = construire_instantane(FICHIER_DONNEES, DOSSIER_AJOUTS)
 
-if df is None or len(df) == 0:
+if instantane is None:
     print("❌ ERREUR: Impossible de charger les données!")
     print("Vérifiez que le fichier 'data/data_kpi.xlsx' existe et contient des données valides.")
     exit(1)
 
 print("\n✅ Données chargées et nettoyées avec succès!")
-print(f"📊 {len(df)} transactions prêtes pour l'analyse")
+print(f"📊 {len(instantane)} transactions prêtes pour l'analyse")
 print("="*80)
 
+def instantane_courant():
+    """Jeu de données en service (à lire une seule fois par callback)"""
+    return instantane
+
+def publier_instantane(nouveau):
+    """Remplace le jeu de données en service (affectation atomique d'une référence)"""
+    global instantane
+    instantane = nouveau
+
 # Initialiser l'application
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
 server = app.server  # Pour le déploiement
 app.title = "Dashboard KPI - Analyse des Ventes"
 
-# Calculs des KPI
-def calculer_kpis(dataframe):
-    """Calcule tous les KPI nécessaires"""
-    kpis = {}
-    
-    # KPI 1: Valeur moyenne des transactions
-    kpis['montant_moyen'] = dataframe['Montant'].mean()
-    
-    # KPI 2: Répartition par catégorie
-    kpis['repartition_categorie'] = dataframe.groupby('Categorie')['Montant'].sum()
-    kpis['pourcentage_categorie'] = (kpis['repartition_categorie'] / 
-                                      kpis['repartition_categorie'].sum() * 100)
-    
-    # KPI 3: Taux de récurrence
-    transactions_par_client = dataframe.groupby('ID_Client').size()
-    clients_recurrents = (transactions_par_client > 1).sum()
-    kpis['taux_recurrence'] = (clients_recurrents / len(transactions_par_client) * 100)
-    
-    # KPI 4: Modes de paiement
-    kpis['modes_paiement'] = dataframe['Mode_Paiement'].value_counts()
-    kpis['pourcentage_paiement'] = (kpis['modes_paiement'] / 
-                                     kpis['modes_paiement'].sum() * 100)
-    
-    # KPI 5: CLV moyenne
-    clv_par_client = dataframe.groupby('ID_Client')['Montant'].sum()
-    kpis['clv_moyenne'] = clv_par_client.mean()
-    kpis['clv_distribution'] = clv_par_client
-    
-    # KPI 6: Performance par catégorie
-    kpis['top_categorie'] = kpis['repartition_categorie'].idxmax()
-    kpis['ca_top_categorie'] = kpis['repartition_categorie'].max()
-    
-    # Statistiques additionnelles
-    kpis['nb_transactions'] = len(dataframe)
-    kpis['nb_clients'] = dataframe['ID_Client'].nunique()
-    kpis['ca_total'] = dataframe['Montant'].sum()
-    
-    return kpis
+# Version du rendu des onglets et des cartes KPI : à incrémenter à chaque modification
+# de leur contenu ou de leur mise en page (le cache SQLite partagé survit aux redémarrages)
+VERSION_RENDU = 1
+
+# Onglets rendus et cartes KPI mémoïsés (sérialisés en JSON), bornés en mémoire.
+# Partagés entre workers gunicorn si DASHBOARD_CACHE_PARTAGE désigne un fichier SQLite.
+onglets_rendus = creer_cache('onglets', taille_max=256,
+                             taille_max_octets=int(os.environ.get('DASHBOARD_CACHE_ONGLETS_MO', '64')) * 1024 * 1024,
+                             taille_valeur=len)
+kpis_rendus = creer_cache('kpis', taille_max=1024)
 
-kpis = calculer_kpis(df)
+# Métriques des callbacks (latence, lignes filtrées, taille des réponses, accès aux caches)
+metriques = creer_registre()
+metriques.suivre_cache('onglets', onglets_rendus)
+metriques.suivre_cache('kpis', kpis_rendus)
+metriques.suivre_cache('vues_filtrees', lambda: instantane_courant().vues_filtrees)
 
-# Layout de l'application
-app.layout = html.Div([
-    # En-tête
-    html.Div([
-        html.H1("📊 Dashboard Analyse des Ventes", 
-                style={'color': 'white', 'textAlign': 'center', 'marginBottom': '10px'}),
-        html.P("Analyse décisionnelle des KPI - Commerce en ligne",
-               style={'color': '#e0e0e0', 'textAlign': 'center'}),
-        html.P(f"📅 Période: {df['Date'].min().date()} au {df['Date'].max().date()} | "
-               f"📦 {kpis['nb_transactions']} transactions | "
-               f"👥 {kpis['nb_clients']} clients",
-               style={'color': '#b0b0b0', 'textAlign': 'center', 'fontSize': '0.9em'})
-    ], className='header'),
+@server.route('/metrics')
+def exposer_metriques():
+    return flask.Response(metriques.exposer(), mimetype='text/plain; version=0.0.4')
+
+def nb_lignes_filtrees(donnees, start_date, end_date, category):
+    """Nombre de transactions couvertes par les filtres (sans construire la sélection)"""
+    positions = donnees.index_df.positions(start_date, end_date, category)
+    if isinstance(positions, slice):
+        return positions.stop - positions.start
+    return len(positions)
+
+# Rechargement à chaud : un thread par processus (les threads ne survivent pas au fork
+# des workers gunicorn), démarré à la première requête reçue par le processus
+_rechargeur = {'pid': None}
+_verrou_rechargeur = threading.Lock()
+
+@server.before_request
+def demarrer_rechargeur():
+    intervalle = float(os.environ.get(VARIABLE_RECHARGEMENT, '0'))
+    if intervalle <= 0 or _rechargeur['pid'] == os.getpid():
+        return
+    with _verrou_rechargeur:
+        if _rechargeur['pid'] != os.getpid():
+            Rechargeur(FICHIER_DONNEES, instantane_courant, publier_instantane, intervalle,
+                       dossier_ajouts=DOSSIER_AJOUTS).start()
+            _rechargeur['pid'] = os.getpid()
+
+# Layout de l'application (reconstruit à chaque chargement de page : période et
+# catégories suivent le jeu de données en service)
+def construire_layout():
+    donnees = instantane_courant()
+    df, kpis = donnees.df, donnees.kpis
+    return html.Div([
+        # En-tête
+        html.Div([
+            html.H1("📊 Dashboard Analyse des Ventes", 
+                    style={'color': 'white', 'textAlign': 'center', 'marginBottom': '10px'}),
+            html.P("Analyse décisionnelle des KPI - Commerce en ligne",
+                   style={'color': '#e0e0e0', 'textAlign': 'center'}),
+            html.P(f"📅 Période: {df['Date'].min().date()} au {df['Date'].max().date()} | "
+                   f"📦 {kpis['nb_transactions']} transactions | "
+                   f"👥 {kpis['nb_clients']} clients",
+                   style={'color': '#b0b0b0', 'textAlign': 'center', 'fontSize': '0.9em'})
+        ], className='header'),
     
-    # Filtres
-    html.Div([
+        # Filtres
         html.Div([
-            html.Label("📅 Sélectionner la période:", style={'color': 'white', 'fontWeight': 'bold'}),
-            dcc.DatePickerRange(
-                id='date-picker',
-                start_date=df['Date'].min(),
-                end_date=df['Date'].max(),
-                display_format='DD/MM/YYYY',
-                style={'marginTop': '5px'}
-            )
-        ], style={'width': '45%', 'display': 'inline-block'}),
+            html.Div([
+                html.Label("📅 Sélectionner la période:", style={'color': 'white', 'fontWeight': 'bold'}),
+                dcc.DatePickerRange(
+                    id='date-picker',
+                    start_date=df['Date'].min(),
+                    end_date=df['Date'].max(),
+                    display_format='DD/MM/YYYY',
+                    style={'marginTop': '5px'}
+                )
+            ], style={'width': '45%', 'display': 'inline-block'}),
         
-        html.Div([
-            html.Label("🏷️ Filtrer par catégorie:", style={'color': 'white', 'fontWeight': 'bold'}),
-            dcc.Dropdown(
-                id='category-filter',
-                options=[{'label': 'Toutes les catégories', 'value': 'ALL'}] + 
-                        [{'label': cat, 'value': cat} for cat in sorted(df['Categorie'].unique())],
-                value='ALL',
-                style={'marginTop': '5px'}
-            )
-        ], style={'width': '45%', 'float': 'right', 'display': 'inline-block'})
-    ], className='filters'),
+            html.Div([
+                html.Label("🏷️ Filtrer par catégorie:", style={'color': 'white', 'fontWeight': 'bold'}),
+                dcc.Dropdown(
+                    id='category-filter',
+                    options=[{'label': 'Toutes les catégories', 'value': 'ALL'}] + 
+                            [{'label': cat, 'value': cat} for cat in sorted(df['Categorie'].unique())],
+                    value='ALL',
+                    style={'marginTop': '5px'}
+                )
+            ], style={'width': '45%', 'float': 'right', 'display': 'inline-block'})
+        ], className='filters'),
     
-    # Cartes KPI
-    html.Div([
+        # Cartes KPI
         html.Div([
             html.Div([
-                html.H4("💰 Montant Moyen"),
-                html.H2(id='kpi-montant-moyen', children=f"{kpis['montant_moyen']:.2f}€"),
-                html.P("par transaction")
-            ], className='kpi-card')
-        ], style={'width': '24%', 'display': 'inline-block'}),
+                html.Div([
+                    html.H4("💰 Montant Moyen"),
+                    html.H2(id='kpi-montant-moyen', children=f"{kpis['montant_moyen']:.2f}€"),
+                    html.P("par transaction")
+                ], className='kpi-card')
+            ], style={'width': '24%', 'display': 'inline-block'}),
         
-        html.Div([
             html.Div([
-                html.H4("🔄 Taux de Récurrence"),
-                html.H2(id='kpi-recurrence', children=f"{kpis['taux_recurrence']:.1f}%"),
-                html.P("clients récurrents")
-            ], className='kpi-card')
-        ], style={'width': '24%', 'display': 'inline-block'}),
+                html.Div([
+                    html.H4("🔄 Taux de Récurrence"),
+                    html.H2(id='kpi-recurrence', children=f"{kpis['taux_recurrence']:.1f}%"),
+                    html.P("clients récurrents")
+                ], className='kpi-card')
+            ], style={'width': '24%', 'display': 'inline-block'}),
         
-        html.Div([
             html.Div([
-                html.H4("👥 CLV Moyenne"),
-                html.H2(id='kpi-clv', children=f"{kpis['clv_moyenne']:.2f}€"),
-                html.P("par client")
-            ], className='kpi-card')
-        ], style={'width': '24%', 'display': 'inline-block'}),
+                html.Div([
+                    html.H4("👥 CLV Moyenne"),
+                    html.H2(id='kpi-clv', children=f"{kpis['clv_moyenne']:.2f}€"),
+                    html.P("par client")
+                ], className='kpi-card')
+            ], style={'width': '24%', 'display': 'inline-block'}),
         
-        html.Div([
             html.Div([
-                html.H4("🏆 Top Catégorie"),
-                html.H2(id='kpi-top-cat', children=kpis['top_categorie'][:12]),
-                html.P(id='kpi-top-ca', children=f"{kpis['ca_top_categorie']:.0f}€ CA")
-            ], className='kpi-card')
-        ], style={'width': '24%', 'display': 'inline-block'})
-    ], className='kpi-container'),
+                html.Div([
+                    html.H4("🏆 Top Catégorie"),
+                    html.H2(id='kpi-top-cat', children=kpis['top_categorie'][:12]),
+                    html.P(id='kpi-top-ca', children=f"{kpis['ca_top_categorie']:.0f}€ CA")
+                ], className='kpi-card')
+            ], style={'width': '24%', 'display': 'inline-block'})
+        ], className='kpi-container'),
     
-    # Onglets
-    dcc.Tabs(id='tabs', value='tab-1', children=[
-        dcc.Tab(label='📈 Vue d\'ensemble', value='tab-1', className='custom-tab'),
-        dcc.Tab(label='🛍️ Catégories', value='tab-2', className='custom-tab'),
-        dcc.Tab(label='💳 Paiements', value='tab-3', className='custom-tab'),
-        dcc.Tab(label='👤 Clients', value='tab-4', className='custom-tab'),
-        dcc.Tab(label='📊 Détails', value='tab-5', className='custom-tab'),
-        dcc.Tab(label='📋 Qualité Données', value='tab-6', className='custom-tab')
-    ]),
+        # Onglets
+        dcc.Tabs(id='tabs', value='tab-1', children=[
+            dcc.Tab(label='📈 Vue d\'ensemble', value='tab-1', className='custom-tab'),
+            dcc.Tab(label='🛍️ Catégories', value='tab-2', className='custom-tab'),
+            dcc.Tab(label='💳 Paiements', value='tab-3', className='custom-tab'),
+            dcc.Tab(label='👤 Clients', value='tab-4', className='custom-tab'),
+            dcc.Tab(label='📊 Détails', value='tab-5', className='custom-tab'),
+            dcc.Tab(label='📋 Qualité Données', value='tab-6', className='custom-tab')
+        ]),
     
-    html.Div(id='tabs-content', className='tab-content')
-])
+        html.Div(id='tabs-content', className='tab-content')
+    ])
+
+app.layout = construire_layout
+
+def cle_rendu(donnees):
+    """Partie des clés de cache propre au rendu : version des données, du rendu et mode approché"""
+    return (donnees.version, VERSION_RENDU, donnees.esquisses is not None)
 
 # Callback pour mettre à jour les KPI
 @app.callback(
@@ -167,25 +207,32 @@ app.layout = html.Div([
      Input('category-filter', 'value')]
 )
 def update_kpis(start_date, end_date, category):
-    filtered_df = df.copy()
-    
-    if start_date and end_date:
-        filtered_df = filtered_df[(filtered_df['Date'] >= start_date) & 
-                                   (filtered_df['Date'] <= end_date)]
-    
-    if category != 'ALL':
-        filtered_df = filtered_df[filtered_df['Categorie'] == category]
-    
-    if len(filtered_df) == 0:
-        return "0€", "0%", "0€", "N/A", "0€"
+    with metriques.mesurer('update_kpis') as mesure:
+        donnees = instantane_courant()
+        cle = VueFiltree.cle(start_date, end_date, category) + cle_rendu(donnees)
+        mesure['cache'] = 'hit'
+        
+        def calculer():
+            mesure['cache'] = 'miss'
+            return json.dumps(formater_kpis(donnees, start_date, end_date, category))
+        
+        contenu = kpis_rendus.obtenir(cle, calculer)
+        mesure['lignes'] = nb_lignes_filtrees(donnees, start_date, end_date, category)
+        mesure['octets'] = len(contenu)
+        return tuple(json.loads(contenu))
+
+def formater_kpis(donnees, start_date, end_date, category):
+    """Textes des cartes KPI pour les filtres donnés"""
+    kpis_filtered = donnees.obtenir_vue(start_date, end_date, category).kpis
     
-    kpis_filtered = calculer_kpis(filtered_df)
+    if kpis_filtered['nb_transactions'] == 0:
+        return ["0€", "0%", "0€", "N/A", "0€"]
     
-    return (f"{kpis_filtered['montant_moyen']:.2f}€",
+    return [f"{kpis_filtered['montant_moyen']:.2f}€",
             f"{kpis_filtered['taux_recurrence']:.1f}%",
             f"{kpis_filtered['clv_moyenne']:.2f}€",
             kpis_filtered['top_categorie'][:12],
-            f"{kpis_filtered['ca_top_categorie']:.0f}€ CA")
+            f"{kpis_filtered['ca_top_categorie']:.0f}€ CA"]
 
 # Callback pour le contenu des onglets
 @app.callback(
@@ -196,29 +243,65 @@ def update_kpis(start_date, end_date, category):
      Input('category-filter', 'value')]
 )
 def render_content(tab, start_date, end_date, category):
-    filtered_df = df.copy()
-    
-    if start_date and end_date:
-        filtered_df = filtered_df[(filtered_df['Date'] >= start_date) & 
-                                   (filtered_df['Date'] <= end_date)]
-    
-    if category != 'ALL':
-        filtered_df = filtered_df[filtered_df['Categorie'] == category]
+    with metriques.mesurer('render_content', onglet=tab) as mesure:
+        donnees = instantane_courant()
+        cle = (tab,) + VueFiltree.cle(start_date, end_date, category) + cle_rendu(donnees)
+        mesure['cache'] = 'hit'
+        
+        def calculer():
+            mesure['cache'] = 'miss'
+            return json.dumps(construire_onglet(donnees, tab, start_date, end_date, category),
+                              cls=plotly.utils.PlotlyJSONEncoder)
+        
+        contenu = onglets_rendus.obtenir(cle, calculer)
+        mesure['lignes'] = nb_lignes_filtrees(donnees, start_date, end_date, category)
+        mesure['octets'] = len(contenu)
+        return json.loads(contenu)
+
+# Callback de la table paginée (onglet Détails) : seule la page visible est triée et formatée
+@app.callback(
+    [Output('table-transactions', 'data'),
+     Output('table-transactions', 'page_count'),
+     Output('table-transactions-info', 'children')],
+    [Input('table-transactions', 'page_current'),
+     Input('table-transactions', 'page_size'),
+     Input('table-transactions', 'sort_by'),
+     Input('table-transactions', 'filter_query'),
+     Input('date-picker', 'start_date'),
+     Input('date-picker', 'end_date'),
+     Input('category-filter', 'value')]
+)
+def update_table(page_current, page_size, sort_by, filter_query, start_date, end_date, category):
+    with metriques.mesurer('update_table') as mesure:
+        donnees = instantane_courant()
+        transactions = donnees.obtenir_vue(start_date, end_date, category).transactions
+        enregistrements, nb_pages, nb_lignes, erreur = page_transactions(
+            transactions, page_current or 0, page_size or TAILLE_PAGE, sort_by, filter_query)
+        mesure['lignes'] = nb_lignes
+        info = erreur or f"{nb_lignes} transactions - page {min(page_current or 0, nb_pages - 1) + 1}/{nb_pages}"
+        return enregistrements, nb_pages, info
+
+def construire_onglet(donnees, tab, start_date, end_date, category):
+    """Construit le contenu d'un onglet pour les filtres donnés"""
+    vue = donnees.obtenir_vue(start_date, end_date, category)
+    tranche = vue.tranche
     
-    if len(filtered_df) == 0:
+    if len(tranche) == 0:
         return html.Div("⚠️ Aucune donnée disponible pour cette sélection", 
                        style={'textAlign': 'center', 'padding': '50px', 'color': 'white', 'fontSize': '1.2em'})
     
     if tab == 'tab-1':
         # Vue d'ensemble
-        daily_sales = filtered_df.groupby('Date')['Montant'].sum().reset_index()
+        # Granularité (jour, semaine, mois) choisie selon la période, lue dans les cumuls pré-calculés
+        # (au plus BUDGET_POINTS points, moins qu'un point par pixel : aucun sous-échantillonnage nécessaire)
+        daily_sales, grain = donnees.cube.serie_ventes(start_date, end_date, category)
         fig1 = px.line(daily_sales, x='Date', y='Montant',
-                      title='💰 Évolution des ventes journalières',
+                      title=f'💰 Évolution des ventes {GRAINS[grain][2]}',
                       template='plotly_dark')
         fig1.update_traces(line_color='#00d4ff', line_width=3)
         fig1.update_layout(hovermode='x unified')
         
-        category_sales = filtered_df.groupby('Categorie')['Montant'].sum().reset_index()
+        category_sales = tranche.groupby('Categorie', observed=True)['CA'].sum().rename('Montant').reset_index()
         fig2 = px.bar(category_sales, x='Categorie', y='Montant',
                      title='📊 Chiffre d\'affaires par catégorie',
                      template='plotly_dark', color='Montant',
@@ -232,10 +315,9 @@ def render_content(tab, start_date, end_date, category):
     
     elif tab == 'tab-2':
         # Analyse des catégories
-        category_data = filtered_df.groupby('Categorie').agg({
-            'Montant': ['sum', 'mean', 'count']
-        }).reset_index()
-        category_data.columns = ['Categorie', 'CA_Total', 'Montant_Moyen', 'Nb_Transactions']
+        category_data = tranche.groupby('Categorie', observed=True)[['CA', 'Nb_Transactions']].sum().reset_index()
+        category_data.columns = ['Categorie', 'CA_Total', 'Nb_Transactions']
+        category_data.insert(2, 'Montant_Moyen', category_data['CA_Total'] / category_data['Nb_Transactions'])
         category_data['Part_CA'] = (category_data['CA_Total'] / category_data['CA_Total'].sum() * 100).round(2)
         
         fig1 = px.pie(category_data, values='CA_Total', names='Categorie',
@@ -274,7 +356,8 @@ def render_content(tab, start_date, end_date, category):
     
     elif tab == 'tab-3':
         # Modes de paiement
-        payment_data = filtered_df['Mode_Paiement'].value_counts().reset_index()
+        payment_data = (tranche.groupby('Mode_Paiement', observed=True)['Nb_Transactions'].sum()
+                        .sort_values(ascending=False).reset_index())
         payment_data.columns = ['Mode_Paiement', 'Nombre']
         payment_data['Pourcentage'] = (payment_data['Nombre'] / payment_data['Nombre'].sum() * 100).round(2)
         
@@ -283,7 +366,7 @@ def render_content(tab, start_date, end_date, category):
                      template='plotly_dark')
         fig1.update_traces(textposition='auto', textinfo='percent+label')
         
-        payment_montant = filtered_df.groupby('Mode_Paiement')['Montant'].sum().reset_index()
+        payment_montant = tranche.groupby('Mode_Paiement', observed=True)['CA'].sum().rename('Montant').reset_index()
         fig2 = px.bar(payment_montant, x='Mode_Paiement', y='Montant',
                      title='💳 CA par mode de paiement',
                      template='plotly_dark', color='Montant',
@@ -306,27 +389,37 @@ def render_content(tab, start_date, end_date, category):
     elif tab == 'tab-4':
     # Analyse clients
         try:
-            client_data = filtered_df.groupby('ID_Client').agg({
-                'Montant': ['sum', 'count']
-            }).reset_index()
-            client_data.columns = ['ID_Client', 'CLV', 'Nb_Transactions']
+            client_data = vue.client_data
             
             # Vérifier qu'on a des données
             if len(client_data) == 0:
                 return html.Div("⚠️ Aucune donnée client disponible", 
                             style={'textAlign': 'center', 'padding': '50px', 'color': 'white'})
             
-            montant_moyen = filtered_df['Montant'].mean()
+            montant_moyen = tranche['CA'].sum() / tranche['Nb_Transactions'].sum()
             clients_recurrents = (client_data['Nb_Transactions'] > 1).sum()
             taux_recurrence = (clients_recurrents / len(client_data) * 100) if len(client_data) > 0 else 0
             clv_moyenne = client_data['CLV'].mean()
+            texte_recurrence = f"🔄 {taux_recurrence:.2f}% des clients sont récurrents ({clients_recurrents}/{len(client_data)} clients)"
             
-            # Graphique 1 : Distribution CLV
-            fig1 = px.histogram(client_data, x='CLV', nbins=30,
-                            title='📊 Question 5: Distribution de la Customer Lifetime Value',
-                            template='plotly_dark', 
-                            color_discrete_sequence=['#ff6b6b'],
-                            labels={'CLV': 'CLV (€)', 'count': 'Nombre de clients'})
+            # Graphique 1 : Distribution CLV (classes calculées côté serveur : 30 barres envoyées)
+            classes = histogramme(client_data['CLV'], nb_classes=30)
+            
+            if vue.approche:
+                # Mode approché : client_data est l'échantillon de clients, effectifs extrapolés
+                kpis_vue = vue.kpis
+                taux_recurrence, clv_moyenne = kpis_vue['taux_recurrence'], kpis_vue['clv_moyenne']
+                classes['Effectif'] = (classes['Effectif'] / donnees.esquisses.taux_echantillon).round()
+                texte_recurrence = (f"🔄 ≈ {taux_recurrence:.2f}% (± {kpis_vue['erreur_taux_recurrence']:.2f}) "
+                                    f"des clients sont récurrents (≈ {kpis_vue['nb_clients']:.0f} clients, "
+                                    f"échantillon de {len(client_data)})")
+            fig1 = go.Figure(go.Bar(x=classes['Centre'], y=classes['Effectif'], width=classes['Largeur'],
+                                    customdata=classes[['Debut', 'Fin']],
+                                    hovertemplate='CLV (€): %{customdata[0]:.2f} - %{customdata[1]:.2f}'
+                                                  '<br>Nombre de clients: %{y}<extra></extra>',
+                                    marker_color='#ff6b6b'))
+            fig1.update_layout(title='📊 Question 5: Distribution de la Customer Lifetime Value',
+                               template='plotly_dark', bargap=0)
             
             # Ajouter la ligne de moyenne
             if not pd.isna(clv_moyenne):
@@ -340,15 +433,18 @@ def render_content(tab, start_date, end_date, category):
                 showlegend=False
             )
             
-            # Graphique 2 : Scatter plot
-            fig2 = px.scatter(client_data, x='Nb_Transactions', y='CLV',
+            # Graphique 2 : Scatter plot (agrégé par cellules au-delà de quelques milliers de clients,
+            # la taille des points indique alors le nombre de clients de la cellule)
+            nuage, agrege = agreger_nuage(client_data, 'Nb_Transactions', 'CLV')
+            fig2 = px.scatter(nuage, x='Nb_Transactions', y='CLV',
                             title='💡 CLV vs Nombre de transactions',
                             template='plotly_dark', 
                             color='CLV',
                             color_continuous_scale='Turbo', 
-                            size='CLV',
+                            size='Nb_Points' if agrege else 'CLV',
                             size_max=20,
-                            labels={'Nb_Transactions': 'Nombre de transactions', 'CLV': 'CLV (€)'})
+                            labels={'Nb_Transactions': 'Nombre de transactions', 'CLV': 'CLV (€)',
+                                    'Nb_Points': 'Nombre de clients'})
             
             fig2.update_layout(
                 xaxis_title='Nombre de transactions',
@@ -368,7 +464,7 @@ def render_content(tab, start_date, end_date, category):
                     html.Div([
                         html.P("✅ Question 3 - Taux de récurrence des clients:", 
                             style={'color': '#00d4ff', 'fontWeight': 'bold'}),
-                        html.P(f"🔄 {taux_recurrence:.2f}% des clients sont récurrents ({clients_recurrents}/{len(client_data)} clients)", 
+                        html.P(texte_recurrence, 
                             style={'color': '#4ade80', 'fontSize': '1.2em', 'fontWeight': 'bold', 'marginLeft': '20px'})
                     ], style={'marginBottom': '15px'}),
                     html.Div([
@@ -392,69 +488,82 @@ def render_content(tab, start_date, end_date, category):
             ], style={'padding': '50px'})
         
     elif tab == 'tab-5':
-        # Tableau détaillé
-        table_data = filtered_df.sort_values('Date', ascending=False).head(100)
+        # Tableau détaillé : pages, tri et filtres calculés côté serveur (callback update_table)
+        nb_transactions = int(tranche['Nb_Transactions'].sum())
         
-        fig = go.Figure(data=[go.Table(
-            header=dict(values=['Date', 'Client', 'Montant', 'Catégorie', 'Paiement'],
-                       fill_color='#2c3e50',
-                       font=dict(color='white', size=12),
-                       align='left'),
-            cells=dict(values=[table_data['Date'].dt.strftime('%d/%m/%Y'),
-                              table_data['ID_Client'],
-                              table_data['Montant'].apply(lambda x: f"{x:.2f}€"),
-                              table_data['Categorie'],
-                              table_data['Mode_Paiement']],
-                      fill_color='#34495e',
-                      font=dict(color='white', size=11),
-                      align='left'))
-        ])
-        
-        fig.update_layout(
-            title='📋 Détails des transactions (100 dernières)',
-            template='plotly_dark',
-            height=600
+        table = dash_table.DataTable(
+            id='table-transactions',
+            columns=[{'name': libelle, 'id': colonne} for colonne, libelle in COLONNES_TABLE.items()],
+            page_current=0,
+            page_size=TAILLE_PAGE,
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[],
+            filter_action='custom',
+            filter_query='',
+            style_header={'backgroundColor': '#2c3e50', 'color': 'white', 'fontWeight': 'bold'},
+            style_cell={'backgroundColor': '#34495e', 'color': 'white', 'textAlign': 'left',
+                        'fontSize': 13, 'padding': '6px'},
+            style_filter={'backgroundColor': '#2c3e50', 'color': 'white'},
+            style_table={'overflowX': 'auto'}
         )
         
         return html.Div([
             html.Div([
                 html.H3("📋 Résumé des données", style={'color': 'white'}),
-                html.P(f"Nombre de transactions: {len(filtered_df)}", style={'color': '#e0e0e0'}),
-                html.P(f"CA total: {filtered_df['Montant'].sum():.2f}€", style={'color': '#e0e0e0'}),
-                html.P(f"Transaction min: {filtered_df['Montant'].min():.2f}€ | max: {filtered_df['Montant'].max():.2f}€", 
-                       style={'color': '#e0e0e0'})
+                html.P(f"Nombre de transactions: {nb_transactions}", style={'color': '#e0e0e0'}),
+                html.P(f"CA total: {tranche['CA'].sum():.2f}€", style={'color': '#e0e0e0'}),
+                html.P(f"Transaction min: {tranche['Montant_Min'].min():.2f}€ | max: {tranche['Montant_Max'].max():.2f}€", 
+                       style={'color': '#e0e0e0'}),
+                *([html.P(f"Transaction médiane: ≈ {vue.kpis['montant_median']:.2f}€ (mode approché)",
+                          style={'color': '#e0e0e0'})]
+                  if 'montant_median' in vue.kpis else [])
             ], style={'padding': '20px', 'backgroundColor': '#1e1e1e', 'borderRadius': '10px', 'marginBottom': '20px'}),
-            dcc.Graph(figure=fig)
+            html.Div([
+                html.H3("📋 Détails des transactions (les plus récentes en premier)", style={'color': 'white'}),
+                html.P(id='table-transactions-info', style={'color': '#b0b0b0', 'fontSize': '0.9em'}),
+                table
+            ], style={'padding': '20px', 'backgroundColor': '#1e1e1e', 'borderRadius': '10px'})
         ])
     
     elif tab == 'tab-6':
-        # Qualité des données
+        # Qualité des données : profil calculé une fois au nettoyage (conservé dans le cache)
+        profil = donnees.profil['colonnes']
+        rapport = donnees.rapport_nettoyage
+        rejets = rapport.get('rejets_par_regle', {})
+        montants = profil['Montant']
+        dates = profil['Date']
+        nb_manquants = sum(stats['manquants'] for stats in profil.values())
         return html.Div([
             html.H3("✅ Rapport de qualité des données", style={'color': 'white', 'marginBottom': '20px'}),
             
             html.Div([
                 html.H4("📊 Statistiques générales", style={'color': '#00d4ff'}),
-                html.P(f"Nombre total de transactions: {len(df)}", style={'color': '#e0e0e0'}),
-                html.P(f"Nombre de clients uniques: {df['ID_Client'].nunique()}", style={'color': '#e0e0e0'}),
-                html.P(f"Période couverte: du {df['Date'].min().date()} au {df['Date'].max().date()}", style={'color': '#e0e0e0'}),
-                html.P(f"Nombre de catégories: {df['Categorie'].nunique()}", style={'color': '#e0e0e0'}),
-                html.P(f"Nombre de modes de paiement: {df['Mode_Paiement'].nunique()}", style={'color': '#e0e0e0'})
+                html.P(f"Nombre total de transactions: {donnees.profil['nb_lignes']}", style={'color': '#e0e0e0'}),
+                html.P(f"Nombre de clients uniques: {profil['ID_Client']['distincts']}", style={'color': '#e0e0e0'}),
+                html.P(f"Période couverte: du {dates['min'][:10]} au {dates['max'][:10]}", style={'color': '#e0e0e0'}),
+                html.P(f"Nombre de catégories: {profil['Categorie']['distincts']}", style={'color': '#e0e0e0'}),
+                html.P(f"Nombre de modes de paiement: {profil['Mode_Paiement']['distincts']}", style={'color': '#e0e0e0'})
             ], style={'padding': '20px', 'backgroundColor': '#1e1e1e', 'borderRadius': '10px', 'marginBottom': '20px'}),
             
             html.Div([
                 html.H4("🔍 Validation des données", style={'color': '#00d4ff'}),
-                html.P(f"✅ Valeurs manquantes: {df.isnull().sum().sum()}", style={'color': '#4ade80'}),
-                html.P(f"✅ Doublons: 0 (déjà supprimés)", style={'color': '#4ade80'}),
-                html.P(f"✅ Valeurs aberrantes gérées", style={'color': '#4ade80'}),
+                html.P(f"✅ Valeurs manquantes: {nb_manquants}", style={'color': '#4ade80'}),
+                html.P(f"✅ Doublons: {rejets.get('doublons', 0)} (supprimés)", style={'color': '#4ade80'}),
+                html.P(f"✅ Lignes rejetées au nettoyage: {rapport.get('lignes_supprimees', 0)} "
+                       f"sur {rapport.get('lignes_initiales', donnees.profil['nb_lignes'])}", style={'color': '#4ade80'}),
+                html.Ul([html.Li(f"{regle.replace('_', ' ').capitalize()}: {nb}", style={'color': '#e0e0e0'})
+                         for regle, nb in rejets.items()]),
                 html.P(f"✅ Types de données validés", style={'color': '#4ade80'})
             ], style={'padding': '20px', 'backgroundColor': '#1e1e1e', 'borderRadius': '10px', 'marginBottom': '20px'}),
             
             html.Div([
                 html.H4("📈 Distribution des montants", style={'color': '#00d4ff'}),
-                html.P(f"Montant moyen: {df['Montant'].mean():.2f}€", style={'color': '#e0e0e0'}),
-                html.P(f"Écart-type: {df['Montant'].std():.2f}€", style={'color': '#e0e0e0'}),
-                html.P(f"Médiane: {df['Montant'].median():.2f}€", style={'color': '#e0e0e0'}),
-                html.P(f"Min: {df['Montant'].min():.2f}€ | Max: {df['Montant'].max():.2f}€", style={'color': '#e0e0e0'})
+                html.P(f"Montant moyen: {montants['moyenne']:.2f}€", style={'color': '#e0e0e0'}),
+                html.P(f"Écart-type: {montants['ecart_type']:.2f}€", style={'color': '#e0e0e0'}),
+                html.P(f"Médiane: {montants['mediane']:.2f}€", style={'color': '#e0e0e0'}),
+                html.P(f"Min: {montants['min']:.2f}€ | Max: {montants['max']:.2f}€", style={'color': '#e0e0e0'})
             ], style={'padding': '20px', 'backgroundColor': '#1e1e1e', 'borderRadius': '10px'})
         ])
 
@@ -0,0 +1,96 @@
+"""
+Benchmark du nettoyage : moteur à masque unique vs. ancien pipeline à filtres chaînés
+Vérifie que les deux produisent exactement le même résultat
+
+Usage: python benchmarks/bench_nettoyage.py [nb_lignes ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing import DataProcessor
+from benchmarks.generateur import generer_donnees_brutes
+
+
+def nettoyer_chaine(df_raw):
+    """Ancienne version de DataProcessor.nettoyer_donnees (filtres chaînés), pour comparaison"""
+    df_clean = df_raw.copy()
+    df_clean.dropna(how='all', inplace=True)
+    df_clean.drop_duplicates(inplace=True)
+    
+    # Identifiant manquant (None ou NaN) écarté, et non plus gardé sous le texte 'None' ;
+    # texte indépendant du type lu : 841, 841.0 et '841.0' donnent '841'
+    df_clean = df_clean[df_clean['ID_Client'].notna()]
+    df_clean['ID_Client'] = (df_clean['ID_Client']
+                             .map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else str(v))
+                             .str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True)
+                             .str.strip())
+    df_clean = df_clean[df_clean['ID_Client'] != '']
+    df_clean = df_clean[df_clean['ID_Client'] != 'nan']
+    
+    if df_clean['Montant'].dtype == 'object':
+        df_clean['Montant'] = df_clean['Montant'].astype(str).str.replace(',', '.')
+        df_clean['Montant'] = df_clean['Montant'].str.replace('€', '').str.strip()
+        df_clean['Montant'] = df_clean['Montant'].str.replace(' ', '')
+    df_clean['Montant'] = pd.to_numeric(df_clean['Montant'], errors='coerce')
+    df_clean = df_clean[df_clean['Montant'] > 0]
+    df_clean['Montant'] = df_clean['Montant'].round(2)
+    
+    df_clean['Date'] = pd.to_datetime(df_clean['Date'], errors='coerce')
+    df_clean = df_clean[df_clean['Date'].notna()]
+    df_clean = df_clean[df_clean['Date'] <= pd.Timestamp.now()]
+    
+    for col in ['Categorie', 'Mode_Paiement']:
+        df_clean[col] = df_clean[col].astype(str).str.strip()
+        df_clean[col] = df_clean[col].str.title()
+        df_clean = df_clean[df_clean[col].notna()]
+        df_clean = df_clean[df_clean[col] != 'Nan']
+        df_clean = df_clean[df_clean[col] != '']
+    
+    df_clean['Annee'] = df_clean['Date'].dt.year
+    df_clean['Mois'] = df_clean['Date'].dt.month
+    df_clean['Jour'] = df_clean['Date'].dt.day
+    df_clean['Jour_Semaine'] = df_clean['Date'].dt.day_name()
+    return df_clean
+
+
+def nettoyer_masque(df_raw):
+    processor = DataProcessor('benchmark.xlsx')
+    processor.df_raw = df_raw
+    processor.nettoyer_donnees()
+    return processor.df_clean
+
+
+def mesurer(fonction, df_raw):
+    """Retourne (résultat, durée en s, pic mémoire en Mo)"""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultat = fonction(df_raw)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic / 1024 ** 2
+
+
+if __name__ == "__main__":
+    tailles = [int(n) for n in sys.argv[1:]] or [100_000, 1_000_000]
+    
+    for nb_lignes in tailles:
+        df_raw = generer_donnees_brutes(nb_lignes)
+        ancien, t_ancien, m_ancien = mesurer(nettoyer_chaine, df_raw)
+        nouveau, t_nouveau, m_nouveau = mesurer(nettoyer_masque, df_raw)
+        
+        pd.testing.assert_frame_equal(ancien, nouveau, check_exact=True)
+        
+        print(f"📊 {len(df_raw)} lignes brutes -> {len(nouveau)} lignes propres (résultats identiques)")
+        print(f"  - Filtres chaînés : {t_ancien:.3f}s, pic mémoire {m_ancien:.1f} Mo")
+        print(f"  - Masque unique   : {t_nouveau:.3f}s, pic mémoire {m_nouveau:.1f} Mo")
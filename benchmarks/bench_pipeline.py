@@ -0,0 +1,211 @@
+"""
+Benchmark du pipeline de données et des callbacks du dashboard sur données synthétiques
+Durée et pic mémoire de chaque étape de DataProcessor, de calculer_kpis et de chaque onglet de render_content
+
+Usage: python benchmarks/bench_pipeline.py [--tailles 10000 100000 ...] [--sortie resultats.json]
+                                           [--comparer ancien.json] [--format csv|xlsx] [--excel]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_processing import DataProcessor
+from ecriture import ECRIVAINS
+from agregats import CubeKPI
+from benchmarks.reference import calculer_kpis
+from benchmarks.generateur import generer_donnees_brutes, ecrire_source
+
+ONGLETS = ['tab-1', 'tab-2', 'tab-3', 'tab-4', 'tab-5', 'tab-6']
+
+# Limite de lignes d'une feuille Excel (en-tête compris)
+LIGNES_MAX_XLSX = 1_048_575
+
+
+# Journaux des modules mesurés (le pipeline rapporte par logging, et non plus par print)
+JOURNAUX_MESURES = ('data_processing', 'ecriture', 'rechargement')
+
+
+@contextlib.contextmanager
+def sans_sortie():
+    """Ni print ni journaux INFO des modules mesurés (avertissements et erreurs conservés)"""
+    journaux = [logging.getLogger(nom) for nom in JOURNAUX_MESURES]
+    niveaux = [journal.level for journal in journaux]
+    for journal in journaux:
+        journal.setLevel(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        for journal, niveau in zip(journaux, niveaux):
+            journal.setLevel(niveau)
+
+
+def mesurer(fonction, *args):
+    """Exécute fonction(*args) sans sortie console ; retourne (résultat, durée en s, pic mémoire en Mo)"""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    with sans_sortie():
+        resultat = fonction(*args)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultat, duree, pic / 1024 ** 2
+
+
+def importer_app():
+    """Importe app.py (le module charge l'échantillon data/data_kpi.xlsx à l'import)"""
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    dossier_courant = os.getcwd()
+    os.chdir(racine)
+    try:
+        with sans_sortie():
+            import app
+    finally:
+        os.chdir(dossier_courant)
+    return app
+
+
+def benchmark_taille(nb_lignes, seed, format_source, dossier, app=None, excel=False):
+    """Mesure chaque étape pour un jeu de nb_lignes lignes ; retourne un dict sérialisable
+
+    excel=False : l'écrivain Excel (openpyxl, près de 30 s pour 20 000 lignes) n'est pas mesuré.
+    """
+    etapes = {}
+
+    def etape(nom, fonction, *args, lignes=None):
+        resultat, duree, pic = mesurer(fonction, *args)
+        etapes[nom] = {'duree_s': round(duree, 6), 'pic_memoire_mo': round(pic, 3)}
+        if lignes is not None:
+            etapes[nom]['lignes'] = lignes()
+        print(f"  - {nom:<32} {duree:9.3f}s  {pic:9.1f} Mo")
+        return resultat
+
+    df_brut = etape('generation', generer_donnees_brutes, nb_lignes, seed, True)
+    if format_source == 'xlsx' and len(df_brut) > LIGNES_MAX_XLSX:
+        format_source = 'csv'
+    chemin = os.path.join(dossier, f"bench_{nb_lignes}.{format_source}")
+    etape('ecriture_source', ecrire_source, df_brut, chemin)
+    del df_brut
+
+    processor = DataProcessor(chemin, dossier_cache=os.path.join(dossier, '.cache'))
+    etape('charger_donnees', processor.charger_donnees, lignes=lambda: len(processor.df_raw))
+    etape('standardiser_colonnes', processor.standardiser_colonnes)
+    etape('nettoyer_donnees', processor.nettoyer_donnees, lignes=lambda: len(processor.df_clean))
+    processor.df_raw = None
+    etape('valider_donnees', processor.valider_donnees)
+    etape('compacter_schema', processor.compacter_schema)
+    etape('profiler_donnees', processor.profiler_donnees)
+    etape('generer_rapport', processor.generer_rapport)
+    formats = [f for f in ECRIVAINS if f != 'excel' or (excel and len(processor.df_clean) <= LIGNES_MAX_XLSX)]
+    for format_sortie in formats:
+        etape(f'sauvegarder_donnees_propres.{format_sortie}', processor.sauvegarder_donnees_propres,
+              os.path.join(dossier, f"bench_{nb_lignes}_clean"), [format_sortie], False)
+        etapes[f'sauvegarder_donnees_propres.{format_sortie}']['octets'] = processor.sauvegardes[0].get('octets')
+    etape('sauvegarder_cache', processor.sauvegarder_cache)
+    etape('charger_depuis_cache', DataProcessor(chemin, dossier_cache=processor.dossier_cache).charger_depuis_cache)
+    etape('charger_et_nettoyer_par_blocs',
+          DataProcessor(chemin, dossier_cache=processor.dossier_cache).charger_et_nettoyer_par_blocs)
+
+    df = processor.df_clean
+    cube = etape('cube_kpi', CubeKPI, df)
+    etape('cube.calculer_kpis', cube.calculer_kpis)
+    etape('calculer_kpis', calculer_kpis, df)
+
+    if app is not None:
+        # Branches de render_content appelées directement (sans le cache des onglets)
+        from rechargement import Instantane
+        instantane = etape('instantane', Instantane, df, f"bench-{nb_lignes}")
+        debut, fin = df['Date'].quantile([0.25, 0.75]).dt.date.astype(str)
+        categorie = df['Categorie'].mode()[0]
+        filtres = {'tout': (None, None, 'ALL'), 'filtre': (debut, fin, categorie)}
+        for nom_filtre, (start_date, end_date, category) in filtres.items():
+            for tab in ONGLETS:
+                etape(f"render_content.{tab}.{nom_filtre}",
+                      lambda *f: json.dumps(app.construire_onglet(instantane, tab, *f),
+                                            cls=plotly.utils.PlotlyJSONEncoder),
+                      start_date, end_date, category)
+
+    return {
+        'nb_lignes': nb_lignes,
+        'lignes_brutes': processor.rapport_nettoyage['lignes_initiales'],
+        'lignes_propres': len(df),
+        'format_source': format_source,
+        'etapes': etapes
+    }
+
+
+def comparer(resultats, chemin_reference):
+    """Affiche le rapport de durée (actuel / référence) de chaque étape commune"""
+    with open(chemin_reference, 'r', encoding='utf-8') as f:
+        reference = {r['nb_lignes']: r for r in json.load(f)['resultats']}
+
+    print(f"\n📈 Comparaison avec {chemin_reference} (durée actuelle / référence)")
+    for resultat in resultats:
+        ancien = reference.get(resultat['nb_lignes'])
+        if ancien is None:
+            continue
+        print(f"\n📊 {resultat['nb_lignes']} lignes")
+        for nom, mesure in resultat['etapes'].items():
+            if nom in ancien['etapes'] and ancien['etapes'][nom]['duree_s'] > 0:
+                ratio = mesure['duree_s'] / ancien['etapes'][nom]['duree_s']
+                print(f"  - {nom:<32} x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline et des callbacks du dashboard")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="nombres de lignes (jusqu'à 10 000 000)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv',
+                        help="format du fichier source (xlsx ramené à csv au-delà de la limite Excel)")
+    parser.add_argument('--sans-dashboard', action='store_true',
+                        help="ne mesure pas les onglets (dash non requis)")
+    parser.add_argument('--excel', action='store_true',
+                        help="mesure aussi l'écriture Excel du fichier nettoyé (plusieurs minutes dès 1 000 000 lignes)")
+    parser.add_argument('--sortie', default=None, help="fichier JSON des résultats")
+    parser.add_argument('--comparer', default=None, help="fichier JSON d'un run précédent")
+    args = parser.parse_args()
+
+    app = None if args.sans_dashboard else importer_app()
+
+    resultats = []
+    with tempfile.TemporaryDirectory(prefix='bench_dashboard_') as dossier:
+        for nb_lignes in args.tailles:
+            print(f"\n📊 {nb_lignes} lignes")
+            resultats.append(benchmark_taille(nb_lignes, args.seed, args.format, dossier, app, args.excel))
+
+    sortie = args.sortie or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultats',
+                                         f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+    with open(sortie, 'w', encoding='utf-8') as f:
+        json.dump({
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'seed': args.seed,
+            'environnement': {
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'processeurs': os.cpu_count()
+            },
+            'resultats': resultats
+        }, f, indent=2)
+    print(f"\n💾 Résultats écrits dans {sortie}")
+
+    if args.comparer:
+        comparer(resultats, args.comparer)
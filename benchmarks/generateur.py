@@ -0,0 +1,81 @@
+"""
+Générateur de transactions synthétiques pour les benchmarks
+Schéma ID_Client / Montant / Date / Categorie / Mode_Paiement, avec variantes sales reproductibles (graine)
+
+Usage: python benchmarks/generateur.py nb_lignes fichier_sortie [--seed N] [--noms-alternatifs]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Noms de colonnes alternatifs rencontrés dans les exports (tous reconnus par MAPPING_COLONNES)
+NOMS_ALTERNATIFS = {
+    'ID_Client': 'Client ID',
+    'Montant': 'Montant de la transaction',
+    'Date': 'Date de la transaction',
+    'Categorie': 'Catégorie de produit',
+    'Mode_Paiement': 'Mode de paiement'
+}
+
+
+def generer_donnees_brutes(nb_lignes, seed=42, noms_alternatifs=False):
+    """Génère un jeu de données brut avec des valeurs sales
+
+    - montants : virgule décimale, symbole €, négatifs, texte
+    - catégories et modes de paiement : casse et espaces variables, valeurs vides
+    - identifiants manquants, doublons exacts (2 %)
+    noms_alternatifs=True utilise les en-têtes de NOMS_ALTERNATIFS au lieu des noms standardisés.
+    """
+    rng = np.random.default_rng(seed)
+    montants = rng.gamma(2.0, 80.0, nb_lignes).round(2).astype(str).astype(object)
+    # Montants sales : virgule décimale, symbole €, négatifs, texte
+    sales = rng.random(nb_lignes)
+    montants[sales < 0.05] = np.char.replace(montants[sales < 0.05].astype(str), '.', ',')
+    montants[(sales >= 0.05) & (sales < 0.08)] = [f"{m} €" for m in montants[(sales >= 0.05) & (sales < 0.08)]]
+    montants[(sales >= 0.08) & (sales < 0.09)] = '-10'
+    montants[(sales >= 0.09) & (sales < 0.095)] = 'abc'
+
+    dates = pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 1500, nb_lignes), unit='D')
+    categories = rng.choice(['Maison', 'jouets ', 'Vêtements', 'ÉLECTRONIQUE', '', None], nb_lignes,
+                            p=[0.3, 0.2, 0.25, 0.23, 0.01, 0.01])
+    modes = rng.choice(['Carte bancaire', 'paypal', 'Virement', None], nb_lignes, p=[0.6, 0.25, 0.14, 0.01])
+    ids = rng.integers(1, max(nb_lignes // 5, 2), nb_lignes).astype(str).astype(object)
+    ids[rng.random(nb_lignes) < 0.005] = None
+
+    df = pd.DataFrame({
+        'ID_Client': ids,
+        'Montant': montants,
+        'Date': dates,
+        'Categorie': categories,
+        'Mode_Paiement': modes
+    })
+    # Doublons exacts
+    nb_doublons = nb_lignes // 50
+    df = pd.concat([df, df.sample(nb_doublons, random_state=seed)], ignore_index=True)
+    if noms_alternatifs:
+        df = df.rename(columns=NOMS_ALTERNATIFS)
+    return df
+
+
+def ecrire_source(df, chemin):
+    """Écrit le jeu brut en CSV ou xlsx selon l'extension (xlsx limité à 1 048 575 lignes)"""
+    if chemin.lower().endswith('.csv'):
+        df.to_csv(chemin, index=False)
+    else:
+        df.to_excel(chemin, index=False)
+    return chemin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un export de transactions synthétiques")
+    parser.add_argument('nb_lignes', type=int)
+    parser.add_argument('sortie', help="fichier .csv ou .xlsx")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--noms-alternatifs', action='store_true')
+    args = parser.parse_args()
+
+    df = generer_donnees_brutes(args.nb_lignes, args.seed, args.noms_alternatifs)
+    ecrire_source(df, args.sortie)
+    print(f"✅ {len(df)} lignes écrites dans {args.sortie}")
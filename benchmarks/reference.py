@@ -0,0 +1,43 @@
+"""
+Calcul exact des KPI sur les transactions, tel que le faisait le dashboard avant le cube d'agrégats
+Référence des benchmarks (durée) et des tests (CubeKPI doit donner les mêmes valeurs)
+"""
+
+
+def calculer_kpis(dataframe):
+    """Calcule tous les KPI nécessaires (parcours complet des transactions filtrées)"""
+    kpis = {}
+    
+    # KPI 1: Valeur moyenne des transactions
+    kpis['montant_moyen'] = dataframe['Montant'].mean()
+    
+    # KPI 2: Répartition par catégorie
+    kpis['repartition_categorie'] = dataframe.groupby('Categorie', observed=True)['Montant'].sum()
+    kpis['pourcentage_categorie'] = (kpis['repartition_categorie'] / 
+                                      kpis['repartition_categorie'].sum() * 100)
+    
+    # KPI 3: Taux de récurrence
+    transactions_par_client = dataframe.groupby('ID_Client', observed=True).size()
+    clients_recurrents = (transactions_par_client > 1).sum()
+    kpis['taux_recurrence'] = (clients_recurrents / len(transactions_par_client) * 100)
+    
+    # KPI 4: Modes de paiement
+    kpis['modes_paiement'] = dataframe['Mode_Paiement'].value_counts()
+    kpis['pourcentage_paiement'] = (kpis['modes_paiement'] / 
+                                     kpis['modes_paiement'].sum() * 100)
+    
+    # KPI 5: CLV moyenne
+    clv_par_client = dataframe.groupby('ID_Client', observed=True)['Montant'].sum()
+    kpis['clv_moyenne'] = clv_par_client.mean()
+    kpis['clv_distribution'] = clv_par_client
+    
+    # KPI 6: Performance par catégorie
+    kpis['top_categorie'] = kpis['repartition_categorie'].idxmax()
+    kpis['ca_top_categorie'] = kpis['repartition_categorie'].max()
+    
+    # Statistiques additionnelles
+    kpis['nb_transactions'] = len(dataframe)
+    kpis['nb_clients'] = dataframe['ID_Client'].nunique()
+    kpis['ca_total'] = dataframe['Montant'].sum()
+    
+    return kpis
@@ -0,0 +1,221 @@
+"""
+Caches partagés par les callbacks du dashboard
+Cache mémoire par processus (CacheLRU) ou cache SQLite commun aux workers gunicorn (CacheSQLite)
+"""
+
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Chemin du cache SQLite partagé entre workers (désactivé si absent)
+VARIABLE_CACHE_PARTAGE = 'DASHBOARD_CACHE_PARTAGE'
+
+
+class CacheLRU:
+    """Cache LRU borné, sûr entre threads, avec compteurs succès/échecs
+
+    La borne porte sur le nombre d'entrées et, si taille_valeur est fourni,
+    sur la taille cumulée des valeurs (en octets).
+    """
+
+    def __init__(self, taille_max=64, taille_max_octets=None, taille_valeur=None):
+        self.taille_max = taille_max
+        self.taille_max_octets = taille_max_octets
+        self.taille_valeur = taille_valeur
+        self._entrees = OrderedDict()
+        self._tailles = {}
+        self._verrou = threading.Lock()
+        self.octets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def obtenir(self, cle, calculer):
+        """Retourne la valeur associée à cle, en la calculant avec calculer() si absente"""
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.hits += 1
+                return self._entrees[cle]
+            self.misses += 1
+
+        # Calcul hors verrou : les autres callbacks ne sont pas bloqués
+        valeur = calculer()
+
+        taille = self.taille_valeur(valeur) if self.taille_valeur else 0
+        if self.taille_max_octets is not None and taille > self.taille_max_octets:
+            return valeur
+
+        with self._verrou:
+            if cle in self._entrees:
+                self.octets -= self._tailles[cle]
+            self._entrees[cle] = valeur
+            self._tailles[cle] = taille
+            self.octets += taille
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max or (
+                    self.taille_max_octets is not None and self.octets > self.taille_max_octets):
+                ancienne, _ = self._entrees.popitem(last=False)
+                self.octets -= self._tailles.pop(ancienne)
+                self.evictions += 1
+        return valeur
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._tailles.clear()
+            self.octets = 0
+
+    def statistiques(self):
+        """Compteurs du cache (taux de succès en %)"""
+        total = self.hits + self.misses
+        return {
+            'entrees': len(self._entrees),
+            'taille_max': self.taille_max,
+            'octets': self.octets,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'taux_hit': (self.hits / total * 100) if total > 0 else 0
+        }
+
+
+class CacheSQLite:
+    """Cache LRU sur disque (SQLite) partagé entre les workers d'un même serveur
+
+    Même interface que CacheLRU ; les valeurs doivent être des chaînes (JSON).
+    Chaque cache occupe sa propre table ; l'éviction se fait par date du dernier
+    accès dès que la taille cumulée dépasse taille_max_octets.
+    """
+
+    def __init__(self, chemin, nom, taille_max=None, taille_max_octets=64 * 1024 * 1024):
+        self.chemin = chemin
+        self.table = f"cache_{nom}"
+        self.taille_max = taille_max
+        self.taille_max_octets = taille_max_octets
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+        with self._connexion() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                         "cle TEXT PRIMARY KEY, valeur TEXT NOT NULL, "
+                         "taille INTEGER NOT NULL, dernier_acces REAL NOT NULL)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_acces ON {self.table} (dernier_acces)")
+
+    def _connexion(self):
+        """Connexion propre au thread (et au processus, après un fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _cle(cle):
+        return hashlib.sha1(repr(cle).encode('utf-8')).hexdigest()
+
+    def __len__(self):
+        return self._connexion().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def obtenir(self, cle, calculer):
+        """Retourne la valeur associée à cle, en la calculant avec calculer() si absente"""
+        cle_sql = self._cle(cle)
+        conn = self._connexion()
+        ligne = conn.execute(f"SELECT valeur FROM {self.table} WHERE cle = ?", (cle_sql,)).fetchone()
+        if ligne is not None:
+            self.hits += 1
+            conn.execute(f"UPDATE {self.table} SET dernier_acces = ? WHERE cle = ?", (time.time(), cle_sql))
+            return ligne[0]
+        self.misses += 1
+
+        valeur = calculer()
+        if self.taille_max_octets is not None and len(valeur) > self.taille_max_octets:
+            return valeur
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                         (cle_sql, valeur, len(valeur), time.time()))
+            self._evincer(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return valeur
+
+    def _evincer(self, conn):
+        """Supprime les entrées les moins récemment utilisées au-delà des bornes"""
+        nb, octets = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM {self.table}").fetchone()
+        if self.taille_max is not None and nb > self.taille_max:
+            self.evictions += conn.execute(
+                f"DELETE FROM {self.table} WHERE cle IN (SELECT cle FROM {self.table} "
+                "ORDER BY dernier_acces LIMIT ?)", (nb - self.taille_max,)).rowcount
+            nb, octets = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM {self.table}").fetchone()
+        if self.taille_max_octets is None:
+            return
+        for cle, taille in conn.execute(f"SELECT cle, taille FROM {self.table} ORDER BY dernier_acces").fetchall():
+            if octets <= self.taille_max_octets:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE cle = ?", (cle,))
+            octets -= taille
+            self.evictions += 1
+
+    def vider(self):
+        self._connexion().execute(f"DELETE FROM {self.table}")
+
+    def statistiques(self):
+        """Compteurs du cache (succès/échecs propres au worker, occupation commune)"""
+        nb, octets = self._connexion().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM {self.table}").fetchone()
+        total = self.hits + self.misses
+        return {
+            'entrees': nb,
+            'taille_max': self.taille_max,
+            'octets': octets,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'taux_hit': (self.hits / total * 100) if total > 0 else 0
+        }
+
+
+def creer_cache(nom, taille_max=64, taille_max_octets=None, taille_valeur=None):
+    """Crée un cache partagé entre workers si DASHBOARD_CACHE_PARTAGE est défini, sinon un CacheLRU
+
+    Le cache partagé ne stocke que des chaînes : ne l'utiliser que pour des valeurs sérialisées.
+    """
+    chemin = os.environ.get(VARIABLE_CACHE_PARTAGE)
+    if chemin:
+        return CacheSQLite(chemin, nom, taille_max=taille_max,
+                           taille_max_octets=taille_max_octets or 64 * 1024 * 1024)
+    return CacheLRU(taille_max=taille_max, taille_max_octets=taille_max_octets, taille_valeur=taille_valeur)
+
+
+def vider_cache_partage(chemin):
+    """Vide toutes les tables du cache SQLite partagé ; retourne le nombre de tables vidées
+
+    Appelé au démarrage du serveur : après un déploiement, le rendu mis en cache
+    par l'ancienne version ne doit plus être servi.
+    """
+    if not chemin or not os.path.exists(chemin):
+        return 0
+    with contextlib.closing(sqlite3.connect(chemin, timeout=30, isolation_level=None)) as conn:
+        tables = [nom for (nom,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                  if nom.startswith('cache_')]
+        for table in tables:
+            conn.execute(f"DELETE FROM {table}")
+    return len(tables)
@@ -5,221 +5,696 @@ VERSION CORRIGÉE pour gérer tous les formats de colonnes
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+from instrumentation import MesureEtapes
+from entetes import ResolveurEntetes
+from ecriture import ECRIVAINS, FORMATS_DEFAUT, ecrire_en_arriere_plan, ecrire_formats, format_depuis_chemin
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+try:
+    import fcntl
+except ImportError:
+    # Hors POSIX : pas de verrou entre processus sur le magasin incrémental
+    fcntl = None
+
+# Colonnes texte encodées en codes entiers + dictionnaire (dtype category)
+COLONNES_TEXTE = ['ID_Client', 'Categorie', 'Mode_Paiement', 'Jour_Semaine']
+
+# Orthographes connues des noms de colonnes ; les variantes de casse, d'accents,
+# de séparateurs et d'espaces et les en-têtes proches sont résolus par entetes.ResolveurEntetes
+MAPPING_COLONNES = {
+    # ID Client - toutes variantes
+    'ID Client': 'ID_Client',
+    'id client': 'ID_Client',
+    'ID_client': 'ID_Client',
+    'id_client': 'ID_Client',
+    'Client ID': 'ID_Client',
+    'client_id': 'ID_Client',
+    'ClientID': 'ID_Client',
+    'ID_Client': 'ID_Client',
+    'Customer ID': 'ID_Client',
+    
+    # Montant - toutes variantes
+    'Montant': 'Montant',
+    'montant': 'Montant',
+    'Montant de la transaction': 'Montant',
+    'Montant_Transaction': 'Montant',
+    'montant_transaction': 'Montant',
+    'MontantTransaction': 'Montant',
+    'Transaction': 'Montant',
+    'Amount': 'Montant',
+    'Prix': 'Montant',
+    
+    # Date - toutes variantes
+    'Date': 'Date',
+    'date': 'Date',
+    'Date de la transaction': 'Date',
+    'Date_Transaction': 'Date',
+    'date_transaction': 'Date',
+    'DateTransaction': 'Date',
+    'Transaction Date': 'Date',
+    
+    # Catégorie - toutes variantes
+    'Catégorie': 'Categorie',
+    'Categorie': 'Categorie',
+    'categorie': 'Categorie',
+    'Category': 'Categorie',
+    'Catégorie de produit': 'Categorie',
+    'Categorie_Produit': 'Categorie',
+    'categorie_produit': 'Categorie',
+    'CategorieProduit': 'Categorie',
+    'Produit': 'Categorie',
+    'Product Category': 'Categorie',
+    
+    # Mode de paiement - toutes variantes
+    'Mode de paiement': 'Mode_Paiement',
+    'Mode_de_paiement': 'Mode_Paiement',
+    'Paiement': 'Mode_Paiement',
+    'Payment': 'Mode_Paiement',
+    'Mode_Paiement': 'Mode_Paiement',
+    'mode_paiement': 'Mode_Paiement',
+    'ModePaiement': 'Mode_Paiement',
+    'Mode de règlement': 'Mode_Paiement',
+    'Payment Method': 'Mode_Paiement'
+}
+
+COLONNES_REQUISES = ['ID_Client', 'Montant', 'Date', 'Categorie', 'Mode_Paiement']
+
+# Taille par défaut des blocs en lecture par flux
+TAILLE_BLOC = 100_000
+
+# Types compacts des colonnes temporelles dérivées
+TYPES_COMPACTS = {'Annee': 'int16', 'Mois': 'int8', 'Jour': 'int8'}
+
+# Extensions reconnues lorsqu'un dossier est fourni comme source
+EXTENSIONS_SOURCES = ('.xlsx', '.xls', '.csv')
+
+# Version des règles de nettoyage : à incrémenter à chaque modification de
+# nettoyer_donnees pour invalider les caches existants
+VERSION_NETTOYAGE = 6
+
+# Modes du pipeline : 'serve' (démarrage du dashboard : nettoyage et cache seulement),
+# 'batch' (+ rapport et fichier nettoyé), 'diagnose' (+ aperçu détaillé des données brutes)
+MODES_PIPELINE = ('serve', 'batch', 'diagnose')
+
+# Nombre maximal de modalités détaillées par colonne dans le profil de qualité
+MAX_MODALITES_PROFIL = 20
+
+# Chemin (sans extension) du fichier nettoyé ; l'extension dépend du format (voir ecriture.ECRIVAINS)
+CHEMIN_DONNEES_PROPRES = 'data/data_kpi_clean'
+
+
+def _transformer_valeurs_uniques(serie, transformation):
+    """Applique une transformation de texte une seule fois par valeur distincte
+    
+    Les colonnes à faible cardinalité (catégories, modes de paiement, clients)
+    sont factorisées ; le résultat est identique à une application ligne à ligne.
+    """
+    entiers = pd.api.types.is_integer_dtype(serie.dtype) and not isinstance(serie.dtype, pd.api.extensions.ExtensionDtype)
+    if serie.dtype != 'object' and not entiers:
+        return transformation(serie)
+    
+    codes, uniques = pd.factorize(serie)
+    # Des objets de types différents peuvent être égaux (1 == 1.0) : seul le texte est sûr
+    if not entiers and not all(isinstance(valeur, str) for valeur in uniques):
+        return transformation(serie)
+    
+    valeurs = transformation(pd.Series(uniques, dtype=serie.dtype))
+    resultat = np.empty(len(serie), dtype=object)
+    na = codes < 0
+    resultat[~na] = valeurs.to_numpy(dtype=object)[codes[~na]]
+    if na.any():
+        resultat[na] = transformation(serie[na]).to_numpy(dtype=object)
+    return pd.Series(resultat, index=serie.index, name=serie.name, dtype=valeurs.dtype)
+
+
+def _texte_canonique(serie):
+    """Texte de chaque valeur brute, indépendant du type inféré à la lecture (NaN conservés)
+    
+    Une colonne d'identifiants est lue en int64, en float64 (dès qu'une valeur
+    manque) ou en texte selon le fichier ou le bloc, et un export issu d'une
+    colonne flottante écrit '841.0' : 841, 841.0, '841' et '841.0' donnent
+    tous '841'. Calculé une seule fois par valeur distincte.
+    """
+    codes, uniques = pd.factorize(serie)
+    textes = pd.Series([str(int(v)) if isinstance(v, (float, np.floating)) and float(v).is_integer() else str(v)
+                        for v in uniques], dtype=object)
+    textes = textes.str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True).to_numpy(dtype=object)
+    resultat = np.full(len(serie), np.nan, dtype=object)
+    connus = codes >= 0
+    resultat[connus] = textes[codes[connus]]
+    return pd.Series(resultat, index=serie.index, name=serie.name, dtype=object)
+
+
+def profiler_colonnes(df, nb_modalites=MAX_MODALITES_PROFIL, nb_classes=20):
+    """Profil de qualité de chaque colonne (sérialisable en JSON)
+
+    Valeurs manquantes et distinctes pour toutes les colonnes ; étendue,
+    moyenne, écart-type, quartiles et histogramme pour les colonnes numériques ;
+    période et volume mensuel pour les dates ; effectifs des modalités les plus
+    fréquentes pour les colonnes category (une seule passe sur les codes).
+    """
+    profil = {}
+    for col in df.columns:
+        serie = df[col]
+        stats = {'type': str(serie.dtype)}
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codes = serie.cat.codes.to_numpy()
+            effectifs = np.bincount(codes[codes >= 0], minlength=len(serie.cat.categories))
+            stats['manquants'] = int((codes < 0).sum())
+            stats['distincts'] = int((effectifs > 0).sum())
+            ordre = np.argsort(-effectifs, kind='stable')[:nb_modalites]
+            stats['modalites'] = {str(serie.cat.categories[i]): int(effectifs[i]) for i in ordre if effectifs[i] > 0}
+        elif pd.api.types.is_datetime64_any_dtype(serie):
+            valeurs = serie.dropna()
+            stats['manquants'] = int(len(serie) - len(valeurs))
+            stats['distincts'] = int(valeurs.nunique())
+            if len(valeurs):
+                stats['min'], stats['max'] = str(valeurs.min()), str(valeurs.max())
+                mois = valeurs.dt.to_period('M').value_counts().sort_index()
+                stats['par_mois'] = {str(periode): int(nb) for periode, nb in mois.items()}
+        elif pd.api.types.is_numeric_dtype(serie):
+            valeurs = serie.to_numpy(dtype=float)
+            valeurs = valeurs[~np.isnan(valeurs)]
+            stats['manquants'] = int(len(serie) - len(valeurs))
+            stats['distincts'] = int(len(pd.unique(valeurs)))
+            if len(valeurs):
+                q1, mediane, q3 = np.percentile(valeurs, [25, 50, 75])
+                effectifs, bords = np.histogram(valeurs, bins=nb_classes)
+                stats.update({
+                    'min': float(valeurs.min()), 'max': float(valeurs.max()),
+                    'moyenne': float(valeurs.mean()),
+                    'ecart_type': float(valeurs.std(ddof=1)) if len(valeurs) > 1 else 0.0,
+                    'q1': float(q1), 'mediane': float(mediane), 'q3': float(q3),
+                    'histogramme': {'bords': bords.tolist(), 'effectifs': effectifs.tolist()}
+                })
+        else:
+            stats['manquants'] = int(serie.isna().sum())
+            stats['distincts'] = int(serie.nunique())
+        profil[col] = stats
+    return profil
+
+def montants_en_euros(df):
+    """df avec Montant en euros (float64) s'il stocke Montant_Centimes (option montant_en_centimes)
+
+    Les KPI, le cube et le dashboard lisent Montant en euros ; df est retourné tel quel sinon.
+    """
+    if 'Montant_Centimes' not in df.columns or 'Montant' in df.columns:
+        return df
+    df = df.copy(deep=False)
+    df.insert(df.columns.get_loc('Montant_Centimes'), 'Montant', df['Montant_Centimes'] / 100)
+    return df.drop(columns='Montant_Centimes')
+
 class DataProcessor:
     """Classe pour traiter et nettoyer les données du fichier Excel"""
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, dossier_cache=None, montant_en_centimes=False, formats_sortie=FORMATS_DEFAUT):
         self.file_path = file_path
+        self.montant_en_centimes = montant_en_centimes
+        # Formats du fichier nettoyé (voir ecriture.ECRIVAINS) ; Excel uniquement sur demande
+        self.formats_sortie = tuple(formats_sortie)
         self.df_raw = None
         self.df_clean = None
         self.rapport_nettoyage = {}
+        # Identifiant du jeu de données (empreinte du fichier + version du nettoyage)
+        self.version_donnees = None
+        # Mode incrémental : filigrane (date max, fichiers intégrés) et hachages triés des lignes vues
+        self.filigrane = {}
+        self.hachages_vus = None
+        # Mesures par étape du dernier pipeline exécuté et durée cumulée de chaque règle de nettoyage
+        self.mesures = None
+        self.rapport_performance = {}
+        self.durees_regles = {}
+        # Dernière erreur de chargement (message)
+        self.erreur = None
+        # Écriture du fichier nettoyé en cours (Future) et mesures des dernières écritures
+        self.sauvegarde = None
+        self.sauvegardes = []
         
+        # Cache colonnaire (Feather) à côté du fichier source par défaut
+        if dossier_cache is None:
+            dossier_cache = os.path.join(os.path.dirname(os.path.abspath(file_path)), '.cache')
+        self.dossier_cache = dossier_cache
+        # Résolution des en-têtes, mémoïsée par empreinte d'en-tête dans le dossier de cache
+        self.resolveur_entetes = ResolveurEntetes(MAPPING_COLONNES, dossier_cache)
+        self.resolution_entetes = {}
+        
+    def _est_csv(self):
+        return str(self.file_path).lower().endswith('.csv')
+    
     def charger_donnees(self):
-        """Charge les données depuis le fichier Excel"""
-        print("📂 Chargement des données...")
+        """Charge les données depuis le fichier Excel (ou CSV)"""
+        logger.info("📂 Chargement des données...")
         try:
-            self.df_raw = pd.read_excel(self.file_path)
-            print(f"✅ Données chargées: {len(self.df_raw)} lignes, {len(self.df_raw.columns)} colonnes")
-            print(f"\n📊 Colonnes trouvées: {list(self.df_raw.columns)}")
+            if self._est_csv():
+                self.df_raw = pd.read_csv(self.file_path, dtype=self._types_lecture_csv())
+            else:
+                self.df_raw = pd.read_excel(self.file_path)
+            logger.info(f"✅ Données chargées: {len(self.df_raw)} lignes, {len(self.df_raw.columns)} colonnes")
+            logger.info(f"\n📊 Colonnes trouvées: {list(self.df_raw.columns)}")
             return True
         except FileNotFoundError:
-            print(f"❌ ERREUR: Fichier '{self.file_path}' non trouvé!")
+            self.erreur = f"❌ ERREUR: Fichier '{self.file_path}' non trouvé!"
+            logger.error(self.erreur)
+            return False
+        except Exception as e:
+            self.erreur = f"❌ ERREUR lors du chargement: {e}"
+            logger.error(self.erreur)
+            return False
+    
+    def lire_par_blocs(self, taille_bloc=TAILLE_BLOC):
+        """Générateur de blocs bruts (DataFrame) de taille_bloc lignes
+        
+        xlsx : itération openpyxl en lecture seule (la feuille n'est jamais chargée entière)
+        CSV : lecteur pandas par morceaux. L'index des blocs suit la numérotation globale des lignes.
+        """
+        if self._est_csv():
+            yield from pd.read_csv(self.file_path, chunksize=taille_bloc, dtype=self._types_lecture_csv())
+            return
+        
+        from openpyxl import load_workbook
+        classeur = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            lignes = classeur.worksheets[0].iter_rows(values_only=True)
+            entetes = next(lignes, None)
+            if entetes is None:
+                return
+            entetes = [str(e) if e is not None else f"Unnamed: {i}" for i, e in enumerate(entetes)]
+            identifiants = self._entetes_identifiants(entetes)
+            
+            debut = 0
+            bloc = []
+            # Comme read_excel, les lignes vides en fin de feuille sont ignorées
+            vides_en_attente = []
+            for ligne in lignes:
+                if all(valeur is None for valeur in ligne):
+                    vides_en_attente.append(ligne)
+                    continue
+                bloc.extend(vides_en_attente)
+                vides_en_attente = []
+                # Comme read_excel, les flottants entiers deviennent des entiers
+                bloc.append(tuple(int(v) if isinstance(v, float) and v.is_integer() else v for v in ligne))
+                if len(bloc) >= taille_bloc:
+                    yield self._bloc_vers_dataframe(bloc, entetes, debut, identifiants)
+                    debut += len(bloc)
+                    bloc = []
+            if bloc:
+                yield self._bloc_vers_dataframe(bloc, entetes, debut, identifiants)
+        finally:
+            classeur.close()
+    
+    @staticmethod
+    def _bloc_vers_dataframe(lignes, entetes, debut, identifiants=()):
+        """Bloc de lignes openpyxl -> DataFrame ; les colonnes identifiants restent du texte dans tous les blocs
+        
+        Comme read_excel, les cellules vides (None) deviennent NaN.
+        """
+        df = pd.DataFrame.from_records(lignes, columns=entetes, index=pd.RangeIndex(debut, debut + len(lignes)))
+        df = df.mask(df.isna(), np.nan)
+        autres = [col for col in df.columns if col not in identifiants]
+        df[autres] = df[autres].infer_objects()
+        for col in identifiants:
+            df[col] = _texte_canonique(df[col])
+        return df
+    
+    def _entetes_identifiants(self, entetes):
+        """En-têtes bruts résolus en ID_Client (lus comme texte : le type inféré varierait d'un bloc à l'autre)"""
+        mapping, _, _ = self.resolveur_entetes.resoudre(entetes)
+        return [e for e in entetes if mapping.get(str(e), str(e).strip()) == 'ID_Client']
+    
+    def _types_lecture_csv(self):
+        """dtype de pd.read_csv : identifiants clients en texte"""
+        entetes = pd.read_csv(self.file_path, nrows=0).columns
+        return {entete: str for entete in self._entetes_identifiants(entetes)}
+    
+    @staticmethod
+    def _doublons_inter_blocs(bloc, hachages_vus):
+        """Masque des lignes déjà vues (dans le bloc ou un bloc précédent), via un hachage par ligne"""
+        # Hachage du texte des valeurs : le type inféré peut changer d'un bloc à l'autre (841 / 841.0)
+        texte = pd.DataFrame({col: _texte_canonique(bloc[col]) for col in bloc.columns}, index=bloc.index)
+        hachages = pd.util.hash_pandas_object(texte, index=False).to_numpy()
+        doublons = pd.Series(hachages).duplicated().to_numpy()
+        doublons |= np.fromiter((h in hachages_vus for h in hachages.tolist()), dtype=bool, count=len(hachages))
+        hachages_vus.update(hachages.tolist())
+        return doublons
+    
+    def charger_et_nettoyer_par_blocs(self, taille_bloc=TAILLE_BLOC):
+        """Charge et nettoie la source par blocs (mode flux pour les gros exports)
+        
+        Chaque bloc brut est standardisé, nettoyé puis libéré : seules les lignes
+        propres sont conservées. Les doublons sont détectés entre blocs par un
+        ensemble de hachages de lignes et le rapport de nettoyage est cumulé.
+        """
+        logger.info(f"📂 Chargement et nettoyage par blocs de {taille_bloc} lignes...")
+        blocs_propres = []
+        rejets_totaux = {}
+        hachages_vus = set()
+        nb_lignes_initial = 0
+        
+        try:
+            for i, bloc in enumerate(self.lire_par_blocs(taille_bloc)):
+                self._renommer_colonnes(bloc, verbeux=(i == 0))
+                if i == 0:
+                    self._verifier_colonnes(bloc.columns)
+                nb_lignes_initial += len(bloc)
+                
+                doublons = self._doublons_inter_blocs(bloc, hachages_vus)
+                propre, rejets = self._nettoyer_bloc(bloc, doublons=doublons, verbeux=False)
+                del bloc
+                
+                blocs_propres.append(propre)
+                for regle, nb in rejets.items():
+                    rejets_totaux[regle] = rejets_totaux.get(regle, 0) + nb
+                logger.info(f"  ✓ Bloc {i + 1}: {len(propre)} lignes conservées")
+        except FileNotFoundError:
+            logger.error(f"❌ ERREUR: Fichier '{self.file_path}' non trouvé!")
             return False
         except Exception as e:
-            print(f"❌ ERREUR lors du chargement: {e}")
+            logger.error(f"❌ ERREUR lors du chargement: {e}")
+            return False
+        
+        if not blocs_propres:
+            logger.error("❌ ERREUR: Aucune ligne lue!")
             return False
+        
+        self.df_raw = None
+        self.df_clean = pd.concat(blocs_propres)
+        del blocs_propres
+        self._finaliser_rapport(nb_lignes_initial, rejets_totaux)
+        return True
+    
+    def _est_multi_sources(self):
+        """Vrai si file_path désigne un dossier ou un motif glob plutôt qu'un fichier"""
+        return os.path.isdir(self.file_path) or glob.has_magic(str(self.file_path))
+    
+    def lister_sources(self):
+        """Fichiers sources (triés) désignés par file_path : dossier, motif glob ou fichier unique"""
+        if os.path.isdir(self.file_path):
+            chemins = [os.path.join(self.file_path, nom) for nom in os.listdir(self.file_path)
+                       if nom.lower().endswith(EXTENSIONS_SOURCES)]
+        elif glob.has_magic(str(self.file_path)):
+            chemins = glob.glob(self.file_path)
+        else:
+            chemins = [self.file_path]
+        # Ignorer les fichiers verrous d'Excel (~$export.xlsx)
+        return sorted(c for c in chemins if not os.path.basename(c).startswith('~$'))
+    
+    def charger_et_nettoyer_sources(self, nb_processus=None):
+        """Charge et nettoie plusieurs fichiers en parallèle (un processus par fichier)
+        
+        Chaque fichier est standardisé et nettoyé dans un processus du pool ;
+        le résultat revient sous forme de flux Arrow (et non de DataFrame sérialisé
+        par pickle). Les tables sont concaténées dans l'ordre des fichiers, puis
+        les transactions présentes dans plusieurs exports sont supprimées
+        (hachage des lignes nettoyées, première occurrence conservée). Les
+        identifiants sont normalisés par chaque processus avant le hachage :
+        un export lu en float64 ('841.0') et un export lu en entiers ('841')
+        désignent le même client.
+        """
+        sources = self.lister_sources()
+        if not sources:
+            logger.error(f"❌ ERREUR: Aucun fichier source pour '{self.file_path}'!")
+            return False
+        
+        logger.info(f"📂 Chargement et nettoyage de {len(sources)} fichiers...")
+        if len(sources) == 1 or nb_processus == 1:
+            resultats = list(map(_nettoyer_source, sources))
+        else:
+            # Pas de fork : le processus a déjà des threads (écriture en arrière-plan, minuteur
+            # des métriques) dont les verrous seraient copiés pris dans les processus fils
+            methode = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            with ProcessPoolExecutor(max_workers=nb_processus, mp_context=multiprocessing.get_context(methode)) as pool:
+                resultats = list(pool.map(_nettoyer_source, sources))
+        
+        tables = []
+        hachages = []
+        rapports = {}
+        rejets_totaux = {}
+        nb_lignes_initial = 0
+        for chemin, donnees, hachages_fichier, rapport in resultats:
+            if donnees is None:
+                logger.warning(f"  ⚠️ {os.path.basename(chemin)}: fichier ignoré ({rapport['erreur']})")
+                rapports[chemin] = rapport
+                continue
+            tables.append(_depuis_arrow(donnees))
+            hachages.append(hachages_fichier)
+            rapports[chemin] = rapport
+            nb_lignes_initial += rapport['lignes_initiales']
+            for regle, nb in rapport['rejets_par_regle'].items():
+                rejets_totaux[regle] = rejets_totaux.get(regle, 0) + nb
+            logger.info(f"  ✓ {os.path.basename(chemin)}: {rapport['lignes_finales']} lignes conservées")
+        
+        if not tables:
+            logger.error("❌ ERREUR: Aucun fichier n'a pu être chargé!")
+            return False
+        
+        df = pd.concat(tables, ignore_index=True)
+        del tables
+        
+        # Déduplication globale : une transaction exportée par plusieurs fichiers n'est gardée qu'une fois
+        hachages = np.concatenate(hachages)
+        _, premieres = np.unique(hachages, return_index=True)
+        uniques = np.zeros(len(df), dtype=bool)
+        uniques[premieres] = True
+        nb_doublons = int((~uniques).sum())
+        rejets_totaux['doublons'] = rejets_totaux.get('doublons', 0) + nb_doublons
+        if nb_doublons:
+            df = df[uniques].reset_index(drop=True)
+        logger.info(f"  ✓ {nb_doublons} doublons entre fichiers supprimés")
+        
+        self.df_raw = None
+        self.df_clean = df
+        self._finaliser_rapport(nb_lignes_initial, rejets_totaux)
+        self.rapport_nettoyage['doublons_inter_fichiers'] = nb_doublons
+        self.rapport_nettoyage['par_fichier'] = rapports
+        
+        # Version : empreintes des fichiers intégrés
+        empreinte = hashlib.sha256('|'.join(f"{os.path.abspath(c)}:{empreinte_fichier(c)}"
+                                            for c in sources).encode('utf-8'))
+        self.version_donnees = f"{empreinte.hexdigest()[:12]}-v{VERSION_NETTOYAGE}"
+        return True
     
     def afficher_apercu(self):
-        """Affiche un aperçu des données brutes"""
+        """Journalise un aperçu des données brutes (diagnostic : head, info, describe, valeurs manquantes)"""
         if self.df_raw is None:
-            print("⚠️ Aucune donnée chargée!")
+            logger.warning("⚠️ Aucune donnée chargée!")
             return
         
-        print("\n" + "="*80)
-        print("📋 APERÇU DES DONNÉES BRUTES")
-        print("="*80)
-        print(f"\n🔢 Premières lignes:\n{self.df_raw.head(10)}")
-        print(f"\n📊 Informations sur les données:")
-        print(self.df_raw.info())
-        print(f"\n📈 Statistiques descriptives:")
-        print(self.df_raw.describe())
-        print(f"\n🔍 Valeurs manquantes par colonne:")
-        print(self.df_raw.isnull().sum())
-        print(f"\n🎯 Valeurs uniques par colonne:")
+        informations = io.StringIO()
+        self.df_raw.info(buf=informations)
+        logger.info("\n" + "="*80)
+        logger.info("📋 APERÇU DES DONNÉES BRUTES")
+        logger.info("="*80)
+        logger.info(f"\n🔢 Premières lignes:\n{self.df_raw.head(10)}")
+        logger.info(f"\n📊 Informations sur les données:\n{informations.getvalue()}")
+        logger.info(f"\n📈 Statistiques descriptives:\n{self.df_raw.describe()}")
+        logger.info(f"\n🔍 Valeurs manquantes par colonne:\n{self.df_raw.isnull().sum()}")
+        logger.info(f"\n🎯 Valeurs uniques par colonne:")
         for col in self.df_raw.columns:
-            print(f"  - {col}: {self.df_raw[col].nunique()} valeurs uniques")
+            logger.info(f"  - {col}: {self.df_raw[col].nunique()} valeurs uniques")
     
     def standardiser_colonnes(self):
         """Standardise les noms de colonnes"""
-        print("\n🔧 Standardisation des noms de colonnes...")
-        
-        # Mapping COMPLET des noms possibles
-        column_mapping = {
-            # ID Client - toutes variantes
-            'ID Client': 'ID_Client',
-            'id client': 'ID_Client',
-            'ID_client': 'ID_Client',
-            'id_client': 'ID_Client',
-            'Client ID': 'ID_Client',
-            'client_id': 'ID_Client',
-            'ClientID': 'ID_Client',
-            'ID_Client': 'ID_Client',
-            
-            # Montant - toutes variantes
-            'Montant': 'Montant',
-            'montant': 'Montant',
-            'Montant de la transaction': 'Montant',
-            'Montant_Transaction': 'Montant',
-            'montant_transaction': 'Montant',
-            'MontantTransaction': 'Montant',
-            'Transaction': 'Montant',
-            'Amount': 'Montant',
-            'Prix': 'Montant',
-            
-            # Date - toutes variantes
-            'Date': 'Date',
-            'date': 'Date',
-            'Date de la transaction': 'Date',
-            'Date_Transaction': 'Date',
-            'date_transaction': 'Date',
-            'DateTransaction': 'Date',
-            'Transaction Date': 'Date',
-            
-            # Catégorie - toutes variantes
-            'Catégorie': 'Categorie',
-            'Categorie': 'Categorie',
-            'categorie': 'Categorie',
-            'Category': 'Categorie',
-            'Catégorie de produit': 'Categorie',
-            'Categorie_Produit': 'Categorie',
-            'categorie_produit': 'Categorie',
-            'CategorieProduit': 'Categorie',
-            'Produit': 'Categorie',
-            
-            # Mode de paiement - toutes variantes
-            'Mode de paiement': 'Mode_Paiement',
-            'Mode_de_paiement': 'Mode_Paiement',
-            'Paiement': 'Mode_Paiement',
-            'Payment': 'Mode_Paiement',
-            'Mode_Paiement': 'Mode_Paiement',
-            'mode_paiement': 'Mode_Paiement',
-            'ModePaiement': 'Mode_Paiement'
-        }
+        logger.info("\n🔧 Standardisation des noms de colonnes...")
         
-        # Renommer les colonnes
-        self.df_raw.rename(columns=column_mapping, inplace=True)
+        self._renommer_colonnes(self.df_raw)
+        self._verifier_colonnes(self.df_raw.columns)
+    
+    def _renommer_colonnes(self, df, verbeux=True):
+        """Renomme les colonnes de df vers les noms canoniques (en place)
         
-        # Supprimer les espaces
-        self.df_raw.columns = self.df_raw.columns.str.strip()
+        Le mapping vient de resolveur_entetes : orthographes de MAPPING_COLONNES
+        après normalisation, sinon nom canonique le plus proche (score ≥ seuil).
+        """
+        mapping, scores, depuis_cache = self.resolveur_entetes.resoudre(df.columns)
+        self.resolution_entetes = {'mapping': mapping, 'scores': scores, 'depuis_cache': depuis_cache}
+        df.rename(columns=mapping, inplace=True)
+        if verbeux:
+            for entete, score in scores.items():
+                if score < 1:
+                    logger.info(f"🔎 En-tête '{entete}' rattaché à {mapping[entete]} (score {score:.2f})")
+            if depuis_cache:
+                logger.info("♻️ En-têtes résolus depuis le cache (même famille de fichiers)")
         
-        print(f"✅ Colonnes standardisées: {list(self.df_raw.columns)}")
+        # Supprimer les espaces
+        df.columns = df.columns.str.strip()
+        return df
+    
+    @staticmethod
+    def _verifier_colonnes(colonnes):
+        """Affiche les colonnes standardisées et signale les colonnes requises manquantes"""
+        logger.info(f"✅ Colonnes standardisées: {list(colonnes)}")
         
-        # Vérifier les colonnes requises
-        colonnes_requises = ['ID_Client', 'Montant', 'Date', 'Categorie', 'Mode_Paiement']
-        colonnes_manquantes = [col for col in colonnes_requises if col not in self.df_raw.columns]
+        colonnes_manquantes = [col for col in COLONNES_REQUISES if col not in colonnes]
         
         if colonnes_manquantes:
-            print(f"⚠️ ATTENTION: Colonnes manquantes: {colonnes_manquantes}")
-            print(f"   Colonnes disponibles: {list(self.df_raw.columns)}")
+            logger.warning(f"⚠️ ATTENTION: Colonnes manquantes: {colonnes_manquantes}")
+            logger.warning(f"   Colonnes disponibles: {list(colonnes)}")
         else:
-            print("✅ Toutes les colonnes requises sont présentes!")
+            logger.info("✅ Toutes les colonnes requises sont présentes!")
     
     def nettoyer_donnees(self):
         """Nettoie et transforme les données"""
-        print("\n🧹 Nettoyage des données en cours...")
+        logger.info("\n🧹 Nettoyage des données en cours...")
+        
+        nb_lignes_initial = len(self.df_raw)
+        self.df_clean, rejets = self._nettoyer_bloc(self.df_raw)
+        self._finaliser_rapport(nb_lignes_initial, rejets)
+    
+    def _nettoyer_bloc(self, df, doublons=None, verbeux=True):
+        """Nettoie un DataFrame brut en une seule passe et retourne (df_propre, rejets par règle)
+        
+        Chaque règle met à jour un masque de validité unique sur les lignes brutes.
+        Les colonnes transformées sont calculées uniquement sur les lignes encore
+        valides et la table finale est construite par une seule sélection.
+        Si doublons (masque booléen) est fourni, il remplace df.duplicated().
+        """
+        nb_lignes_initial = len(df)
+        valides = np.ones(nb_lignes_initial, dtype=bool)
+        rejets = {}
+        # Colonnes transformées : nom -> (série sur les lignes valides au moment du calcul, masque de ces lignes)
+        transformees = {}
+        # Durée de chaque règle (transformation comprise) : temps écoulé depuis la règle précédente
+        chrono = [time.perf_counter()]
+        
+        def mesurer(nom):
+            maintenant = time.perf_counter()
+            self.durees_regles[nom] = self.durees_regles.get(nom, 0) + maintenant - chrono[0]
+            chrono[0] = maintenant
         
-        self.df_clean = self.df_raw.copy()
-        nb_lignes_initial = len(self.df_clean)
+        def appliquer_regle(nom_regle, conserve):
+            """Applique une règle évaluée sur les lignes encore valides et compte les rejets"""
+            conserve = np.asarray(conserve, dtype=bool)
+            rejets[nom_regle] = int((~conserve).sum())
+            valides[valides] = conserve
+            mesurer(nom_regle)
+            return rejets[nom_regle]
+        
+        def colonne_courante(col):
+            """Retourne la colonne (transformée ou brute) restreinte aux lignes encore valides"""
+            if col in transformees:
+                serie, base = transformees[col]
+                return serie[valides[base]]
+            return df[col][valides]
+        
+        def remplacer_colonne(col, serie):
+            transformees[col] = (serie, valides.copy())
+        
+        def afficher(message):
+            if verbeux:
+                logger.info(message)
         
         # 1. Supprimer les lignes vides
-        self.df_clean.dropna(how='all', inplace=True)
-        lignes_vides = nb_lignes_initial - len(self.df_clean)
-        print(f"  ✓ Lignes vides supprimées: {lignes_vides}")
+        lignes_vides = appliquer_regle('lignes_vides', ~df.isna().all(axis=1).to_numpy())
+        afficher(f"  ✓ Lignes vides supprimées: {lignes_vides}")
         
-        # 2. Supprimer les doublons
-        nb_doublons = self.df_clean.duplicated().sum()
-        self.df_clean.drop_duplicates(inplace=True)
-        print(f"  ✓ Doublons supprimés: {nb_doublons}")
+        # 2. Supprimer les doublons (la première occurrence d'un doublon n'est jamais vide)
+        if doublons is None:
+            doublons = df.duplicated().to_numpy()
+        nb_doublons = appliquer_regle('doublons', ~np.asarray(doublons)[valides])
+        afficher(f"  ✓ Doublons supprimés: {nb_doublons}")
         
         # 3. Nettoyer ID_Client
-        if 'ID_Client' in self.df_clean.columns:
-            self.df_clean['ID_Client'] = self.df_clean['ID_Client'].astype(str).str.strip()
-            nb_avant = len(self.df_clean)
-            self.df_clean = self.df_clean[self.df_clean['ID_Client'].notna()]
-            self.df_clean = self.df_clean[self.df_clean['ID_Client'] != '']
-            self.df_clean = self.df_clean[self.df_clean['ID_Client'] != 'nan']
-            print(f"  ✓ ID_Client nettoyés ({nb_avant - len(self.df_clean)} lignes invalides supprimées)")
+        if 'ID_Client' in df.columns:
+            # Même identifiant quel que soit le type inféré (fichier, bloc ou export) : 841.0 -> '841'
+            ids = _texte_canonique(colonne_courante('ID_Client')).str.strip()
+            remplacer_colonne('ID_Client', ids)
+            nb_invalides = appliquer_regle('id_client_invalide', (ids.notna() & (ids != '') & (ids != 'nan')).to_numpy())
+            afficher(f"  ✓ ID_Client nettoyés ({nb_invalides} lignes invalides supprimées)")
         
         # 4. Nettoyer et convertir Montant
-        if 'Montant' in self.df_clean.columns:
-            if self.df_clean['Montant'].dtype == 'object':
-                self.df_clean['Montant'] = self.df_clean['Montant'].astype(str).str.replace(',', '.')
-                self.df_clean['Montant'] = self.df_clean['Montant'].str.replace('€', '').str.strip()
-                self.df_clean['Montant'] = self.df_clean['Montant'].str.replace(' ', '')
-            
-            self.df_clean['Montant'] = pd.to_numeric(self.df_clean['Montant'], errors='coerce')
+        if 'Montant' in df.columns:
+            montants = colonne_courante('Montant')
+            if montants.dtype == 'object':
+                montants = montants.astype(str).str.replace(',', '.')
+                montants = montants.str.replace('€', '').str.strip()
+                montants = montants.str.replace(' ', '')
             
-            nb_avant = len(self.df_clean)
-            self.df_clean = self.df_clean[self.df_clean['Montant'] > 0]
-            print(f"  ✓ Montants nettoyés ({nb_avant - len(self.df_clean)} valeurs invalides supprimées)")
-            
-            self.df_clean['Montant'] = self.df_clean['Montant'].round(2)
+            montants = pd.to_numeric(montants, errors='coerce')
+            remplacer_colonne('Montant', montants.round(2))
+            nb_invalides = appliquer_regle('montant_invalide', (montants > 0).to_numpy())
+            afficher(f"  ✓ Montants nettoyés ({nb_invalides} valeurs invalides supprimées)")
         
         # 5. Nettoyer et convertir Date
-        if 'Date' in self.df_clean.columns:
+        if 'Date' in df.columns:
             try:
-                self.df_clean['Date'] = pd.to_datetime(self.df_clean['Date'], errors='coerce')
-                nb_dates_invalides = self.df_clean['Date'].isna().sum()
-                
-                self.df_clean = self.df_clean[self.df_clean['Date'].notna()]
+                dates = pd.to_datetime(colonne_courante('Date'), errors='coerce')
+                remplacer_colonne('Date', dates)
                 
                 date_actuelle = pd.Timestamp.now()
-                nb_dates_futures = (self.df_clean['Date'] > date_actuelle).sum()
-                self.df_clean = self.df_clean[self.df_clean['Date'] <= date_actuelle]
+                nb_dates_invalides = appliquer_regle('date_invalide', dates.notna().to_numpy())
+                nb_dates_futures = appliquer_regle('date_future', (dates.dropna() <= date_actuelle).to_numpy())
                 
-                print(f"  ✓ Dates converties ({nb_dates_invalides + nb_dates_futures} dates invalides supprimées)")
+                afficher(f"  ✓ Dates converties ({nb_dates_invalides + nb_dates_futures} dates invalides supprimées)")
             except Exception as e:
-                print(f"  ⚠️ Erreur lors de la conversion des dates: {e}")
+                logger.warning(f"  ⚠️ Erreur lors de la conversion des dates: {e}")
         
         # 6. Nettoyer Catégorie
-        if 'Categorie' in self.df_clean.columns:
-            self.df_clean['Categorie'] = self.df_clean['Categorie'].astype(str).str.strip()
-            self.df_clean['Categorie'] = self.df_clean['Categorie'].str.title()
+        if 'Categorie' in df.columns:
+            categories = _transformer_valeurs_uniques(colonne_courante('Categorie'),
+                                                      lambda s: s.astype(str).str.strip().str.title())
+            remplacer_colonne('Categorie', categories)
             
-            nb_avant = len(self.df_clean)
-            self.df_clean = self.df_clean[self.df_clean['Categorie'].notna()]
-            self.df_clean = self.df_clean[self.df_clean['Categorie'] != 'Nan']
-            self.df_clean = self.df_clean[self.df_clean['Categorie'] != '']
-            print(f"  ✓ Catégories nettoyées ({nb_avant - len(self.df_clean)} valeurs vides supprimées)")
+            conserve = (categories.notna() & (categories != 'Nan') & (categories != '')).to_numpy()
+            nb_invalides = appliquer_regle('categorie_vide', conserve)
+            afficher(f"  ✓ Catégories nettoyées ({nb_invalides} valeurs vides supprimées)")
             
-            print(f"    Catégories trouvées: {sorted(self.df_clean['Categorie'].unique())}")
+            afficher(f"    Catégories trouvées: {sorted(categories[conserve].unique())}")
         
         # 7. Nettoyer Mode_Paiement
-        if 'Mode_Paiement' in self.df_clean.columns:
-            self.df_clean['Mode_Paiement'] = self.df_clean['Mode_Paiement'].astype(str).str.strip()
-            self.df_clean['Mode_Paiement'] = self.df_clean['Mode_Paiement'].str.title()
+        if 'Mode_Paiement' in df.columns:
+            modes = _transformer_valeurs_uniques(colonne_courante('Mode_Paiement'),
+                                                 lambda s: s.astype(str).str.strip().str.title())
+            remplacer_colonne('Mode_Paiement', modes)
             
-            nb_avant = len(self.df_clean)
-            self.df_clean = self.df_clean[self.df_clean['Mode_Paiement'].notna()]
-            self.df_clean = self.df_clean[self.df_clean['Mode_Paiement'] != 'Nan']
-            self.df_clean = self.df_clean[self.df_clean['Mode_Paiement'] != '']
-            print(f"  ✓ Modes de paiement nettoyés ({nb_avant - len(self.df_clean)} valeurs vides supprimées)")
+            conserve = (modes.notna() & (modes != 'Nan') & (modes != '')).to_numpy()
+            nb_invalides = appliquer_regle('mode_paiement_vide', conserve)
+            afficher(f"  ✓ Modes de paiement nettoyés ({nb_invalides} valeurs vides supprimées)")
             
-            print(f"    Modes de paiement trouvés: {sorted(self.df_clean['Mode_Paiement'].unique())}")
+            afficher(f"    Modes de paiement trouvés: {sorted(modes[conserve].unique())}")
+        
+        # Sélection finale unique (les colonnes intermédiaires sont libérées au fur et à mesure)
+        colonnes_finales = {}
+        for col in df.columns:
+            colonnes_finales[col] = colonne_courante(col).array
+            transformees.pop(col, None)
+        df_propre = pd.DataFrame(colonnes_finales, index=df.index[valides])
+        mesurer('selection_finale')
         
         # 8. Créer colonnes dérivées
-        if 'Date' in self.df_clean.columns:
-            self.df_clean['Annee'] = self.df_clean['Date'].dt.year
-            self.df_clean['Mois'] = self.df_clean['Date'].dt.month
-            self.df_clean['Jour'] = self.df_clean['Date'].dt.day
-            self.df_clean['Jour_Semaine'] = self.df_clean['Date'].dt.day_name()
-            print(f"  ✓ Colonnes temporelles créées (Année, Mois, Jour, Jour_Semaine)")
-        
-        # Résumé
+        if 'Date' in df_propre.columns:
+            df_propre['Annee'] = df_propre['Date'].dt.year
+            df_propre['Mois'] = df_propre['Date'].dt.month
+            df_propre['Jour'] = df_propre['Date'].dt.day
+            df_propre['Jour_Semaine'] = df_propre['Date'].dt.day_name()
+            afficher(f"  ✓ Colonnes temporelles créées (Année, Mois, Jour, Jour_Semaine)")
+            mesurer('colonnes_temporelles')
+        
+        return df_propre, rejets
+    
+    def _finaliser_rapport(self, nb_lignes_initial, rejets):
+        """Renseigne rapport_nettoyage et affiche le résumé du nettoyage"""
         nb_lignes_final = len(self.df_clean)
         perte = ((nb_lignes_initial - nb_lignes_final) / nb_lignes_initial * 100) if nb_lignes_initial > 0 else 0
         
@@ -227,112 +702,694 @@ class DataProcessor:
             'lignes_initiales': nb_lignes_initial,
             'lignes_finales': nb_lignes_final,
             'lignes_supprimees': nb_lignes_initial - nb_lignes_final,
-            'pourcentage_perte': perte
+            'pourcentage_perte': perte,
+            'rejets_par_regle': rejets
         }
         
-        print(f"\n✅ Nettoyage terminé!")
-        print(f"  📊 Lignes initiales: {nb_lignes_initial}")
-        print(f"  📊 Lignes finales: {nb_lignes_final}")
-        print(f"  📊 Lignes supprimées: {nb_lignes_initial - nb_lignes_final} ({perte:.2f}%)")
+        logger.info(f"\n✅ Nettoyage terminé!")
+        logger.info(f"  📊 Lignes initiales: {nb_lignes_initial}")
+        logger.info(f"  📊 Lignes finales: {nb_lignes_final}")
+        logger.info(f"  📊 Lignes supprimées: {nb_lignes_initial - nb_lignes_final} ({perte:.2f}%)")
+    
+    def encoder_colonnes_texte(self, colonnes=COLONNES_TEXTE):
+        """Remplace les colonnes texte de df_clean par des codes entiers et leur dictionnaire
+        
+        Les colonnes objet contiennent un objet Python par ligne dont le compteur de
+        références est modifié à chaque lecture : après un fork, ces pages cessent
+        d'être partagées. Les codes entiers restent dans des tableaux NumPy en lecture seule.
+        """
+        if self.df_clean is None:
+            return None
+        
+        for col in colonnes:
+            if col in self.df_clean.columns and self.df_clean[col].dtype == 'object':
+                self.df_clean[col] = self.df_clean[col].astype('category')
+        return self.df_clean
+    
+    @staticmethod
+    def _appliquer_types_compacts(df, montant_en_centimes=False):
+        """Applique les types compacts à df (en place) et le retourne"""
+        for col in COLONNES_TEXTE:
+            if col in df.columns and df[col].dtype == 'object':
+                df[col] = df[col].astype('category')
+        for col, type_compact in TYPES_COMPACTS.items():
+            if col in df.columns:
+                df[col] = df[col].astype(type_compact)
+        
+        if montant_en_centimes and 'Montant' in df.columns:
+            centimes = (df['Montant'] * 100).round()
+            type_centimes = 'int32' if centimes.abs().max() < 2 ** 31 else 'int64'
+            position = df.columns.get_loc('Montant')
+            df.insert(position, 'Montant_Centimes', centimes.astype(type_centimes))
+            df.drop(columns='Montant', inplace=True)
+        return df
+    
+    def compacter_schema(self, montant_en_centimes=False):
+        """Convertit df_clean en types compacts et mesure l'empreinte mémoire avant/après
+        
+        - colonnes texte -> category (codes entiers + dictionnaire, y compris ID_Client)
+        - Annee -> int16, Mois et Jour -> int8
+        - optionnellement Montant -> Montant_Centimes (entier)
+        """
+        if self.df_clean is None:
+            return None
+        
+        logger.info("\n📦 Compactage du schéma...")
+        memoire_avant = self.df_clean.memory_usage(deep=True)
+        
+        self.encoder_colonnes_texte()
+        self._appliquer_types_compacts(self.df_clean, montant_en_centimes)
+        
+        memoire_apres = self.df_clean.memory_usage(deep=True)
+        self.rapport_nettoyage['memoire'] = {
+            'octets_avant': int(memoire_avant.sum()),
+            'octets_apres': int(memoire_apres.sum()),
+            'par_colonne_avant': {col: int(v) for col, v in memoire_avant.items()},
+            'par_colonne_apres': {col: int(v) for col, v in memoire_apres.items()}
+        }
+        
+        logger.info(f"  ✓ Mémoire: {memoire_avant.sum() / 1024 ** 2:.2f} Mo -> {memoire_apres.sum() / 1024 ** 2:.2f} Mo")
+        return self.df_clean
+    
+    def profiler_donnees(self):
+        """Ajoute à rapport_nettoyage le profil de qualité de df_clean (conservé avec le cache)
+        
+        Rejets par règle et doublons proviennent du nettoyage ; le profil par
+        colonne est calculé une fois ici, et non à chaque affichage.
+        """
+        if self.df_clean is None:
+            return None
+        
+        self.rapport_nettoyage['profil'] = {
+            'nb_lignes': len(self.df_clean),
+            'colonnes': profiler_colonnes(self.df_clean)
+        }
+        return self.rapport_nettoyage['profil']
     
     def valider_donnees(self):
         """Valide la qualité des données"""
-        print("\n✓ Validation des données...")
+        logger.info("\n✓ Validation des données...")
         
         if self.df_clean is None or len(self.df_clean) == 0:
-            print("❌ Aucune donnée à valider!")
+            logger.error("❌ Aucune donnée à valider!")
             return False
         
-        print("✅ Toutes les validations sont passées!")
+        logger.info("✅ Toutes les validations sont passées!")
         return True
     
-    def sauvegarder_donnees_propres(self, output_path='data/data_kpi_clean.xlsx'):
-        """Sauvegarde les données nettoyées"""
+    def sauvegarder_donnees_propres(self, output_path=None, formats=None, asynchrone=True):
+        """Sauvegarde les données nettoyées dans chacun des formats demandés
+        
+        output_path : chemin sans extension (CHEMIN_DONNEES_PROPRES par défaut) ;
+        une extension reconnue (.parquet, .feather, .xlsx) fixe le format.
+        asynchrone=True : l'écriture se fait dans un thread d'arrière-plan et la
+        méthode rend la main aussitôt ; attendre_sauvegarde() en donne les mesures.
+        """
         if self.df_clean is None:
             return False
         
+        base = output_path or CHEMIN_DONNEES_PROPRES
+        format_chemin = format_depuis_chemin(base)
+        if format_chemin is not None:
+            base = os.path.splitext(base)[0]
+        formats = tuple(formats or ((format_chemin,) if format_chemin else self.formats_sortie))
+        inconnus = [f for f in formats if f not in ECRIVAINS]
+        if inconnus:
+            logger.error(f"❌ Format(s) de sauvegarde inconnu(s): {inconnus} (attendu: {list(ECRIVAINS)})")
+            return False
+        
+        # Une écriture précédente encore en cours est terminée d'abord (même fichier cible possible)
+        self.attendre_sauvegarde()
+        # Copie superficielle : les colonnes ajoutées ensuite à df_clean ne concernent pas l'écriture
+        df = self.df_clean.copy(deep=False)
+        if asynchrone:
+            logger.info(f"\n💾 Sauvegarde des données nettoyées en arrière-plan ({', '.join(formats)})...")
+            self.sauvegarde = ecrire_en_arriere_plan(df, base, formats)
+            return True
+        
+        self._enregistrer_sauvegardes(ecrire_formats(df, base, formats))
+        return all('erreur' not in mesure for mesure in self.sauvegardes)
+    
+    def attendre_sauvegarde(self, timeout=None):
+        """Attend la fin de l'écriture en arrière-plan ; retourne les mesures (format, chemin, duree_s, octets)"""
+        if self.sauvegarde is not None:
+            mesures = self.sauvegarde.result(timeout)
+            self.sauvegarde = None
+            self._enregistrer_sauvegardes(mesures)
+        return self.sauvegardes
+    
+    def _enregistrer_sauvegardes(self, mesures):
+        self.sauvegardes = mesures
+        self.rapport_performance['sauvegardes'] = mesures
+    
+    def calculer_cle_cache(self):
+        """Calcule la clé du cache : chemin, mtime, taille, empreinte du contenu et version du nettoyage"""
+        chemin = os.path.abspath(self.file_path)
+        stat = os.stat(chemin)
+        
+        return {
+            'chemin': chemin,
+            'mtime_ns': stat.st_mtime_ns,
+            'taille': stat.st_size,
+            'sha256': empreinte_fichier(chemin),
+            'version_nettoyage': VERSION_NETTOYAGE,
+            'montant_en_centimes': self.montant_en_centimes
+        }
+    
+    @staticmethod
+    def _version_depuis_cle(cle):
+        return f"{cle['sha256'][:12]}-v{cle['version_nettoyage']}"
+    
+    def _chemins_cache(self):
+        """Retourne les chemins (données, métadonnées) du cache pour le fichier source"""
+        chemin = os.path.abspath(self.file_path)
+        nom = os.path.splitext(os.path.basename(chemin))[0]
+        suffixe = hashlib.sha1(chemin.encode('utf-8')).hexdigest()[:10]
+        if self.montant_en_centimes:
+            suffixe += '_centimes'
+        base = os.path.join(self.dossier_cache, f"{nom}_{suffixe}")
+        return base + '.feather', base + '.json'
+    
+    def charger_depuis_cache(self):
+        """Charge df_clean depuis le cache Feather (mémoire mappée) si la clé est à jour"""
+        if not PYARROW_DISPONIBLE:
+            return False
+        
+        chemin_donnees, chemin_meta = self._chemins_cache()
+        if not (os.path.exists(chemin_donnees) and os.path.exists(chemin_meta)):
+            return False
+        
         try:
-            self.df_clean.to_excel(output_path, index=False)
-            print(f"\n💾 Données nettoyées sauvegardées: {output_path}")
+            with open(chemin_meta, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            
+            cle = self.calculer_cle_cache()
+            if meta.get('cle') != cle:
+                logger.info("♻️ Cache obsolète, reconstruction nécessaire")
+                return False
+            self.version_donnees = self._version_depuis_cle(cle)
+            
+            table = feather.read_table(chemin_donnees, memory_map=True)
+            self.df_clean = table.to_pandas()
+            self.rapport_nettoyage = meta.get('rapport_nettoyage', {})
+            if 'profil' not in self.rapport_nettoyage:
+                # Cache écrit avant l'ajout du profil de qualité
+                self.profiler_donnees()
+            logger.info(f"⚡ Données chargées depuis le cache: {len(self.df_clean)} lignes ({chemin_donnees})")
             return True
         except Exception as e:
-            print(f"❌ Erreur lors de la sauvegarde: {e}")
+            logger.warning(f"⚠️ Cache illisible, reconstruction nécessaire: {e}")
             return False
     
-    def generer_rapport(self):
-        """Génère un rapport complet"""
-        print("\n" + "="*80)
-        print("📊 RAPPORT DE TRAITEMENT DES DONNÉES")
-        print("="*80)
+    def sauvegarder_cache(self):
+        """Écrit df_clean dans le cache Feather et la clé associée"""
+        if not PYARROW_DISPONIBLE or self.df_clean is None:
+            return False
         
-        if self.df_clean is None:
-            print("❌ Aucune donnée traitée!")
-            return
+        chemin_donnees, chemin_meta = self._chemins_cache()
+        try:
+            os.makedirs(self.dossier_cache, exist_ok=True)
+            cle = self.calculer_cle_cache()
+            self.version_donnees = self._version_depuis_cle(cle)
+            meta = {
+                'cle': cle,
+                'rapport_nettoyage': self.rapport_nettoyage
+            }
+            
+            # Écriture atomique : plusieurs workers peuvent reconstruire en même temps
+            tmp_donnees = f"{chemin_donnees}.{os.getpid()}.tmp"
+            tmp_meta = f"{chemin_meta}.{os.getpid()}.tmp"
+            # Sans compression pour que la lecture en mémoire mappée reste sans copie
+            feather.write_feather(self.df_clean, tmp_donnees, compression='uncompressed')
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, default=float)
+            os.replace(tmp_donnees, chemin_donnees)
+            os.replace(tmp_meta, chemin_meta)
+            logger.info(f"💾 Cache mis à jour: {chemin_donnees}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible d'écrire le cache: {e}")
+            return False
+    
+    # ------------------------------------------------------------------
+    # Mode incrémental : magasin nettoyé persistant + filigrane
+    # ------------------------------------------------------------------
+    
+    def _chemins_magasin(self):
+        """Chemins (données, filigrane, hachages) du magasin incrémental"""
+        base = os.path.splitext(self._chemins_cache()[0])[0] + '_magasin'
+        return base + '.feather', base + '.json', base + '_hachages.npy'
+    
+    @contextlib.contextmanager
+    def verrou_magasin(self):
+        """Verrou exclusif du magasin incrémental entre processus (fcntl.flock)
         
-        print(f"\n🔢 STATISTIQUES GÉNÉRALES:")
-        print(f"  - Nombre de transactions: {len(self.df_clean)}")
-        print(f"  - Nombre de clients uniques: {self.df_clean['ID_Client'].nunique()}")
-        print(f"  - Période: du {self.df_clean['Date'].min().date()} au {self.df_clean['Date'].max().date()}")
+        À tenir pendant tout le cycle chargement -> ajouts -> sauvegarde : chaque
+        worker gunicorn a son propre Rechargeur, et deux ajouts partis de la même
+        copie du magasin effaceraient l'un l'autre. Non réentrant : ne pas
+        l'imbriquer, même dans un seul processus.
+        """
+        os.makedirs(self.dossier_cache, exist_ok=True)
+        chemin = os.path.splitext(self._chemins_magasin()[1])[0] + '.lock'
+        with open(chemin, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _hacher_lignes(df):
+        """Hachage 64 bits de chaque ligne nettoyée (colonnes requises, valeurs normalisées)
         
-        # Vérifier que les colonnes existent avant de les utiliser
-        if 'Categorie' in self.df_clean.columns:
-            print(f"  - Nombre de catégories: {self.df_clean['Categorie'].nunique()}")
-        
-        if 'Mode_Paiement' in self.df_clean.columns:
-            print(f"  - Nombre de modes de paiement: {self.df_clean['Mode_Paiement'].nunique()}")
-        
-        if 'Montant' in self.df_clean.columns:
-            print(f"\n💰 STATISTIQUES MONTANTS:")
-            print(f"  - Montant total: {self.df_clean['Montant'].sum():.2f}€")
-            print(f"  - Montant moyen: {self.df_clean['Montant'].mean():.2f}€")
-            print(f"  - Montant médian: {self.df_clean['Montant'].median():.2f}€")
-            print(f"  - Montant min: {self.df_clean['Montant'].min():.2f}€")
-            print(f"  - Montant max: {self.df_clean['Montant'].max():.2f}€")
-        
-        if 'Categorie' in self.df_clean.columns:
-            print(f"\n🏷️ RÉPARTITION PAR CATÉGORIE:")
-            repartition_cat = self.df_clean['Categorie'].value_counts()
-            for cat, count in repartition_cat.items():
-                pct = (count / len(self.df_clean) * 100)
-                print(f"  - {cat}: {count} transactions ({pct:.1f}%)")
-        
-        if 'Mode_Paiement' in self.df_clean.columns:
-            print(f"\n💳 RÉPARTITION PAR MODE DE PAIEMENT:")
-            repartition_paiement = self.df_clean['Mode_Paiement'].value_counts()
-            for mode, count in repartition_paiement.items():
-                pct = (count / len(self.df_clean) * 100)
-                print(f"  - {mode}: {count} transactions ({pct:.1f}%)")
-        
-        print("\n" + "="*80)
-    
-    def executer_pipeline_complet(self):
-        """Exécute le pipeline complet"""
-        print("\n🚀 DÉMARRAGE DU PIPELINE DE TRAITEMENT")
-        print("="*80)
+        Les valeurs nettoyées ne dépendent plus du type de cellule du fichier source
+        ('354.87' texte ou nombre) : une même transaction a le même hachage d'un export à l'autre.
+        """
+        colonnes = [col for col in COLONNES_REQUISES if col in df.columns]
+        cles = df[colonnes].astype({col: object for col in colonnes
+                                    if isinstance(df[col].dtype, pd.CategoricalDtype)})
+        # Identifiants sous leur forme canonique ('2.0' d'un export flottant = '2')
+        if 'ID_Client' in cles.columns:
+            cles['ID_Client'] = _texte_canonique(cles['ID_Client'])
+        return pd.util.hash_pandas_object(cles, index=False).to_numpy()
+    
+    def charger_magasin(self):
+        """Charge le magasin nettoyé et son filigrane ; retourne False s'il est absent ou obsolète"""
+        if not PYARROW_DISPONIBLE:
+            return False
         
-        if not self.charger_donnees():
-            return None
+        chemin_donnees, chemin_filigrane, chemin_hachages = self._chemins_magasin()
+        if not all(os.path.exists(c) for c in (chemin_donnees, chemin_filigrane, chemin_hachages)):
+            return False
+        
+        with open(chemin_filigrane, 'r', encoding='utf-8') as f:
+            self.filigrane = json.load(f)
+        if self.filigrane.get('version_nettoyage') != VERSION_NETTOYAGE:
+            logger.info("♻️ Magasin incrémental obsolète (règles de nettoyage modifiées)")
+            return False
         
-        self.afficher_apercu()
+        df_clean = feather.read_table(chemin_donnees, memory_map=True).to_pandas()
+        hachages_vus = np.load(chemin_hachages)
+        # Filigrane écrit en dernier : des fichiers d'une autre sauvegarde (interrompue) ne le suivent pas
+        if (len(df_clean), len(hachages_vus)) != (self.filigrane.get('nb_lignes'), self.filigrane.get('nb_hachages')):
+            logger.warning("⚠️ Magasin incrémental incohérent avec son filigrane - reconstruction")
+            return False
+        self.df_clean, self.hachages_vus = df_clean, hachages_vus
+        self.rapport_nettoyage = self.filigrane['rapport_nettoyage']
+        self.version_donnees = self.filigrane['version_donnees']
+        logger.info(f"⚡ Magasin incrémental chargé: {len(self.df_clean)} lignes "
+              f"(filigrane: {self.filigrane['date_max']})")
+        return True
+    
+    def sauvegarder_magasin(self):
+        """Écrit le magasin nettoyé, l'ensemble des hachages puis le filigrane (à appeler sous verrou_magasin)
+        
+        Chaque fichier est remplacé atomiquement ; le filigrane, écrit en dernier,
+        porte les tailles attendues des deux autres (vérifiées par charger_magasin).
+        """
+        chemin_donnees, chemin_filigrane, chemin_hachages = self._chemins_magasin()
+        os.makedirs(self.dossier_cache, exist_ok=True)
+        
+        self.filigrane = {
+            'date_max': str(self.df_clean['Date'].max()) if len(self.df_clean) else None,
+            'nb_lignes': len(self.df_clean),
+            'nb_hachages': len(self.hachages_vus),
+            'version_nettoyage': VERSION_NETTOYAGE,
+            'version_donnees': self.version_donnees,
+            'fichiers': self.filigrane.get('fichiers', []),
+            'rapport_nettoyage': self.rapport_nettoyage
+        }
+        
+        suffixe_tmp = f".{os.getpid()}.tmp"
+        feather.write_feather(self.df_clean, chemin_donnees + suffixe_tmp, compression='uncompressed')
+        with open(chemin_hachages + suffixe_tmp, 'wb') as f:
+            np.save(f, self.hachages_vus)
+        with open(chemin_filigrane + suffixe_tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.filigrane, f, default=float)
+        for chemin in (chemin_donnees, chemin_hachages, chemin_filigrane):
+            os.replace(chemin + suffixe_tmp, chemin)
+    
+    def initialiser_magasin(self):
+        """Construit le magasin à partir du fichier source complet (première exécution)"""
+        if not self.charger_donnees():
+            return False
         self.standardiser_colonnes()
         self.nettoyer_donnees()
+        self.hachages_vus = np.unique(self._hacher_lignes(self.df_clean))
+        self._appliquer_types_compacts(self.df_clean, self.montant_en_centimes)
+        self.df_clean.reset_index(drop=True, inplace=True)
+        self.df_raw = None
+        
+        self.version_donnees = self._version_depuis_cle(self.calculer_cle_cache())
+        self.filigrane = {'fichiers': [os.path.abspath(self.file_path)]}
+        self.profiler_donnees()
+        self.sauvegarder_magasin()
+        return True
+    
+    def ajouter_fichier(self, chemin_fichier):
+        """Nettoie uniquement les nouvelles lignes d'un fichier et les ajoute au magasin
+        
+        Après nettoyage, les lignes postérieures au filigrane (date max) sont
+        nouvelles ; les autres sont comparées à l'ensemble des hachages déjà vus.
+        Retourne le delta nettoyé (à passer à CubeKPI.avec_delta) ou None en cas d'erreur.
+        Le magasin doit avoir été chargé sous verrou_magasin, tenu jusqu'au retour.
+        """
+        logger.info(f"\n➕ Ajout incrémental: {chemin_fichier}")
+        source = DataProcessor(chemin_fichier, dossier_cache=self.dossier_cache)
+        if not source.charger_donnees():
+            return None
+        brut = self._renommer_colonnes(source.df_raw)
+        del source
+        
+        nb_lignes_brutes = len(brut)
+        delta, rejets = self._nettoyer_bloc(brut, verbeux=False)
+        del brut
+        
+        # Seules les lignes antérieures au filigrane doivent être comparées à l'historique
+        hachages = self._hacher_lignes(delta)
+        anciennes = np.ones(len(delta), dtype=bool)
+        if self.filigrane.get('date_max'):
+            anciennes = (delta['Date'] <= pd.Timestamp(self.filigrane['date_max'])).to_numpy()
+        deja_vues = np.zeros(len(delta), dtype=bool)
+        if len(self.hachages_vus):
+            positions = np.searchsorted(self.hachages_vus, hachages[anciennes])
+            positions = np.minimum(positions, len(self.hachages_vus) - 1)
+            deja_vues[anciennes] = self.hachages_vus[positions] == hachages[anciennes]
+        
+        rejets['doublons'] = rejets.get('doublons', 0) + int(deja_vues.sum())
+        delta = delta[~deja_vues]
+        hachages = hachages[~deja_vues]
+        self._appliquer_types_compacts(delta, self.montant_en_centimes)
+        delta.reset_index(drop=True, inplace=True)
+        delta.index += len(self.df_clean)
+        
+        self.df_clean = _concatener_categories(self.df_clean, delta)
+        self.hachages_vus = np.union1d(self.hachages_vus, hachages)
+        
+        # Rapport cumulé
+        rapport = self.rapport_nettoyage
+        rapport['lignes_initiales'] += nb_lignes_brutes
+        rapport['lignes_finales'] = len(self.df_clean)
+        rapport['lignes_supprimees'] = rapport['lignes_initiales'] - rapport['lignes_finales']
+        rapport['pourcentage_perte'] = (rapport['lignes_supprimees'] / rapport['lignes_initiales'] * 100
+                                        if rapport['lignes_initiales'] > 0 else 0)
+        for regle, nb in rejets.items():
+            rapport['rejets_par_regle'][regle] = rapport['rejets_par_regle'].get(regle, 0) + nb
+        
+        # Nouvelle version du jeu de données : la précédente, chaînée avec le fichier ajouté
+        empreinte = hashlib.sha256(f"{self.version_donnees}|{empreinte_fichier(chemin_fichier)}".encode('utf-8'))
+        self.version_donnees = f"{empreinte.hexdigest()[:12]}-v{VERSION_NETTOYAGE}"
+        self.filigrane.setdefault('fichiers', []).append(os.path.abspath(chemin_fichier))
+        self.profiler_donnees()
+        self.sauvegarder_magasin()
+        
+        logger.info(f"  ✓ {len(delta)} nouvelles lignes ajoutées ({int(deja_vues.sum())} déjà présentes, "
+              f"{nb_lignes_brutes - len(delta)} rejetées au total)")
+        return delta
+    
+    def executer_pipeline_incremental(self, nouveaux_fichiers=(), reinitialiser=False):
+        """Mode incrémental : charge le magasin (ou l'initialise) puis ajoute les nouveaux fichiers
+        
+        Le cycle complet a lieu sous verrou_magasin. Les fichiers déjà intégrés
+        au magasin (filigrane) sont ignorés ;
+        reinitialiser=True reconstruit le magasin depuis file_path (historique modifié).
+        """
+        logger.info("\n🚀 DÉMARRAGE DU PIPELINE INCRÉMENTAL")
+        logger.info("="*80)
+        
+        with self.verrou_magasin():
+            charge = not reinitialiser and self.charger_magasin()
+            if not charge and not self.initialiser_magasin():
+                return None
+            
+            for chemin_fichier in nouveaux_fichiers:
+                if os.path.abspath(chemin_fichier) in self.filigrane.get('fichiers', []):
+                    continue
+                self.ajouter_fichier(chemin_fichier)
+        
         self.valider_donnees()
-        self.generer_rapport()
-        self.sauvegarder_donnees_propres()
+        logger.info(f"\n✅ PIPELINE INCRÉMENTAL TERMINÉ: {len(self.df_clean)} lignes")
+        return self.df_clean
+    
+    def generer_rapport(self):
+        """Journalise le rapport de traitement à partir du profil de qualité (aucun recalcul sur df_clean)"""
+        if self.df_clean is None:
+            logger.error("❌ Aucune donnée traitée!")
+            return
+        
+        profil = self.rapport_nettoyage.get('profil') or self.profiler_donnees()
+        colonnes = profil['colonnes']
+        nb_lignes = profil['nb_lignes']
+        
+        logger.info("\n" + "="*80)
+        logger.info("📊 RAPPORT DE TRAITEMENT DES DONNÉES")
+        logger.info("="*80)
+        
+        logger.info(f"\n🔢 STATISTIQUES GÉNÉRALES:")
+        logger.info(f"  - Nombre de transactions: {nb_lignes}")
+        logger.info(f"  - Nombre de clients uniques: {colonnes['ID_Client']['distincts']}")
+        if 'min' in colonnes['Date']:
+            logger.info(f"  - Période: du {colonnes['Date']['min'][:10]} au {colonnes['Date']['max'][:10]}")
+        
+        # Vérifier que les colonnes existent avant de les utiliser
+        if 'Categorie' in colonnes:
+            logger.info(f"  - Nombre de catégories: {colonnes['Categorie']['distincts']}")
         
-        print("\n✅ PIPELINE TERMINÉ AVEC SUCCÈS!")
+        if 'Mode_Paiement' in colonnes:
+            logger.info(f"  - Nombre de modes de paiement: {colonnes['Mode_Paiement']['distincts']}")
+        
+        if 'moyenne' in colonnes.get('Montant', {}):
+            montants = colonnes['Montant']
+            logger.info(f"\n💰 STATISTIQUES MONTANTS:")
+            logger.info(f"  - Montant total: {montants['moyenne'] * (nb_lignes - montants['manquants']):.2f}€")
+            logger.info(f"  - Montant moyen: {montants['moyenne']:.2f}€")
+            logger.info(f"  - Montant médian: {montants['mediane']:.2f}€")
+            logger.info(f"  - Montant min: {montants['min']:.2f}€")
+            logger.info(f"  - Montant max: {montants['max']:.2f}€")
+        
+        for col, titre in (('Categorie', "🏷️ RÉPARTITION PAR CATÉGORIE"),
+                           ('Mode_Paiement', "💳 RÉPARTITION PAR MODE DE PAIEMENT")):
+            if 'modalites' not in colonnes.get(col, {}):
+                continue
+            logger.info(f"\n{titre}:")
+            for valeur, count in colonnes[col]['modalites'].items():
+                pct = (count / nb_lignes * 100)
+                logger.info(f"  - {valeur}: {count} transactions ({pct:.1f}%)")
+        
+        logger.info("\n" + "="*80)
+    
+    def _nb_lignes_courantes(self):
+        """Lignes de la table en cours de traitement (propre si disponible, sinon brute)"""
+        for df in (self.df_clean, self.df_raw):
+            if df is not None:
+                return len(df)
+        return 0
+    
+    def executer_pipeline_complet(self, utiliser_cache=True, par_blocs=False, taille_bloc=TAILLE_BLOC,
+                                  nb_processus=None, profilage=None, verbeux=True, mode='batch'):
+        """Exécute le pipeline complet
+        
+        par_blocs=True : lecture et nettoyage en flux. Si file_path est un dossier
+        ou un motif glob, les fichiers sont nettoyés en parallèle (nb_processus processus).
+        mode (voir MODES_PIPELINE) : 'serve' s'arrête au cache, 'batch' ajoute le
+        rapport et le fichier nettoyé, 'diagnose' l'aperçu des données brutes.
+        Le fichier nettoyé est écrit en arrière-plan : df_clean est retourné sans
+        attendre le disque (attendre_sauvegarde() pour les mesures d'écriture).
+        Chaque étape est mesurée dans rapport_performance (profilage : None, 'cprofile'
+        ou 'tracemalloc') ; verbeux=False n'émet que les avertissements et erreurs.
+        """
+        if mode not in MODES_PIPELINE:
+            raise ValueError(f"Mode de pipeline inconnu: {mode} (attendu: {MODES_PIPELINE})")
+        self.mesures = MesureEtapes(profilage)
+        self.durees_regles = {}
+        self.attendre_sauvegarde()
+        self.sauvegardes = []
+        sortie = contextlib.nullcontext() if verbeux else _journal_silencieux()
+        try:
+            with sortie:
+                return self._executer_etapes(utiliser_cache, par_blocs, taille_bloc, nb_processus, mode)
+        finally:
+            self.rapport_performance = self.mesures.rapport()
+            self.rapport_performance['regles_nettoyage'] = self.durees_regles
+            if self.sauvegardes:
+                self.rapport_performance['sauvegardes'] = self.sauvegardes
+    
+    def _executer_etapes(self, utiliser_cache, par_blocs, taille_bloc, nb_processus, mode):
+        etape = lambda nom: self.mesures.etape(nom, lignes=self._nb_lignes_courantes)
+        
+        logger.info(f"\n🚀 DÉMARRAGE DU PIPELINE DE TRAITEMENT (mode {mode})")
+        logger.info("="*80)
+        
+        # Dossier ou motif glob : nettoyage parallèle des fichiers (le cache porte sur un fichier unique)
+        multi_sources = self._est_multi_sources()
+        if multi_sources:
+            utiliser_cache = False
+        
+        # Le diagnostic porte sur les données brutes : il relit toujours la source
+        if utiliser_cache and mode != 'diagnose':
+            with etape('charger_depuis_cache'):
+                depuis_cache = self.charger_depuis_cache()
+            if depuis_cache:
+                with etape('valider_donnees'):
+                    self.valider_donnees()
+                if mode != 'serve':
+                    with etape('generer_rapport'):
+                        self.generer_rapport()
+                    with etape('sauvegarder_donnees_propres'):
+                        self.sauvegarder_donnees_propres()
+                logger.info("\n✅ PIPELINE TERMINÉ AVEC SUCCÈS (cache)!")
+                return self.df_clean
+        
+        if multi_sources:
+            with etape('charger_et_nettoyer_sources'):
+                if not self.charger_et_nettoyer_sources(nb_processus):
+                    return None
+        elif par_blocs:
+            with etape('charger_et_nettoyer_par_blocs'):
+                if not self.charger_et_nettoyer_par_blocs(taille_bloc):
+                    return None
+        else:
+            with etape('charger_donnees'):
+                if not self.charger_donnees():
+                    return None
+            
+            if mode == 'diagnose':
+                with etape('afficher_apercu'):
+                    self.afficher_apercu()
+            with etape('standardiser_colonnes'):
+                self.standardiser_colonnes()
+            with etape('nettoyer_donnees'):
+                self.nettoyer_donnees()
+        
+        with etape('valider_donnees'):
+            self.valider_donnees()
+        with etape('compacter_schema'):
+            self.compacter_schema(self.montant_en_centimes)
+        with etape('profiler_donnees'):
+            self.profiler_donnees()
+        if mode != 'serve':
+            # Le dashboard lit le cache : rapport et fichier nettoyé ne servent qu'aux traitements par lots
+            with etape('generer_rapport'):
+                self.generer_rapport()
+            with etape('sauvegarder_donnees_propres'):
+                self.sauvegarder_donnees_propres()
+        
+        if utiliser_cache:
+            with etape('sauvegarder_cache'):
+                self.sauvegarder_cache()
+        if self.version_donnees is None:
+            self.version_donnees = self._version_depuis_cle(self.calculer_cle_cache())
+        
+        logger.info("\n✅ PIPELINE TERMINÉ AVEC SUCCÈS!")
         
         return self.df_clean
+    
+    def exporter_rapport_performance(self, chemin):
+        """Écrit rapport_performance en JSON, avec la source et la version des données"""
+        mesures = getattr(self, 'mesures', None) or MesureEtapes()
+        return mesures.exporter(chemin,
+                                source=os.path.abspath(self.file_path),
+                                version_donnees=self.version_donnees,
+                                date=datetime.now().isoformat(timespec='seconds'),
+                                regles_nettoyage=self.durees_regles)
+
+def empreinte_fichier(chemin_fichier):
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    empreinte = hashlib.sha256()
+    with open(chemin_fichier, 'rb') as f:
+        for bloc in iter(lambda: f.read(1024 * 1024), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _concatener_categories(df_1, df_2):
+    """Concatène deux DataFrames en conservant les colonnes category (union des dictionnaires)"""
+    colonnes = {}
+    for col in df_1.columns:
+        if isinstance(df_1[col].dtype, pd.CategoricalDtype) and col in df_2.columns:
+            colonnes[col] = pd.api.types.union_categoricals([df_1[col], df_2[col].astype('category')])
+        else:
+            colonnes[col] = pd.concat([df_1[col], df_2[col]], ignore_index=True)
+    return pd.DataFrame(colonnes, columns=df_1.columns).set_axis(df_1.index.append(df_2.index))
 
 
-def traiter_donnees(file_path='data/data_kpi.xlsx'):
-    processor = DataProcessor(file_path)
-    return processor.executer_pipeline_complet()
+@contextlib.contextmanager
+def _journal_silencieux(seuil=logging.WARNING):
+    """Limite le journal du module aux messages de niveau seuil ou plus le temps du bloc"""
+    niveau = logger.level
+    logger.setLevel(max(seuil, niveau))
+    try:
+        yield
+    finally:
+        logger.setLevel(niveau)
+
+
+def _nettoyer_source(chemin_fichier):
+    """Nettoie un fichier dans un processus du pool : (chemin, flux Arrow, hachages des lignes, rapport)
+    
+    Les messages du nettoyage sont supprimés : ils s'entremêleraient entre processus.
+    """
+    processor = DataProcessor(chemin_fichier)
+    with _journal_silencieux(logging.CRITICAL + 1):
+        if not processor.charger_donnees():
+            return chemin_fichier, None, None, {'erreur': processor.erreur}
+        processor.standardiser_colonnes()
+        processor.nettoyer_donnees()
+    
+    df = processor.df_clean.reset_index(drop=True)
+    return chemin_fichier, _vers_arrow(df), processor._hacher_lignes(df), processor.rapport_nettoyage
+
+
+def _vers_arrow(df):
+    """Sérialise un DataFrame en flux Arrow IPC (DataFrame inchangé si pyarrow est absent)"""
+    if not PYARROW_DISPONIBLE:
+        return df
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sortie = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sortie, table.schema) as ecrivain:
+        ecrivain.write_table(table)
+    return sortie.getvalue()
+
+
+def _depuis_arrow(donnees):
+    """Inverse de _vers_arrow"""
+    if isinstance(donnees, pd.DataFrame):
+        return donnees
+    return pa.ipc.open_stream(donnees).read_all().to_pandas()
+
+
+def traiter_donnees(file_path='data/data_kpi.xlsx', mode='batch', formats_sortie=FORMATS_DEFAUT):
+    """Pipeline complet sur un fichier, un dossier ou un motif glob (ex. 'exports/*.xlsx')
+    
+    Le fichier nettoyé (mode batch ou diagnose) est écrit avant le retour.
+    """
+    processor = DataProcessor(file_path, formats_sortie=formats_sortie)
+    df_clean = processor.executer_pipeline_complet(mode=mode)
+    processor.attendre_sauvegarde()
+    return df_clean
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Nettoie un export de transactions")
+    parser.add_argument('source', nargs='?', default='data/data_kpi.xlsx',
+                        help="fichier, dossier ou motif glob")
+    parser.add_argument('--mode', choices=MODES_PIPELINE, default='batch')
+    parser.add_argument('--ajouter', nargs='+', metavar='FICHIER',
+                        help="mode incrémental : ajoute ces fichiers au magasin nettoyé de la source")
+    parser.add_argument('--formats', nargs='+', choices=list(ECRIVAINS), default=list(FORMATS_DEFAUT),
+                        help="formats du fichier nettoyé (excel uniquement sur demande)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     print("🧪 TEST DU MODULE DE TRAITEMENT")
-    df_clean = traiter_donnees('data/data_kpi.xlsx')
+    if args.ajouter:
+        df_clean = DataProcessor(args.source).executer_pipeline_incremental(args.ajouter)
+    else:
+        df_clean = traiter_donnees(args.source, args.mode, args.formats)
     
     if df_clean is not None:
         print("\n✅ Module testé avec succès!")
@@ -0,0 +1,144 @@
+"""
+Écriture des données nettoyées
+Formats interchangeables (Parquet zstd, Feather, Parquet partitionné par mois, Excel) et écriture en arrière-plan
+"""
+
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+logger = logging.getLogger(__name__)
+
+# Format écrit par défaut (Excel seulement sur demande : openpyxl est de loin le plus lent)
+FORMATS_DEFAUT = ('parquet',)
+
+# Une seule écriture à la fois ; les threads du pool sont attendus à la sortie de l'interpréteur,
+# un fichier en cours d'écriture n'est donc jamais abandonné
+_executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ecriture')
+
+
+def _remplacer(tmp, chemin):
+    """Remplace chemin (fichier ou dossier) par tmp"""
+    if os.path.isdir(chemin):
+        shutil.rmtree(chemin)
+    os.replace(tmp, chemin)
+
+
+def ecrire_parquet(df, chemin):
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), chemin, compression='zstd')
+
+
+def ecrire_feather(df, chemin):
+    feather.write_feather(df.reset_index(drop=True), chemin, compression='zstd')
+
+
+def ecrire_parquet_mois(df, chemin):
+    """Un fichier par mois (Annee=2024/Mois=12/part-0.parquet) : un filtre de période ne lit que ses fichiers
+
+    Le découpage est fait ici plutôt que par pq.write_to_dataset, qui unifie
+    les dictionnaires des colonnes category à chaque partition (plusieurs fois
+    plus lent) ; les colonnes de partition ne sont pas répétées dans les fichiers.
+    """
+    dates = df['Date'].dt
+    mois = dates.year.to_numpy(dtype=np.int64) * 100 + dates.month.to_numpy(dtype=np.int64)
+    ordre = np.argsort(mois, kind='stable')
+    mois = mois[ordre]
+    trie = df.drop(columns=['Annee', 'Mois'], errors='ignore').take(ordre)
+    bornes = np.flatnonzero(np.diff(mois)) + 1
+    os.makedirs(chemin, exist_ok=True)
+    for debut, fin in zip(np.r_[0, bornes], np.r_[bornes, len(mois)]):
+        dossier = os.path.join(chemin, f"Annee={mois[debut] // 100}", f"Mois={mois[debut] % 100}")
+        os.makedirs(dossier, exist_ok=True)
+        ecrire_parquet(trie.iloc[debut:fin], os.path.join(dossier, 'part-0.parquet'))
+
+
+def ecrire_excel(df, chemin):
+    df.to_excel(chemin, index=False)
+
+
+# format -> (extension, fonction d'écriture, pyarrow requis)
+ECRIVAINS = {
+    'parquet': ('.parquet', ecrire_parquet, True),
+    'feather': ('.feather', ecrire_feather, True),
+    'parquet_mois': ('', ecrire_parquet_mois, True),
+    'excel': ('.xlsx', ecrire_excel, False),
+}
+
+
+def format_depuis_chemin(chemin):
+    """Format correspondant à l'extension de chemin (None si elle n'est pas reconnue)"""
+    extension = os.path.splitext(chemin)[1].lower()
+    for nom, (ext, _, _) in ECRIVAINS.items():
+        if ext and ext == extension:
+            return nom
+    return None
+
+
+def taille_sortie(chemin):
+    """Taille en octets d'un fichier ou de l'ensemble des fichiers d'un dossier"""
+    if os.path.isfile(chemin):
+        return os.path.getsize(chemin)
+    return sum(os.path.getsize(os.path.join(dossier, nom))
+               for dossier, _, noms in os.walk(chemin) for nom in noms)
+
+
+def ecrire(df, base, format_sortie):
+    """Écrit df au format donné (écriture atomique) ; retourne la mesure de l'écriture
+
+    base est le chemin sans extension ; la mesure contient format, chemin,
+    lignes, duree_s, octets, ou erreur si l'écriture a échoué.
+    """
+    extension, fonction, pyarrow_requis = ECRIVAINS[format_sortie]
+    chemin = base + extension
+    mesure = {'format': format_sortie, 'chemin': chemin, 'lignes': len(df)}
+    if pyarrow_requis and not PYARROW_DISPONIBLE:
+        mesure['erreur'] = "pyarrow non installé"
+        logger.warning(f"⚠️ Format {format_sortie} ignoré : pyarrow non installé")
+        return mesure
+
+    debut = time.perf_counter()
+    tmp = f"{chemin}.{os.getpid()}.tmp{extension}"
+    try:
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+        fonction(df, tmp)
+        _remplacer(tmp, chemin)
+    except Exception as e:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+        elif os.path.exists(tmp):
+            os.remove(tmp)
+        mesure['erreur'] = str(e)
+        logger.error(f"❌ Erreur lors de la sauvegarde ({format_sortie}): {e}")
+        return mesure
+
+    mesure['duree_s'] = time.perf_counter() - debut
+    mesure['octets'] = taille_sortie(chemin)
+    logger.info(f"💾 Données nettoyées sauvegardées: {chemin} "
+                f"({mesure['octets'] / 1024 ** 2:.2f} Mo en {mesure['duree_s']:.2f}s)")
+    return mesure
+
+
+def ecrire_formats(df, base, formats=FORMATS_DEFAUT):
+    """Écrit df dans chacun des formats ; retourne la liste des mesures"""
+    return [ecrire(df, base, format_sortie) for format_sortie in formats]
+
+
+def ecrire_en_arriere_plan(df, base, formats=FORMATS_DEFAUT):
+    """Lance ecrire_formats dans le thread d'écriture ; retourne un Future (résultat : liste des mesures)
+
+    df ne doit plus être modifié en place pendant l'écriture.
+    """
+    return _executeur.submit(ecrire_formats, df, base, formats)
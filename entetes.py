@@ -0,0 +1,155 @@
+"""
+Résolution des en-têtes de colonnes
+Normalisation (accents, casse, séparateurs, espaces), score de similarité avec les noms canoniques
+et mémoïsation persistante par empreinte d'en-tête
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+# Score minimal (0 à 1) pour rattacher un en-tête inconnu à un nom canonique
+SEUIL_SCORE = 0.8
+
+# Mots sans contenu ignorés à la comparaison ('Date de la transaction' ~ 'Date transaction')
+MOTS_VIDES = {'de', 'du', 'des', 'la', 'le', 'les', 'l', 'd', 'en', 'par', 'of', 'the', 'a'}
+
+# Fichier du cache des résolutions, dans le dossier de cache du processeur
+NOM_CACHE = 'entetes.json'
+
+# Résolutions déjà lues ou calculées, par fichier de cache (évite de relire le JSON à chaque fichier)
+_memoire = {}
+
+
+def normaliser_entete(nom):
+    """Forme comparable d'un en-tête : sans accents, minuscules, mots séparés par un espace
+
+    'Catégorie_Produit', 'CategorieProduit' et ' catégorie  produit ' donnent tous 'categorie produit'.
+    """
+    texte = unicodedata.normalize('NFKD', str(nom))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c))
+    # camelCase et acronymes : 'ClientID' -> 'Client ID', 'ModePaiement' -> 'Mode Paiement'
+    texte = re.sub(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])', ' ', texte)
+    return ' '.join(re.findall(r'[a-z0-9]+', texte.lower()))
+
+
+def _mots(forme):
+    return [mot for mot in forme.split() if mot not in MOTS_VIDES]
+
+
+def score_entete(forme, reference):
+    """Similarité (0 à 1) entre deux en-têtes normalisés
+
+    Maximum de la similarité des caractères (mots vides retirés, espaces
+    ignorés) et de la part commune des mots ; 1 si les formes sont égales.
+    """
+    if forme == reference:
+        return 1.0
+    mots, mots_reference = _mots(forme), _mots(reference)
+    if not mots or not mots_reference:
+        return 0.0
+    caracteres = difflib.SequenceMatcher(None, ''.join(mots), ''.join(mots_reference)).ratio()
+    communs = len(set(mots) & set(mots_reference)) / len(set(mots) | set(mots_reference))
+    return max(caracteres, communs)
+
+
+class ResolveurEntetes:
+    """Associe les en-têtes d'un fichier aux noms canoniques
+
+    synonymes : orthographe connue -> nom canonique (ex. MAPPING_COLONNES) ;
+    chaque nom canonique est aussi son propre synonyme. Un en-tête dont la
+    forme normalisée est connue est résolu directement ; sinon il est rattaché
+    au nom canonique du synonyme le plus proche si le score atteint seuil.
+    Chaque nom canonique est attribué au plus une fois (meilleurs scores d'abord).
+
+    Les résolutions sont mémoïsées par empreinte (en-têtes + vocabulaire) dans
+    dossier_cache/entetes.json : les fichiers d'une même famille sont résolus
+    sans recalcul, toujours de la même façon.
+    """
+
+    def __init__(self, synonymes, dossier_cache=None, seuil=SEUIL_SCORE):
+        self.seuil = seuil
+        self.vocabulaire = {}
+        for synonyme, canonique in synonymes.items():
+            self.vocabulaire.setdefault(normaliser_entete(synonyme), canonique)
+            self.vocabulaire.setdefault(normaliser_entete(canonique), canonique)
+        # Un changement de vocabulaire ou de seuil invalide les résolutions mémoïsées
+        description = json.dumps([sorted(self.vocabulaire.items()), seuil], ensure_ascii=False)
+        self.version = hashlib.sha1(description.encode('utf-8')).hexdigest()[:12]
+        self.chemin_cache = os.path.join(dossier_cache, NOM_CACHE) if dossier_cache else None
+
+    def empreinte(self, entetes):
+        """Empreinte d'une liste d'en-têtes (ordre compris) pour le vocabulaire courant"""
+        contenu = json.dumps([self.version, [str(e) for e in entetes]], ensure_ascii=False)
+        return hashlib.sha1(contenu.encode('utf-8')).hexdigest()[:16]
+
+    def _cache(self):
+        if self.chemin_cache not in _memoire:
+            resolutions = {}
+            if self.chemin_cache and os.path.exists(self.chemin_cache):
+                try:
+                    with open(self.chemin_cache, encoding='utf-8') as f:
+                        resolutions = json.load(f)
+                except (OSError, ValueError):
+                    resolutions = {}
+            _memoire[self.chemin_cache] = resolutions
+        return _memoire[self.chemin_cache]
+
+    def _sauvegarder_cache(self, resolutions):
+        """Écriture atomique du cache (un processus concurrent peut au pire perdre une entrée, recalculée ensuite)"""
+        if not self.chemin_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.chemin_cache), exist_ok=True)
+            tmp = f"{self.chemin_cache}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(resolutions, f, ensure_ascii=False)
+            os.replace(tmp, self.chemin_cache)
+        except OSError:
+            pass
+
+    def calculer(self, entetes):
+        """Résolution sans cache : (mapping en-tête -> nom canonique, score de chaque en-tête renommé)"""
+        candidats = []
+        for entete in entetes:
+            forme = normaliser_entete(entete)
+            if forme in self.vocabulaire:
+                candidats.append((1.0, str(entete), self.vocabulaire[forme]))
+                continue
+            scores = {}
+            for reference, canonique in self.vocabulaire.items():
+                scores[canonique] = max(scores.get(canonique, 0.0), score_entete(forme, reference))
+            candidats.extend((score, str(entete), canonique)
+                             for canonique, score in scores.items() if score >= self.seuil)
+
+        # En-têtes déjà canoniques d'abord, puis meilleurs scores ; ordre stable à score égal
+        candidats.sort(key=lambda c: (c[1] != c[2], -c[0]))
+        mapping, scores, attribues = {}, {}, set()
+        for score, entete, canonique in candidats:
+            if entete in mapping or canonique in attribues:
+                continue
+            mapping[entete] = canonique
+            attribues.add(canonique)
+            if entete != canonique:
+                scores[entete] = round(score, 3)
+        return {entete: canonique for entete, canonique in mapping.items() if entete != canonique}, scores
+
+    def resoudre(self, entetes):
+        """Mapping en-tête -> nom canonique des en-têtes à renommer (mémoïsé par empreinte)
+
+        Retourne (mapping, scores, depuis_cache).
+        """
+        entetes = [str(e) for e in entetes]
+        cle = self.empreinte(entetes)
+        resolutions = self._cache()
+        if cle in resolutions:
+            resolution = resolutions[cle]
+            return resolution['mapping'], resolution['scores'], True
+
+        mapping, scores = self.calculer(entetes)
+        resolutions[cle] = {'entetes': entetes, 'mapping': mapping, 'scores': scores}
+        self._sauvegarder_cache(resolutions)
+        return mapping, scores, False
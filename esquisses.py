@@ -0,0 +1,180 @@
+"""
+Mode approché : esquisses fusionnables par cellule jour × catégorie
+HyperLogLog (clients distincts), esquisse de quantiles à erreur relative bornée (montants)
+et échantillon de clients par hachage (récurrence, distribution de la CLV)
+
+Toute combinaison de filtres est résolue en fusionnant les cellules sélectionnées,
+sans relire les transactions. Le calcul exact (cube, DataProcessor) reste la
+référence pour les exports.
+"""
+
+import numpy as np
+import pandas as pd
+
+from index_donnees import IndexTemporel
+
+# Mode approché activé si la variable vaut 1
+VARIABLE_MODE_APPROCHE = 'DASHBOARD_MODE_APPROCHE'
+
+# HyperLogLog : 2^PRECISION_HLL registres par cellule (erreur type 1.04 / sqrt(2^p) ≈ 2.3 %)
+PRECISION_HLL = 11
+
+# Esquisse de quantiles : erreur relative maximale sur la valeur d'un quantile
+PRECISION_QUANTILES = 0.01
+
+# Part des clients conservés dans l'échantillon (sélection par hachage : stable d'un filtre à l'autre)
+TAUX_ECHANTILLON = 1 / 16
+
+
+def hacher(valeurs):
+    """Hachage 64 bits de valeurs (colonne category : seul le dictionnaire est haché)"""
+    if isinstance(valeurs.dtype, pd.CategoricalDtype):
+        hachages_categories = pd.util.hash_array(valeurs.cat.categories.to_numpy(dtype=object))
+        return hachages_categories[valeurs.cat.codes.to_numpy()]
+    return pd.util.hash_array(valeurs.to_numpy(dtype=object))
+
+
+def registres_hll(cellules, hachages, nb_cellules, precision=PRECISION_HLL):
+    """Registres HyperLogLog (nb_cellules × 2^precision, uint8) de hachages répartis par cellule"""
+    m = 1 << precision
+    hachages = np.asarray(hachages, dtype=np.uint64)
+    indices = (hachages >> np.uint64(64 - precision)).astype(np.intp)
+    reste = hachages & np.uint64((1 << (64 - precision)) - 1)
+    # Rang du premier bit à 1 dans les 64 - precision bits restants
+    rangs = np.full(len(hachages), 64 - precision + 1, dtype=np.uint8)
+    non_nuls = reste > 0
+    rangs[non_nuls] = (64 - precision - np.floor(np.log2(reste[non_nuls].astype(np.float64)))).astype(np.uint8)
+
+    registres = np.zeros(nb_cellules * m, dtype=np.uint8)
+    np.maximum.at(registres, np.asarray(cellules, dtype=np.intp) * m + indices, rangs)
+    return registres.reshape(nb_cellules, m)
+
+
+def estimer_hll(registres):
+    """Cardinalité estimée à partir d'un vecteur de registres fusionnés"""
+    m = len(registres)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimation = alpha * m * m / np.sum(np.ldexp(1.0, -registres.astype(np.int64)))
+    nb_zeros = int(np.count_nonzero(registres == 0))
+    if estimation <= 2.5 * m and nb_zeros > 0:
+        # Petites cardinalités : comptage linéaire
+        estimation = m * np.log(m / nb_zeros)
+    return float(estimation)
+
+
+class EsquisseQuantiles:
+    """Histogramme à intervalles logarithmiques (type DDSketch), fusionnable par addition
+
+    Une valeur x > 0 tombe dans l'intervalle ceil(log_gamma(x)), gamma = (1 + a) / (1 - a) :
+    tout quantile est restitué à une erreur relative a près, quel que soit le volume.
+    """
+
+    def __init__(self, valeur_min, valeur_max, precision=PRECISION_QUANTILES):
+        self.precision = precision
+        self.gamma = (1 + precision) / (1 - precision)
+        self.log_gamma = np.log(self.gamma)
+        self.decalage = self._indice(max(valeur_min, 1e-9))
+        self.nb_intervalles = self._indice(max(valeur_max, valeur_min, 1e-9)) - self.decalage + 1
+
+    def _indice(self, valeurs):
+        return np.ceil(np.log(valeurs) / self.log_gamma).astype(np.int64)
+
+    def compter(self, cellules, valeurs, nb_cellules):
+        """Comptes (nb_cellules × nb_intervalles) des valeurs réparties par cellule"""
+        intervalles = np.clip(self._indice(np.maximum(valeurs, 1e-9)) - self.decalage, 0, self.nb_intervalles - 1)
+        comptes = np.bincount(np.asarray(cellules, dtype=np.int64) * self.nb_intervalles + intervalles,
+                              minlength=nb_cellules * self.nb_intervalles)
+        return comptes.reshape(nb_cellules, self.nb_intervalles).astype(np.uint32)
+
+    def quantile(self, comptes, q):
+        """Quantile q (0 à 1) d'un vecteur de comptes fusionnés (NaN si vide)"""
+        total = comptes.sum()
+        if total == 0:
+            return float('nan')
+        rang = q * (total - 1)
+        intervalle = int(np.searchsorted(np.cumsum(comptes), rang, side='right'))
+        return float(2 * self.gamma ** (intervalle + self.decalage) / (self.gamma + 1))
+
+
+class EsquissesKPI:
+    """Esquisses par cellule jour × catégorie, fusionnées à la demande pour un filtre"""
+
+    def __init__(self, df, precision_hll=PRECISION_HLL, precision_quantiles=PRECISION_QUANTILES,
+                 taux_echantillon=TAUX_ECHANTILLON):
+        self.precision_hll = precision_hll
+        self.taux_echantillon = taux_echantillon
+
+        jours = df['Date'].dt.normalize()
+        groupes = df.groupby([jours, 'Categorie'], sort=True, observed=True)
+        cellules = groupes.ngroup().to_numpy()
+        self.index_cellules = IndexTemporel(groupes.size().rename('Nb_Transactions').reset_index())
+        nb_cellules = len(self.index_cellules)
+
+        hachages = hacher(df['ID_Client'])
+        self.registres = registres_hll(cellules, hachages, nb_cellules, precision_hll)
+
+        montants = df['Montant'].to_numpy(dtype=float)
+        self.esquisse_montants = EsquisseQuantiles(montants.min(), montants.max(), precision_quantiles)
+        self.comptes_montants = self.esquisse_montants.compter(cellules, montants, nb_cellules)
+
+        # Échantillon de clients : agrégats client × jour × catégorie des seuls clients retenus
+        seuil = np.uint64(int(taux_echantillon * 2 ** 64) - 1)
+        echantillon = hachages <= seuil
+        lignes = df[echantillon]
+        self.index_echantillon = IndexTemporel(
+            lignes.groupby([jours[echantillon], 'Categorie', 'ID_Client'], sort=True, observed=True)['Montant']
+                  .agg(['sum', 'count'])
+                  .set_axis(['CA', 'Nb_Transactions'], axis=1)
+                  .reset_index())
+
+    @property
+    def erreur_clients(self):
+        """Erreur type relative de l'estimation du nombre de clients"""
+        return 1.04 / np.sqrt(1 << self.precision_hll)
+
+    def _fusionner(self, tableau, start_date, end_date, category, operation):
+        positions = self.index_cellules.positions(start_date, end_date, category)
+        selection = tableau[positions]
+        if len(selection) == 0:
+            return np.zeros(tableau.shape[1], dtype=tableau.dtype)
+        return operation(selection, axis=0)
+
+    def nb_clients(self, start_date=None, end_date=None, category='ALL'):
+        """Nombre estimé de clients distincts sur la sélection"""
+        return estimer_hll(self._fusionner(self.registres, start_date, end_date, category, np.max))
+
+    def quantiles_montant(self, quantiles, start_date=None, end_date=None, category='ALL'):
+        """Quantiles des montants de transaction sur la sélection (erreur relative bornée)"""
+        comptes = self._fusionner(self.comptes_montants, start_date, end_date, category, np.sum)
+        return [self.esquisse_montants.quantile(comptes, q) for q in quantiles]
+
+    def clients_echantillon(self, start_date=None, end_date=None, category='ALL'):
+        """CLV et nombre de transactions des clients échantillonnés (même format que donnees_clients)"""
+        tranche = self.index_echantillon.filtrer(start_date, end_date, category)
+        client_data = tranche.groupby('ID_Client', observed=True)[['CA', 'Nb_Transactions']].sum().reset_index()
+        client_data.columns = ['ID_Client', 'CLV', 'Nb_Transactions']
+        return client_data
+
+    def kpis_approches(self, ca_total, start_date=None, end_date=None, category='ALL'):
+        """KPI clients approchés : nombre de clients, CLV moyenne, récurrence, médianes
+
+        ca_total (exact, issu du cube) divisé par le nombre estimé de clients donne la CLV moyenne.
+        """
+        nb_clients = self.nb_clients(start_date, end_date, category)
+        echantillon = self.clients_echantillon(start_date, end_date, category)
+        nb_echantillon = len(echantillon)
+        taux_recurrence = ((echantillon['Nb_Transactions'] > 1).mean() * 100) if nb_echantillon else 0.0
+        montant_median, = self.quantiles_montant([0.5], start_date, end_date, category)
+        return {
+            'approche': True,
+            'nb_clients': nb_clients,
+            'erreur_nb_clients': self.erreur_clients,
+            'clv_moyenne': ca_total / nb_clients if nb_clients else 0.0,
+            'taux_recurrence': taux_recurrence,
+            # Erreur type d'une proportion estimée sur l'échantillon (en points de %)
+            'erreur_taux_recurrence': (100 * np.sqrt(taux_recurrence / 100 * (1 - taux_recurrence / 100)
+                                                     / nb_echantillon) if nb_echantillon else 0.0),
+            'nb_clients_echantillon': nb_echantillon,
+            'clv_mediane': echantillon['CLV'].median() if nb_echantillon else float('nan'),
+            'montant_median': montant_median
+        }
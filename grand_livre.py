@@ -0,0 +1,116 @@
+"""
+Grand livre client pour les indicateurs non additifs (CLV, récurrence)
+Écritures client × jour × catégorie stockées en segments contigus (format CSR), cumuls pré-calculés
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _cumul(valeurs):
+    """Somme cumulée précédée d'un zéro : somme des lignes [i, j) = cumul[j] - cumul[i]"""
+    cumul = np.empty(len(valeurs) + 1, dtype=valeurs.dtype)
+    cumul[0] = 0
+    np.cumsum(valeurs, out=cumul[1:])
+    return cumul
+
+
+def _sommes_segments(valeurs, offsets):
+    """Somme de valeurs sur chaque segment [offsets[i], offsets[i + 1])"""
+    cumul = _cumul(valeurs)
+    return cumul[offsets[1:]] - cumul[offsets[:-1]]
+
+
+class GrandLivreClients:
+    """Écritures de chaque client regroupées par catégorie et triées par jour
+
+    Les lignes du segment (catégorie k, client c) occupent les positions
+    offsets[s] à offsets[s + 1] - 1, s = k × nb_clients + c ; les segments d'une
+    même catégorie forment un bloc contigu. La somme d'un segment vaut
+    cumul[offsets[s + 1]] - cumul[offsets[s]] : sans filtre de période, les
+    cumuls pré-calculés suffisent ; avec un filtre, un masque sur les jours du
+    bloc puis un cumul donnent tous les clients en une passe vectorisée
+    (aucun groupby).
+    """
+
+    def __init__(self, clients):
+        """clients : table Date (jour), Categorie, ID_Client, CA, Nb_Transactions"""
+        identifiants = clients['ID_Client']
+        if isinstance(identifiants.dtype, pd.CategoricalDtype):
+            codes_client = identifiants.cat.codes.to_numpy().astype(np.int64)
+            self.type_identifiants = identifiants.dtype
+        else:
+            codes_client, uniques = pd.factorize(identifiants, sort=True)
+            self.type_identifiants = pd.CategoricalDtype(uniques)
+        self.nb_clients = len(self.type_identifiants.categories)
+
+        codes_categorie, self.categories = pd.factorize(clients['Categorie'], sort=True)
+        self.position_categorie = {categorie: k for k, categorie in enumerate(self.categories)}
+
+        # Jours entiers depuis le premier jour
+        dates = clients['Date'].to_numpy()
+        self.origine = dates.min() if len(dates) else np.datetime64('1970-01-01', 'ns')
+        jours = ((dates - self.origine) // np.timedelta64(1, 'D')).astype(np.int32)
+
+        segments = codes_categorie.astype(np.int64) * self.nb_clients + codes_client
+        ordre = np.lexsort((jours, segments))
+        self.jours = jours[ordre]
+        self.ca = clients['CA'].to_numpy(dtype=float)[ordre]
+        self.transactions = clients['Nb_Transactions'].to_numpy(dtype=np.int64)[ordre]
+        nb_segments = len(self.categories) * self.nb_clients
+        self.offsets = np.searchsorted(segments[ordre], np.arange(nb_segments + 1))
+
+        # Cumuls pré-calculés (sélections sans filtre de période)
+        self.cumul_ca = _cumul(self.ca)
+        self.cumul_transactions = _cumul(self.transactions)
+
+    def __len__(self):
+        return len(self.jours)
+
+    def _codes_categories(self, categories):
+        if categories is None or categories == 'ALL':
+            return range(len(self.categories))
+        if isinstance(categories, str):
+            categories = [categories]
+        return [self.position_categorie[c] for c in categories if c in self.position_categorie]
+
+    def _jour(self, date):
+        """Numéro de jour (entier) d'une borne ; l'heure est ignorée, comme dans IndexTemporel"""
+        jour = (pd.Timestamp(date).normalize().to_datetime64() - self.origine) // np.timedelta64(1, 'D')
+        return int(np.clip(jour, -1, np.iinfo(np.int32).max))
+
+    def sommes(self, start_date=None, end_date=None, categories='ALL'):
+        """CA et nombre de transactions de chaque client (tableaux de longueur nb_clients)
+
+        categories : 'ALL', une catégorie ou une liste de catégories ; les jours
+        retenus vont de start_date à end_date inclus (journées entières).
+        """
+        ca = np.zeros(self.nb_clients)
+        nb = np.zeros(self.nb_clients, dtype=np.int64)
+        periode = bool(start_date and end_date)
+        if periode:
+            debut, fin = self._jour(start_date), self._jour(end_date)
+
+        for k in self._codes_categories(categories):
+            offsets = self.offsets[k * self.nb_clients:(k + 1) * self.nb_clients + 1]
+            if not periode:
+                ca += self.cumul_ca[offsets[1:]] - self.cumul_ca[offsets[:-1]]
+                nb += self.cumul_transactions[offsets[1:]] - self.cumul_transactions[offsets[:-1]]
+                continue
+            bloc = slice(offsets[0], offsets[-1])
+            jours = self.jours[bloc]
+            dans = (jours >= debut) & (jours <= fin)
+            locaux = offsets - offsets[0]
+            ca += _sommes_segments(np.where(dans, self.ca[bloc], 0.0), locaux)
+            nb += _sommes_segments(np.where(dans, self.transactions[bloc], 0), locaux)
+        return ca, nb
+
+    def donnees_clients(self, start_date=None, end_date=None, categories='ALL'):
+        """CLV et nombre de transactions des clients actifs sur la sélection (ordre des identifiants)"""
+        ca, nb = self.sommes(start_date, end_date, categories)
+        actifs = np.flatnonzero(nb > 0)
+        return pd.DataFrame({
+            'ID_Client': pd.Categorical.from_codes(actifs, dtype=self.type_identifiants),
+            'CLV': ca[actifs],
+            'Nb_Transactions': nb[actifs]
+        })
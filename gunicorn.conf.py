@@ -0,0 +1,41 @@
+"""
+Configuration gunicorn du Dashboard KPI (chargée automatiquement par `gunicorn app:server`)
+
+Mode préchargement (par défaut) : le pipeline de données tourne une seule fois
+dans le processus maître, puis les workers sont créés par fork et partagent
+les pages mémoire du DataFrame (copie à l'écriture). DASHBOARD_PRELOAD=0
+revient au chargement indépendant dans chaque worker.
+"""
+
+import gc
+import os
+
+from cache import vider_cache_partage, VARIABLE_CACHE_PARTAGE
+from memoire import memoire_processus, formater_memoire
+from metriques import RegistreMetriques, VARIABLE_METRIQUES
+
+preload_app = os.environ.get('DASHBOARD_PRELOAD', '1') == '1'
+
+
+def on_starting(server):
+    # Les compteurs d'un démarrage précédent ne doivent pas s'ajouter à ceux des nouveaux workers
+    if os.environ.get(VARIABLE_METRIQUES):
+        RegistreMetriques(os.environ[VARIABLE_METRIQUES]).reinitialiser()
+    # Ni le rendu d'une version précédente du code ni celui d'un autre mode (DASHBOARD_MODE_APPROCHE)
+    if vider_cache_partage(os.environ.get(VARIABLE_CACHE_PARTAGE)):
+        server.log.info("🧹 Cache partagé vidé")
+
+
+def when_ready(server):
+    server.log.info(f"🧠 Maître {os.getpid()} prêt - {formater_memoire(memoire_processus())}")
+
+
+def pre_fork(server, worker):
+    # Les objets déjà créés passent dans la génération permanente : le ramasse-miettes
+    # ne réécrit plus leurs en-têtes dans les workers, les pages restent partagées
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    worker.log.info(f"🧠 Worker {worker.pid} démarré - {formater_memoire(memoire_processus())}")
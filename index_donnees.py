@@ -0,0 +1,72 @@
+"""
+Index temporel pour le filtrage des données du dashboard
+Tri unique par date, recherche dichotomique et positions pré-calculées par catégorie
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class IndexTemporel:
+    """Index d'une table triée par date
+
+    Un filtre de période devient deux recherches dichotomiques (searchsorted)
+    et une tranche positionnelle sans copie ; un filtre de catégorie utilise
+    les positions des lignes de la catégorie, pré-calculées à la construction.
+    Coût d'un filtre : O(log n + k) au lieu d'un parcours complet.
+    """
+
+    def __init__(self, table, colonne_date='Date', colonne_categorie='Categorie'):
+        # Tri stable une seule fois (inutile si la table est déjà ordonnée)
+        if not table[colonne_date].is_monotonic_increasing:
+            table = table.sort_values(colonne_date, kind='mergesort')
+        self.table = table
+        self.dates = table[colonne_date].to_numpy()
+
+        # Positions (triées) des lignes de chaque catégorie et dates correspondantes
+        self.positions_categorie = {}
+        self.dates_categorie = {}
+        if colonne_categorie in table.columns:
+            codes, categories = pd.factorize(table[colonne_categorie])
+            ordre = np.argsort(codes, kind='stable')
+            limites = np.searchsorted(codes[ordre], np.arange(len(categories) + 1))
+            for i, categorie in enumerate(categories):
+                positions = ordre[limites[i]:limites[i + 1]]
+                self.positions_categorie[categorie] = positions
+                self.dates_categorie[categorie] = self.dates[positions]
+
+    def __len__(self):
+        return len(self.table)
+
+    @staticmethod
+    def _bornes(dates, start_date, end_date):
+        """Positions [debut, fin) des dates des jours start_date à end_date (inclus, journées entières)
+
+        Même règle pour toutes les tables (transactions horodatées, cube et grand
+        livre journaliers) : l'heure éventuelle des bornes est ignorée.
+        """
+        if not (start_date and end_date):
+            return 0, len(dates)
+        debut = np.searchsorted(dates, pd.Timestamp(start_date).normalize().to_datetime64(), side='left')
+        fin = np.searchsorted(dates, (pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)).to_datetime64(),
+                              side='left')
+        return debut, max(debut, fin)
+
+    def positions(self, start_date=None, end_date=None, category='ALL'):
+        """Retourne une tranche (filtre de période seul) ou un tableau de positions"""
+        if not category or category == 'ALL':
+            debut, fin = self._bornes(self.dates, start_date, end_date)
+            return slice(debut, fin)
+
+        positions = self.positions_categorie.get(category, np.empty(0, dtype=np.intp))
+        if len(positions) == 0:
+            return positions
+        debut, fin = self._bornes(self.dates_categorie[category], start_date, end_date)
+        return positions[debut:fin]
+
+    def filtrer(self, start_date=None, end_date=None, category='ALL'):
+        """Retourne les lignes correspondant aux filtres (vue sans copie pour une période seule)"""
+        positions = self.positions(start_date, end_date, category)
+        if isinstance(positions, slice):
+            return self.table.iloc[positions]
+        return self.table.take(positions)
@@ -0,0 +1,111 @@
+"""
+Instrumentation du pipeline de données
+Durée murale et CPU, lignes en entrée/sortie et variation mémoire de chaque étape, profilage optionnel
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from memoire import memoire_processus
+
+# None : mesures de base ; 'cprofile' : fonctions les plus coûteuses par étape ;
+# 'tracemalloc' : allocations Python (pic et solde) par étape
+MODES_PROFILAGE = (None, 'cprofile', 'tracemalloc')
+
+
+class MesureEtapes:
+    """Collecte silencieuse des mesures de chaque étape d'un pipeline
+
+    Utilisation :
+        mesures = MesureEtapes()
+        with mesures.etape('nettoyer_donnees', lignes=lambda: len(df)):
+            ...
+        mesures.rapport()
+    """
+
+    def __init__(self, profilage=None, nb_fonctions=15):
+        if profilage not in MODES_PROFILAGE:
+            raise ValueError(f"Mode de profilage inconnu: {profilage} (attendu: {MODES_PROFILAGE})")
+        self.profilage = profilage
+        self.nb_fonctions = nb_fonctions
+        self.etapes = []
+
+    @contextmanager
+    def etape(self, nom, lignes=None):
+        """Mesure le bloc ; lignes() donne le nombre de lignes courant (évalué avant et après)"""
+        mesure = {'etape': nom}
+        if lignes is not None:
+            mesure['lignes_entree'] = lignes()
+        rss_avant = memoire_processus()['rss']
+
+        profil = None
+        tracemalloc_demarre = False
+        if self.profilage == 'cprofile':
+            profil = cProfile.Profile()
+            profil.enable()
+        elif self.profilage == 'tracemalloc':
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                tracemalloc_demarre = True
+            tracemalloc.reset_peak()
+            alloue_avant = tracemalloc.get_traced_memory()[0]
+
+        debut_mur = time.perf_counter()
+        debut_cpu = time.process_time()
+        try:
+            yield mesure
+        finally:
+            mesure['duree_s'] = time.perf_counter() - debut_mur
+            mesure['cpu_s'] = time.process_time() - debut_cpu
+
+            if profil is not None:
+                profil.disable()
+                mesure['fonctions'] = self._fonctions_couteuses(profil)
+            elif self.profilage == 'tracemalloc':
+                alloue, pic = tracemalloc.get_traced_memory()
+                mesure['pic_python_octets'] = pic - alloue_avant
+                mesure['solde_python_octets'] = alloue - alloue_avant
+                if tracemalloc_demarre:
+                    tracemalloc.stop()
+
+            rss_apres = memoire_processus()['rss']
+            if rss_avant is not None and rss_apres is not None:
+                mesure['memoire_delta_octets'] = rss_apres - rss_avant
+            if lignes is not None:
+                mesure['lignes_sortie'] = lignes()
+            self.etapes.append(mesure)
+
+    def _fonctions_couteuses(self, profil):
+        """Les nb_fonctions fonctions au temps cumulé le plus élevé"""
+        statistiques = pstats.Stats(profil).stats
+        lignes = sorted(statistiques.items(), key=lambda item: item[1][3], reverse=True)
+        return [{
+            'fonction': f"{os.path.basename(fichier)}:{ligne}({nom})",
+            'appels': nb_appels,
+            'temps_propre_s': temps_propre,
+            'temps_cumule_s': temps_cumule
+        } for (fichier, ligne, nom), (_, nb_appels, temps_propre, temps_cumule, _) in lignes[:self.nb_fonctions]]
+
+    def rapport(self):
+        """Rapport structuré (sérialisable en JSON)"""
+        return {
+            'profilage': self.profilage,
+            'duree_totale_s': sum(m['duree_s'] for m in self.etapes),
+            'cpu_total_s': sum(m['cpu_s'] for m in self.etapes),
+            'etapes': self.etapes
+        }
+
+    def exporter(self, chemin, **contexte):
+        """Écrit le rapport en JSON (écriture atomique) ; contexte est ajouté tel quel"""
+        dossier = os.path.dirname(os.path.abspath(chemin))
+        os.makedirs(dossier, exist_ok=True)
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({**contexte, **self.rapport()}, f, indent=2, default=float)
+        os.replace(tmp, chemin)
+        return chemin
@@ -0,0 +1,36 @@
+"""
+Mesure de la mémoire du processus courant (RSS, PSS, USS)
+"""
+
+import os
+import resource
+
+
+def memoire_processus():
+    """Retourne la mémoire du processus en octets : rss, pss et uss (pages privées)
+
+    Sous Linux les valeurs proviennent de /proc/self/smaps_rollup ; ailleurs
+    seul le pic de RSS est disponible (pss et uss valent alors None).
+    """
+    mesures = {'rss': None, 'pss': None, 'uss': None}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            champs = {}
+            for ligne in f:
+                morceaux = ligne.split()
+                if len(morceaux) == 3 and morceaux[2] == 'kB':
+                    champs[morceaux[0].rstrip(':')] = int(morceaux[1]) * 1024
+        mesures['rss'] = champs.get('Rss')
+        mesures['pss'] = champs.get('Pss')
+        mesures['uss'] = champs.get('Private_Clean', 0) + champs.get('Private_Dirty', 0)
+    except OSError:
+        # ru_maxrss est en Ko sous Linux, en octets sous macOS
+        facteur = 1 if os.uname().sysname == 'Darwin' else 1024
+        mesures['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * facteur
+    return mesures
+
+
+def formater_memoire(mesures):
+    """Formate les mesures de memoire_processus() en Mo"""
+    return " | ".join(f"{nom.upper()}: {valeur / 1024 ** 2:.1f} Mo"
+                      for nom, valeur in mesures.items() if valeur is not None)
@@ -0,0 +1,270 @@
+"""
+Métriques des callbacks du dashboard au format texte Prometheus
+Histogrammes de latence, de lignes filtrées et de taille de réponse, accès aux caches de rendu,
+compteurs internes des caches (succès, échecs, évictions, occupation)
+
+Avec plusieurs workers gunicorn, chaque worker écrit périodiquement ses compteurs
+dans DASHBOARD_METRIQUES_DIR ; la route /metrics additionne les fichiers de tous
+les workers, quel que soit celui qui reçoit la requête.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from memoire import memoire_processus
+
+# Dossier des compteurs partagés entre workers (désactivé si absent : compteurs du processus seul)
+VARIABLE_METRIQUES = 'DASHBOARD_METRIQUES_DIR'
+
+# Intervalle minimal entre deux écritures des compteurs d'un worker (secondes)
+INTERVALLE_ECRITURE = 1.0
+
+BORNES_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BORNES_LIGNES = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BORNES_OCTETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# nom -> (type, description, bornes des histogrammes)
+METRIQUES = {
+    'dashboard_callback_duree_secondes': ('histogram', "Durée d'exécution des callbacks Dash", BORNES_DUREE),
+    'dashboard_callback_lignes': ('histogram', "Transactions couvertes par les filtres du callback", BORNES_LIGNES),
+    'dashboard_callback_reponse_octets': ('histogram', "Taille de la réponse JSON du callback", BORNES_OCTETS),
+    'dashboard_callback_erreurs_total': ('counter', "Callbacks terminés par une exception", None),
+    'dashboard_cache_requetes_total': ('counter', "Accès aux caches de rendu (resultat: hit ou miss)", None),
+}
+
+# Statistiques des caches suivis (CacheLRU / CacheSQLite.statistiques) -> (nom, type, description)
+STATISTIQUES_CACHE = {
+    'hits': ('dashboard_cache_hits_total', 'counter', "Succès des caches suivis"),
+    'misses': ('dashboard_cache_misses_total', 'counter', "Échecs des caches suivis"),
+    'evictions': ('dashboard_cache_evictions_total', 'counter', "Entrées évincées des caches suivis"),
+    'entrees': ('dashboard_cache_entrees', 'gauge', "Entrées des caches suivis, par worker"),
+    'octets': ('dashboard_cache_octets', 'gauge', "Taille des valeurs des caches suivis, par worker"),
+}
+
+
+class RegistreMetriques:
+    """Compteurs et histogrammes en mémoire, exposés au format texte Prometheus
+
+    L'enregistrement d'une mesure coûte une recherche dichotomique et quelques
+    incréments sous verrou ; l'écriture sur disque (mode multi-workers) a lieu
+    au plus une fois par INTERVALLE_ECRITURE, les mesures intermédiaires étant
+    écrites par un minuteur à la fin de l'intervalle.
+    """
+
+    def __init__(self, dossier=None):
+        self.dossier = dossier
+        self._valeurs = {nom: {} for nom in METRIQUES}
+        self._verrou = threading.Lock()
+        self._derniere_ecriture = 0.0
+        self._ecriture_planifiee = False
+        self._caches = {}
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+    @staticmethod
+    def _cle(libelles):
+        return tuple(sorted(libelles.items()))
+
+    def observer(self, nom, valeur, **libelles):
+        """Ajoute une observation à l'histogramme nom"""
+        bornes = METRIQUES[nom][2]
+        cle = self._cle(libelles)
+        with self._verrou:
+            serie = self._valeurs[nom].get(cle)
+            if serie is None:
+                # Comptes par intervalle (le dernier pour +Inf), puis somme et nombre d'observations
+                serie = self._valeurs[nom][cle] = [0] * (len(bornes) + 1) + [0.0, 0]
+            serie[bisect.bisect_left(bornes, valeur)] += 1
+            serie[-2] += valeur
+            serie[-1] += 1
+
+    def incrementer(self, nom, valeur=1, **libelles):
+        """Incrémente le compteur nom"""
+        cle = self._cle(libelles)
+        with self._verrou:
+            self._valeurs[nom][cle] = self._valeurs[nom].get(cle, 0) + valeur
+
+    def suivre_cache(self, nom, cache):
+        """Exporte les statistiques d'un cache ; cache peut être une fonction qui retourne le cache courant
+
+        (cas des vues filtrées, propres à l'instantané en service : leurs compteurs
+        repartent de zéro à chaque rechargement des données)
+        """
+        self._caches[nom] = cache
+
+    def _statistiques_caches(self):
+        statistiques = {}
+        for nom, cache in list(self._caches.items()):
+            cache = cache() if callable(cache) else cache
+            if cache is not None:
+                statistiques[nom] = cache.statistiques()
+        return statistiques
+
+    @contextmanager
+    def mesurer(self, callback, **libelles):
+        """Mesure un callback ; le bloc peut renseigner mesure['lignes'], ['octets'] et ['cache']"""
+        mesure = {}
+        debut = time.perf_counter()
+        try:
+            yield mesure
+        except Exception:
+            self.incrementer('dashboard_callback_erreurs_total', callback=callback, **libelles)
+            raise
+        finally:
+            self.observer('dashboard_callback_duree_secondes', time.perf_counter() - debut,
+                          callback=callback, **libelles)
+            if 'lignes' in mesure:
+                self.observer('dashboard_callback_lignes', mesure['lignes'], callback=callback, **libelles)
+            if 'octets' in mesure:
+                self.observer('dashboard_callback_reponse_octets', mesure['octets'], callback=callback, **libelles)
+            if 'cache' in mesure:
+                self.incrementer('dashboard_cache_requetes_total', callback=callback,
+                                 resultat=mesure['cache'], **libelles)
+            self._ecrire_si_necessaire()
+
+    # ------------------------------------------------------------------
+    # Partage entre workers
+    # ------------------------------------------------------------------
+
+    def _etat(self):
+        with self._verrou:
+            valeurs = {nom: [[list(cle), list(v) if isinstance(v, list) else v] for cle, v in series.items()]
+                       for nom, series in self._valeurs.items()}
+        return {'pid': os.getpid(), 'memoire': memoire_processus(), 'valeurs': valeurs,
+                'caches': self._statistiques_caches()}
+
+    def _ecrire_si_necessaire(self, forcer=False):
+        if not self.dossier:
+            return
+        maintenant = time.monotonic()
+        if not forcer and maintenant - self._derniere_ecriture < INTERVALLE_ECRITURE:
+            # Écriture différée : les dernières mesures d'un worker inactif ne doivent pas être perdues
+            with self._verrou:
+                if self._ecriture_planifiee:
+                    return
+                self._ecriture_planifiee = True
+            minuteur = threading.Timer(INTERVALLE_ECRITURE, self._ecrire_si_necessaire, kwargs={'forcer': True})
+            minuteur.daemon = True
+            minuteur.start()
+            return
+        self._derniere_ecriture = maintenant
+        self._ecriture_planifiee = False
+        chemin = os.path.join(self.dossier, f"metriques_{os.getpid()}.json")
+        tmp = f"{chemin}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._etat(), f)
+        os.replace(tmp, chemin)
+
+    def _etats(self):
+        """États de tous les workers (ou du seul processus courant sans dossier partagé)"""
+        if not self.dossier:
+            return [self._etat()]
+        self._ecrire_si_necessaire(forcer=True)
+        etats = []
+        for chemin in glob.glob(os.path.join(self.dossier, 'metriques_*.json')):
+            try:
+                with open(chemin, 'r', encoding='utf-8') as f:
+                    etats.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return etats
+
+    @staticmethod
+    def _processus_actif(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def exposer(self):
+        """Texte Prometheus (version 0.0.4) des métriques cumulées de tous les workers"""
+        etats = self._etats()
+
+        # Les compteurs des workers arrêtés restent comptés (ils sont cumulatifs)
+        cumul = {nom: {} for nom in METRIQUES}
+        for etat in etats:
+            for nom, series in etat['valeurs'].items():
+                if nom not in cumul:
+                    continue
+                for cle, valeur in series:
+                    cle = tuple(tuple(paire) for paire in cle)
+                    if isinstance(valeur, list):
+                        actuel = cumul[nom].setdefault(cle, [0] * len(valeur))
+                        cumul[nom][cle] = [a + b for a, b in zip(actuel, valeur)]
+                    else:
+                        cumul[nom][cle] = cumul[nom].get(cle, 0) + valeur
+
+        lignes = []
+        for nom, (type_metrique, description, bornes) in METRIQUES.items():
+            lignes.append(f"# HELP {nom} {description}")
+            lignes.append(f"# TYPE {nom} {type_metrique}")
+            for cle, valeur in sorted(cumul[nom].items()):
+                if type_metrique == 'histogram':
+                    cumule = 0
+                    for borne, nb in zip(bornes + ('+Inf',), valeur[:-2]):
+                        cumule += nb
+                        lignes.append(f"{nom}_bucket{_libelles(cle + (('le', borne),))} {cumule}")
+                    lignes.append(f"{nom}_sum{_libelles(cle)} {valeur[-2]}")
+                    lignes.append(f"{nom}_count{_libelles(cle)} {valeur[-1]}")
+                else:
+                    lignes.append(f"{nom}{_libelles(cle)} {valeur}")
+
+        # Caches suivis : compteurs additionnés sur tous les workers, occupation des workers en vie
+        actifs = [etat for etat in sorted(etats, key=lambda e: e['pid']) if self._processus_actif(etat['pid'])]
+        for statistique, (nom, type_metrique, description) in STATISTIQUES_CACHE.items():
+            lignes.append(f"# HELP {nom} {description}")
+            lignes.append(f"# TYPE {nom} {type_metrique}")
+            if type_metrique == 'counter':
+                totaux = {}
+                for etat in etats:
+                    for cache, valeurs in etat.get('caches', {}).items():
+                        totaux[cache] = totaux.get(cache, 0) + valeurs[statistique]
+                for cache, total in sorted(totaux.items()):
+                    lignes.append(f"{nom}{_libelles((('cache', cache),))} {total}")
+            else:
+                for etat in actifs:
+                    for cache, valeurs in sorted(etat.get('caches', {}).items()):
+                        lignes.append(f"{nom}{_libelles((('cache', cache), ('pid', etat['pid'])))} "
+                                      f"{valeurs[statistique]}")
+
+        # Mémoire des workers en vie
+        lignes.append("# HELP dashboard_memoire_octets Mémoire des processus du serveur (rss, pss, uss)")
+        lignes.append("# TYPE dashboard_memoire_octets gauge")
+        for etat in actifs:
+            for type_memoire, valeur in etat['memoire'].items():
+                if valeur is not None:
+                    lignes.append(f"dashboard_memoire_octets"
+                                  f"{_libelles((('pid', etat['pid']), ('type', type_memoire)))} {valeur}")
+        return "\n".join(lignes) + "\n"
+
+    def reinitialiser(self):
+        """Supprime les compteurs en mémoire et les fichiers des workers (démarrage du serveur)"""
+        with self._verrou:
+            self._valeurs = {nom: {} for nom in METRIQUES}
+        if self.dossier:
+            for chemin in glob.glob(os.path.join(self.dossier, 'metriques_*.json*')):
+                os.remove(chemin)
+
+
+def _libelles(cle):
+    """Libellés au format Prometheus : {a="1",b="2"}"""
+    if not cle:
+        return ""
+    return "{" + ",".join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in cle) + "}"
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def creer_registre():
+    """Registre partagé entre workers si DASHBOARD_METRIQUES_DIR est défini, sinon propre au processus"""
+    return RegistreMetriques(os.environ.get(VARIABLE_METRIQUES))
@@ -0,0 +1,243 @@
+"""
+Rechargement à chaud des données du dashboard
+Instantané immuable (transactions, index, cube, KPI) remplacé atomiquement par un thread de surveillance
+"""
+
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data_processing import DataProcessor, montants_en_euros, profiler_colonnes
+from agregats import CubeKPI, VueFiltree
+from cache import CacheLRU
+from esquisses import EsquissesKPI, VARIABLE_MODE_APPROCHE
+from index_donnees import IndexTemporel
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de surveillance du fichier source en secondes (0 : rechargement désactivé)
+VARIABLE_RECHARGEMENT = 'DASHBOARD_RECHARGEMENT_S'
+
+# Dossier surveillé en mode incrémental : chaque nouvel export y est ajouté au magasin nettoyé
+VARIABLE_AJOUTS = 'DASHBOARD_DOSSIER_AJOUTS'
+
+
+class Instantane:
+    """Jeu de données servi aux callbacks, jamais modifié après construction
+
+    Un callback lit l'instantané courant une seule fois au début de son
+    exécution : s'il est remplacé entre-temps, le callback termine sur
+    l'ancien. Le numéro de version entre dans les clés des caches, les
+    entrées de l'ancien instantané ne sont donc plus jamais servies.
+    """
+
+    def __init__(self, df, version, rapport_nettoyage=None, signature_source=None, approche=False,
+                 cube=None, fichiers=()):
+        if 'Montant_Centimes' in df.columns:
+            # Nettoyage avec montant_en_centimes : le dashboard affiche des euros, et le profil
+            # du rapport (calculé sur les centimes) est recalculé sur les montants convertis
+            df = montants_en_euros(df)
+            rapport_nettoyage = {cle: valeur for cle, valeur in (rapport_nettoyage or {}).items()
+                                 if cle != 'profil'}
+
+        # Tri unique par date : les filtres de période deviennent des recherches dichotomiques
+        self.index_df = IndexTemporel(df)
+        self.df = self.index_df.table
+        self.version = version
+        self.rapport_nettoyage = rapport_nettoyage or {}
+        self.signature_source = signature_source
+        # Fichiers intégrés au magasin incrémental (mode DASHBOARD_DOSSIER_AJOUTS)
+        self.fichiers = tuple(fichiers)
+
+        # Cube d'agrégats utilisé par les callbacks (les filtres ne touchent plus les transactions brutes)
+        self.cube = cube if cube is not None else CubeKPI(self.df)
+        self.kpis = self.cube.calculer_kpis()
+
+        # Mode approché : esquisses par jour × catégorie (les KPI de référence ci-dessus restent exacts)
+        self.esquisses = EsquissesKPI(self.df) if approche else None
+
+        # Vues filtrées partagées entre update_kpis et render_content, propres à l'instantané
+        self.vues_filtrees = CacheLRU(taille_max=64)
+
+    def __len__(self):
+        return len(self.df)
+
+    def avec_delta(self, df, delta, version, rapport_nettoyage, fichiers):
+        """Instantané suivant après un ajout incrémental
+
+        df : transactions complètes (historique + delta) ; seul le delta est
+        agrégé puis fusionné au cube existant (CubeKPI.avec_delta).
+        """
+        return Instantane(df, version, rapport_nettoyage, self.signature_source,
+                          approche=self.esquisses is not None,
+                          cube=self.cube.avec_delta(montants_en_euros(delta)), fichiers=fichiers)
+
+    @property
+    def profil(self):
+        """Profil de qualité calculé au nettoyage (calculé ici une seule fois s'il est absent du rapport)"""
+        if 'profil' not in self.rapport_nettoyage:
+            self.rapport_nettoyage['profil'] = {'nb_lignes': len(self.df), 'colonnes': profiler_colonnes(self.df)}
+        return self.rapport_nettoyage['profil']
+
+    def obtenir_vue(self, start_date, end_date, category):
+        """Retourne la vue filtrée (partagée) pour une combinaison de filtres"""
+        return self.vues_filtrees.obtenir(VueFiltree.cle(start_date, end_date, category),
+                                          lambda: VueFiltree(self.cube, self.index_df,
+                                                             start_date, end_date, category,
+                                                             esquisses=self.esquisses))
+
+
+def signature_fichier(chemin):
+    """Date de modification et taille du fichier (None s'il est absent)"""
+    try:
+        stat = os.stat(chemin)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def lister_ajouts(dossier):
+    """Exports (chemins absolus, triés) déposés dans le dossier d'ajouts"""
+    if not dossier or not os.path.isdir(dossier):
+        return []
+    return [os.path.abspath(chemin) for chemin in DataProcessor(dossier).lister_sources()]
+
+
+def construire_instantane(chemin, dossier_ajouts=None, reinitialiser=False):
+    """Exécute le pipeline sur chemin et retourne un Instantane (None si aucune donnée valide)
+
+    Avec dossier_ajouts, chemin est l'historique du magasin incrémental et les
+    exports du dossier non encore intégrés y sont ajoutés (reinitialiser=True :
+    magasin reconstruit, l'historique a changé).
+    """
+    signature = signature_fichier(chemin)
+    processor = DataProcessor(chemin)
+    if dossier_ajouts:
+        df = processor.executer_pipeline_incremental(lister_ajouts(dossier_ajouts), reinitialiser)
+    else:
+        df = processor.executer_pipeline_complet(mode='serve')
+    if df is None or len(df) == 0:
+        return None
+    approche = os.environ.get(VARIABLE_MODE_APPROCHE, '0') == '1'
+    return Instantane(df, processor.version_donnees, processor.rapport_nettoyage, signature, approche,
+                      fichiers=processor.filigrane.get('fichiers', []) if dossier_ajouts else ())
+
+
+class Rechargeur(threading.Thread):
+    """Thread de surveillance du fichier source
+
+    Toutes les intervalle secondes, compare la signature du fichier à celle de
+    l'instantané courant ; en cas de changement, reconstruit un instantané hors
+    du chemin des requêtes puis le transmet à publier(). Un fichier en cours
+    d'écriture (signature instable) est revu au tour suivant ; un fichier
+    invalide est ignoré et les données en service restent inchangées.
+    """
+
+    def __init__(self, chemin, courant, publier, intervalle=30, dossier_ajouts=None):
+        super().__init__(name='rechargeur-donnees', daemon=True)
+        self.chemin = chemin
+        self.courant = courant
+        self.publier = publier
+        self.intervalle = intervalle
+        self.dossier_ajouts = dossier_ajouts
+        self._arret = threading.Event()
+        self._signature_rejetee = None
+        self._ajouts_rejetes = set()
+
+    def arreter(self):
+        self._arret.set()
+
+    def verifier(self):
+        """Recharge si le fichier a changé ; retourne le nouvel instantané ou None"""
+        signature = signature_fichier(self.chemin)
+        if signature is None or signature in (self.courant().signature_source, self._signature_rejetee):
+            return None
+
+        # Attendre que la copie du fichier soit terminée
+        time.sleep(min(1.0, self.intervalle))
+        if signature_fichier(self.chemin) != signature:
+            return None
+
+        try:
+            nouveau = construire_instantane(self.chemin, self.dossier_ajouts, reinitialiser=True)
+        except Exception as e:
+            # Trace complète : l'exception est levée dans le thread de surveillance, loin de toute requête
+            logger.exception(f"❌ Rechargement impossible ({e}) - les données actuelles restent en service")
+            nouveau = None
+        else:
+            if nouveau is None:
+                logger.warning("⚠️ Nouveau fichier sans données valides - les données actuelles restent en service")
+        if nouveau is None:
+            self._signature_rejetee = signature
+            return None
+
+        self.publier(nouveau)
+        logger.info(f"🔄 Données rechargées : version {nouveau.version} ({len(nouveau)} transactions)")
+        return nouveau
+
+    def verifier_ajouts(self):
+        """Ajoute au magasin les exports apparus dans dossier_ajouts ; retourne le nouvel instantané ou None
+
+        Seules les nouvelles lignes sont nettoyées et agrégées (cube fusionné par
+        Instantane.avec_delta). Si le magasin a déjà intégré des fichiers absents
+        de l'instantané (autre worker gunicorn), l'instantané est reconstruit
+        entièrement depuis le magasin.
+        """
+        courant = self.courant()
+        signatures = {chemin: signature_fichier(chemin) for chemin in lister_ajouts(self.dossier_ajouts)
+                      if chemin not in courant.fichiers}
+        signatures = {chemin: sig for chemin, sig in signatures.items()
+                      if sig is not None and (chemin, sig) not in self._ajouts_rejetes}
+        if not signatures:
+            return None
+
+        # Attendre que la copie des fichiers soit terminée
+        time.sleep(min(1.0, self.intervalle))
+        nouveaux = [chemin for chemin, sig in signatures.items() if signature_fichier(chemin) == sig]
+        if not nouveaux:
+            return None
+
+        # Magasin partagé par les workers : chargement, ajouts et sauvegarde sous un même verrou
+        magasin = DataProcessor(self.chemin)
+        with magasin.verrou_magasin():
+            if not magasin.charger_magasin():
+                return None
+            version_initiale = magasin.version_donnees
+            deltas = []
+            for chemin in nouveaux:
+                if chemin in magasin.filigrane.get('fichiers', []):
+                    continue
+                delta = magasin.ajouter_fichier(chemin)
+                if delta is None:
+                    logger.warning(f"⚠️ Export ignoré (aucune donnée valide) : {chemin}")
+                    self._ajouts_rejetes.add((chemin, signatures[chemin]))
+                elif len(delta):
+                    deltas.append(delta)
+
+        fichiers = magasin.filigrane.get('fichiers', [])
+        if version_initiale == courant.version:
+            if not deltas and magasin.version_donnees == courant.version:
+                return None
+            delta = pd.concat(deltas, ignore_index=True) if deltas else magasin.df_clean.iloc[:0]
+            nouveau = courant.avec_delta(magasin.df_clean, delta, magasin.version_donnees,
+                                         magasin.rapport_nettoyage, fichiers)
+        else:
+            nouveau = Instantane(magasin.df_clean, magasin.version_donnees, magasin.rapport_nettoyage,
+                                 courant.signature_source, approche=courant.esquisses is not None,
+                                 fichiers=fichiers)
+
+        self.publier(nouveau)
+        logger.info(f"➕ Exports ajoutés : version {nouveau.version} ({len(nouveau)} transactions)")
+        return nouveau
+
+    def run(self):
+        while not self._arret.wait(self.intervalle):
+            try:
+                if self.verifier() is None and self.dossier_ajouts:
+                    self.verifier_ajouts()
+            except Exception as e:
+                # Le thread de surveillance ne doit pas s'arrêter : nouvel essai au tour suivant
+                logger.exception(f"❌ Surveillance des données interrompue ({e}) - nouvel essai dans {self.intervalle} s")
@@ -0,0 +1,137 @@
+"""
+Réduction des données envoyées au navigateur
+Séries temporelles sous-échantillonnées (LTTB ou min/max), histogrammes pré-calculés, nuages de points agrégés
+
+Chaque fonction borne le nombre de points produits, quel que soit le volume d'entrée.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Largeur utile d'un graphique en pixels : au-delà d'un point par pixel, les points ne se distinguent plus
+LARGEUR_GRAPHIQUE_PX = 800
+
+# Nombre de points au-delà duquel un nuage est agrégé par cellules
+SEUIL_NUAGE = 2_000
+
+
+def lttb(x, y, nb_points):
+    """Largest-Triangle-Three-Buckets : indices des nb_points points conservant la forme de la série
+
+    x et y sont des tableaux numériques de même longueur, x croissant. Le premier
+    et le dernier point sont toujours conservés ; dans chaque intervalle, on garde
+    le point formant le plus grand triangle avec le point retenu précédemment et
+    la moyenne de l'intervalle suivant.
+    """
+    n = len(x)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    limites = np.linspace(1, n - 1, nb_points - 1).astype(np.intp)
+    indices = np.empty(nb_points, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    precedent = 0
+    for i in range(nb_points - 2):
+        debut, fin = limites[i], limites[i + 1]
+        # Moyenne de l'intervalle suivant (dernier point pour le dernier intervalle)
+        suivant_debut, suivant_fin = fin, limites[i + 2] if i + 2 < len(limites) else n
+        x_moyen = x[suivant_debut:suivant_fin].mean()
+        y_moyen = y[suivant_debut:suivant_fin].mean()
+
+        aires = np.abs((x[precedent] - x_moyen) * (y[debut:fin] - y[precedent])
+                       - (x[precedent] - x[debut:fin]) * (y_moyen - y[precedent]))
+        precedent = debut + int(np.argmax(aires))
+        indices[i + 1] = precedent
+    return indices
+
+
+def minmax(y, nb_intervalles):
+    """Indices du minimum et du maximum de chaque intervalle (pics conservés), dans l'ordre d'origine"""
+    n = len(y)
+    if 2 * nb_intervalles >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    limites = np.linspace(0, n, nb_intervalles + 1).astype(np.intp)
+    debuts = limites[:-1]
+    # Un intervalle de longueur fixe par colonne : argmin/argmax vectorisés sur une matrice
+    longueur = int(np.diff(limites).max())
+    positions = np.minimum(debuts[:, None] + np.arange(longueur), limites[1:, None] - 1)
+    valeurs = y[positions]
+    indices = np.concatenate([positions[np.arange(nb_intervalles), valeurs.argmin(axis=1)],
+                              positions[np.arange(nb_intervalles), valeurs.argmax(axis=1)]])
+    return np.unique(indices)
+
+
+def reduire_serie(df, colonne_x, colonne_y, largeur_px=LARGEUR_GRAPHIQUE_PX, methode='lttb'):
+    """Sous-échantillonne une série (triée par colonne_x) à la résolution du graphique
+
+    methode='lttb' : largeur_px points conservant l'allure générale ;
+    methode='minmax' : minimum et maximum par pixel (aucun pic perdu, jusqu'à 2 points par pixel).
+    """
+    if len(df) <= largeur_px:
+        return df
+    if methode == 'minmax':
+        indices = minmax(df[colonne_y].to_numpy(), largeur_px)
+    else:
+        x = df[colonne_x]
+        if pd.api.types.is_datetime64_any_dtype(x):
+            x = x.astype('int64')
+        indices = lttb(x.to_numpy(), df[colonne_y].to_numpy(), largeur_px)
+    return df.iloc[indices]
+
+
+def histogramme(valeurs, nb_classes=30):
+    """Histogramme calculé côté serveur : DataFrame (Centre, Largeur, Debut, Fin, Effectif)"""
+    valeurs = np.asarray(valeurs, dtype=float)
+    valeurs = valeurs[np.isfinite(valeurs)]
+    effectifs, bords = np.histogram(valeurs, bins=nb_classes)
+    return pd.DataFrame({
+        'Centre': (bords[:-1] + bords[1:]) / 2,
+        'Largeur': np.diff(bords),
+        'Debut': bords[:-1],
+        'Fin': bords[1:],
+        'Effectif': effectifs
+    })
+
+
+def agreger_nuage(df, colonne_x, colonne_y, nb_cellules_x=100, nb_cellules_y=100, seuil=SEUIL_NUAGE):
+    """Agrège un nuage de points par cellules d'une grille si plus de seuil points
+
+    Chaque cellule non vide devient un point placé au barycentre de ses points,
+    avec leur nombre (colonne Nb_Points) : la densité reste lisible et le nombre
+    de points est borné par nb_cellules_x × nb_cellules_y. Les valeurs entières
+    peu nombreuses (ex. nombre de transactions) gardent une colonne par valeur.
+    Retourne (df, agrege).
+    """
+    if len(df) <= seuil:
+        return df, False
+
+    x = df[colonne_x].to_numpy(dtype=float)
+    y = df[colonne_y].to_numpy(dtype=float)
+    valeurs_x = np.unique(x)
+    if len(valeurs_x) <= nb_cellules_x:
+        cellules_x = np.searchsorted(valeurs_x, x)
+    else:
+        cellules_x = _cellules(x, nb_cellules_x)
+    cellules = cellules_x * nb_cellules_y + _cellules(y, nb_cellules_y)
+
+    codes, uniques = pd.factorize(cellules)
+    nb_points = np.bincount(codes)
+    return pd.DataFrame({
+        colonne_x: np.bincount(codes, weights=x) / nb_points,
+        colonne_y: np.bincount(codes, weights=y) / nb_points,
+        'Nb_Points': nb_points
+    }), True
+
+
+def _cellules(valeurs, nb_cellules):
+    """Numéro de cellule (0 à nb_cellules - 1) de chaque valeur sur une grille régulière"""
+    minimum, maximum = valeurs.min(), valeurs.max()
+    if maximum == minimum:
+        return np.zeros(len(valeurs), dtype=np.intp)
+    return np.minimum(((valeurs - minimum) / (maximum - minimum) * nb_cellules).astype(np.intp), nb_cellules - 1)
@@ -79,7 +79,8 @@ Thumbs.db
 # Données temporaires
 *.tmp
 *.bak
-data_kpi_clean.xlsx"""
+data_kpi_clean.*
+data_kpi_clean/"""
 
 with open('.gitignore', 'w', encoding='utf-8') as f:
     f.write(gitignore_content)
@@ -0,0 +1,208 @@
+"""
+Table des transactions paginée côté serveur (onglet Détails)
+Filtre, tri et découpage en pages sans trier ni formater la sélection complète
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colonnes affichées : identifiant -> libellé
+COLONNES_TABLE = {
+    'Date': 'Date',
+    'ID_Client': 'Client',
+    'Montant': 'Montant',
+    'Categorie': 'Catégorie',
+    'Mode_Paiement': 'Paiement'
+}
+
+TAILLE_PAGE = 100
+
+# Une condition de filter_query (syntaxe DataTable) : {colonne} opérateur valeur
+_CONDITION = re.compile(r"\{(?P<colonne>[^}]+)\}\s+(?P<operateur>s=|s!=|s>=|s<=|s>|s<|"
+                        r"eq|ne|ge|le|gt|lt|=|!=|>=|<=|>|<|icontains|contains|datestartswith)\s+"
+                        r"(?P<valeur>.+)")
+_OPERATEURS = {
+    'eq': '=', 's=': '=', '=': '=',
+    'ne': '!=', 's!=': '!=', '!=': '!=',
+    'ge': '>=', 's>=': '>=', '>=': '>=',
+    'le': '<=', 's<=': '<=', '<=': '<=',
+    'gt': '>', 's>': '>', '>': '>',
+    'lt': '<', 's<': '<', '<': '<',
+}
+
+
+def _texte(brut):
+    """Valeur d'une condition sans ses guillemets"""
+    texte = brut.strip()
+    if len(texte) >= 2 and texte[0] == texte[-1] and texte[0] in '"\'`':
+        return texte[1:-1]
+    return texte
+
+
+def _nombre(texte):
+    """Valeur numérique de texte si possible, texte sinon"""
+    try:
+        return float(texte)
+    except ValueError:
+        return texte
+
+
+def _masque_condition(table, colonne, operateur, texte):
+    """Masque booléen (NumPy) d'une condition, évalué sur toute la colonne"""
+    serie = table[colonne]
+    if operateur in ('contains', 'icontains'):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Recherche sur le dictionnaire seulement, puis propagation aux lignes par les codes
+            valides = pd.Series(serie.cat.categories.astype(str)).str.contains(
+                texte, case=(operateur == 'contains'), regex=False).to_numpy()
+            return np.append(valides, False)[serie.cat.codes.to_numpy()]
+        textes = serie.astype(str)
+        return textes.str.contains(texte, case=(operateur == 'contains'), regex=False).to_numpy()
+    if operateur == 'datestartswith' or colonne == 'Date':
+        return _masque_date(serie, operateur, texte)
+
+    comparer = _OPERATEURS[operateur]
+    valeur = _nombre(texte)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Comparaison sur le dictionnaire, puis propagation aux lignes par les codes
+        categories = serie.cat.categories
+        valides = _comparer(categories.astype(str).to_numpy(), comparer, texte)
+        codes = serie.cat.codes.to_numpy()
+        return np.append(valides, False)[codes]
+    if pd.api.types.is_numeric_dtype(serie) and not isinstance(valeur, (int, float)):
+        return np.zeros(len(serie), dtype=bool)
+    if not pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_datetime64_any_dtype(serie):
+        return _comparer(serie.astype(str).to_numpy(), comparer, texte)
+    return _comparer(serie.to_numpy(), comparer, valeur)
+
+
+def _masque_date(serie, operateur, texte):
+    """Condition sur une date saisie au format affiché (jj/mm/aaaa) ou ISO, éventuellement partielle
+
+    « 2024 » ou « 2024-12 » désignent toute la période : = et datestartswith
+    retiennent les dates comprises entre son début et sa fin.
+    """
+    try:
+        if '/' in texte:
+            periode = pd.Period(pd.to_datetime(texte, dayfirst=True), 'D')
+        else:
+            periode = pd.Period(texte)
+    except ValueError:
+        return np.zeros(len(serie), dtype=bool)
+    dates = serie.to_numpy()
+    debut, fin = periode.start_time.to_datetime64(), periode.end_time.to_datetime64()
+    
+    operateur = _OPERATEURS.get(operateur, '=')
+    if operateur == '=':
+        return (dates >= debut) & (dates <= fin)
+    if operateur == '!=':
+        return (dates < debut) | (dates > fin)
+    if operateur == '>':
+        return dates > fin
+    if operateur == '>=':
+        return dates >= debut
+    if operateur == '<':
+        return dates < debut
+    return dates <= fin
+
+
+def _comparer(valeurs, operateur, valeur):
+    if operateur == '=':
+        return valeurs == valeur
+    if operateur == '!=':
+        return valeurs != valeur
+    if operateur == '>=':
+        return valeurs >= valeur
+    if operateur == '<=':
+        return valeurs <= valeur
+    if operateur == '>':
+        return valeurs > valeur
+    return valeurs < valeur
+
+
+def filtrer(table, filter_query):
+    """Applique un filter_query DataTable (conditions reliées par &&) ; retourne (table, erreur)"""
+    if not filter_query:
+        return table, None
+    masque = np.ones(len(table), dtype=bool)
+    for condition in filter_query.split(' && '):
+        correspondance = _CONDITION.fullmatch(condition.strip())
+        if correspondance is None or correspondance['colonne'] not in table.columns:
+            return table.iloc[:0], f"Filtre non reconnu: {condition}"
+        masque &= _masque_condition(table, correspondance['colonne'], correspondance['operateur'],
+                                    _texte(correspondance['valeur']))
+    return table[masque], None
+
+
+def _rangs(serie):
+    """Clés de tri numériques (rang alphabétique des modalités pour les colonnes category)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        rang_categories = np.argsort(np.argsort(serie.cat.categories.astype(str).to_numpy(), kind='stable'))
+        # Les codes -1 (valeurs manquantes) sont placés en fin de tri
+        return np.append(rang_categories, len(rang_categories))[serie.cat.codes.to_numpy()]
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.to_numpy().view('int64')
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype=float)
+    return np.unique(serie.astype(str).to_numpy(), return_inverse=True)[1]
+
+
+def positions_page(table, page, taille_page, tri=None):
+    """Positions des lignes de la page demandée
+
+    table est triée par date croissante : le tri par défaut (date décroissante)
+    et le tri par date se résument à une tranche. Pour les autres colonnes, seules
+    les (page + 1) × taille_page premières lignes sont sélectionnées
+    (argpartition) puis triées.
+    """
+    n = len(table)
+    debut = page * taille_page
+    fin = min(debut + taille_page, n)
+    if debut >= n:
+        return np.empty(0, dtype=np.intp)
+
+    colonne, decroissant = 'Date', True
+    if tri:
+        colonne, decroissant = tri[0]['column_id'], tri[0]['direction'] == 'desc'
+
+    if colonne == 'Date':
+        if decroissant:
+            return np.arange(n - 1 - debut, n - 1 - fin, -1)
+        return np.arange(debut, fin)
+
+    cles = _rangs(table[colonne])
+    if decroissant:
+        cles = -cles
+    if fin < n:
+        candidats = np.argpartition(cles, fin - 1)[:fin]
+    else:
+        candidats = np.arange(n)
+    # Tri stable des candidats (à clé égale, ordre chronologique)
+    candidats.sort()
+    ordre = candidats[np.argsort(cles[candidats], kind='stable')]
+    return ordre[debut:fin]
+
+
+def formater_page(page):
+    """Enregistrements DataTable de la page (formatage vectorisé limité aux lignes visibles)"""
+    # to_numpy(object) plutôt que astype(str) : une colonne category convertirait tout son dictionnaire
+    donnees = {
+        'Date': page['Date'].dt.strftime('%d/%m/%Y').to_numpy(),
+        'ID_Client': page['ID_Client'].to_numpy(dtype=object).astype(str),
+        'Montant': np.char.add(np.char.mod('%.2f', page['Montant'].to_numpy(dtype=float)), '€'),
+        'Categorie': page['Categorie'].to_numpy(dtype=object).astype(str),
+        'Mode_Paiement': page['Mode_Paiement'].to_numpy(dtype=object).astype(str)
+    }
+    return pd.DataFrame(donnees).to_dict('records')
+
+
+def page_transactions(transactions, page=0, taille_page=TAILLE_PAGE, tri=None, filter_query=''):
+    """Retourne (enregistrements de la page, nombre de pages, nombre de lignes, erreur de filtre)"""
+    table, erreur = filtrer(transactions, filter_query)
+    nb_lignes = len(table)
+    nb_pages = max(1, -(-nb_lignes // taille_page))
+    page = min(page or 0, nb_pages - 1)
+    positions = positions_page(table, page, taille_page, tri)
+    return formater_page(table.iloc[positions]), nb_pages, nb_lignes, erreur
@@ -3,6 +3,10 @@ Script de test pour vérifier le traitement des données
 """
 
 from data_processing import DataProcessor
+from benchmarks.generateur import generer_donnees_brutes, ecrire_source
+import logging
+import os
+import numpy as np
 import pandas as pd
 
 def tester_traitement():
@@ -47,7 +51,7 @@ def tester_traitement():
     
     print("\n📌 ÉTAPE 7: Sauvegarde")
     if processor.sauvegarder_donnees_propres():
-        print("✅ Sauvegarde réussie")
+        print("✅ Sauvegarde lancée en arrière-plan")
     
     print("\n📌 ÉTAPE 8: Vérification des données nettoyées")
     print("\nAperçu des données finales:")
@@ -57,6 +61,12 @@ def tester_traitement():
     print("\nStatistiques:")
     print(processor.df_clean.describe())
     
+    for mesure in processor.attendre_sauvegarde():
+        if 'erreur' in mesure:
+            print(f"❌ Sauvegarde {mesure['format']} échouée: {mesure['erreur']}")
+        else:
+            print(f"✅ {mesure['chemin']}: {mesure['octets'] / 1024:.1f} Ko en {mesure['duree_s']:.3f}s")
+    
     print("\n" + "="*80)
     print("✅ TEST TERMINÉ AVEC SUCCÈS!")
     print("="*80)
@@ -64,11 +74,689 @@ def tester_traitement():
     return processor.df_clean
 
 
+def _source_avec_id_manquant(dossier, extension, nb_lignes=3000):
+    """Export synthétique dont le premier bloc contient un identifiant manquant (colonne lue en float64)"""
+    df = generer_donnees_brutes(nb_lignes, seed=7)
+    df.loc[0, 'ID_Client'] = np.nan
+    chemin = os.path.join(dossier, f"source.{extension}")
+    ecrire_source(df, chemin)
+    return chemin
+
+
+def _nettoyer(chemin, taille_bloc=None):
+    processor = DataProcessor(chemin)
+    if taille_bloc:
+        assert processor.charger_et_nettoyer_par_blocs(taille_bloc)
+    else:
+        assert processor.charger_donnees()
+        processor.standardiser_colonnes()
+        processor.nettoyer_donnees()
+    return processor
+
+
+def test_flux_identique_au_chargement_complet(tmp_path):
+    """La lecture par blocs donne la même table et les mêmes rejets que le chargement complet"""
+    for extension, taille_bloc in (('csv', 777), ('xlsx', 1000)):
+        chemin = _source_avec_id_manquant(str(tmp_path), extension)
+        complet, flux = _nettoyer(chemin), _nettoyer(chemin, taille_bloc)
+        
+        pd.testing.assert_frame_equal(flux.df_clean.reset_index(drop=True),
+                                      complet.df_clean.reset_index(drop=True))
+        assert flux.rapport_nettoyage['rejets_par_regle'] == complet.rapport_nettoyage['rejets_par_regle']
+        assert not flux.df_clean['ID_Client'].str.endswith('.0').any()
+
+
+def _comparer_kpis(kpis, reference):
+    assert kpis.keys() == reference.keys()
+    for nom, valeur in reference.items():
+        if isinstance(valeur, pd.Series):
+            # Ordre des dictionnaires category différent d'un cube à l'autre : comparaison par libellé
+            texte = lambda serie: serie.set_axis(serie.index.astype(str)).sort_index()
+            pd.testing.assert_series_equal(texte(kpis[nom]), texte(valeur), check_index_type=False)
+        elif isinstance(valeur, float):
+            assert np.isclose(kpis[nom], valeur), nom
+        else:
+            assert kpis[nom] == valeur, nom
+
+
+def test_ajout_incremental_ignore_les_identifiants_flottants(tmp_path):
+    """Un export relu avec des identifiants '2' n'ajoute pas les transactions déjà vues sous '2.0'"""
+    from rechargement import construire_instantane, Instantane, Rechargeur
+    
+    df = generer_donnees_brutes(2000, seed=3)
+    ids = pd.to_numeric(df['ID_Client'], errors='coerce')
+    historique, dossier_ajouts = str(tmp_path / 'historique.csv'), tmp_path / 'ajouts'
+    dossier_ajouts.mkdir()
+    # Historique exporté depuis une colonne flottante ('841.0'), ajout depuis une colonne entière ('841')
+    df.iloc[:1500].assign(ID_Client=ids[:1500]).to_csv(historique, index=False)
+    courant = [construire_instantane(historique, str(dossier_ajouts))]
+    df.iloc[1000:].assign(ID_Client=ids[1000:].astype('Int64')).to_csv(dossier_ajouts / 'ajout.csv', index=False)
+    
+    rechargeur = Rechargeur(historique, lambda: courant[0], lambda nouveau: courant.__setitem__(0, nouveau),
+                            intervalle=0.01, dossier_ajouts=str(dossier_ajouts))
+    nouveau = rechargeur.verifier_ajouts()
+    assert nouveau is courant[0]
+    assert rechargeur.verifier_ajouts() is None
+    
+    # Même résultat qu'un nettoyage complet des 2000 lignes
+    complet = str(tmp_path / 'complet.csv')
+    df.assign(ID_Client=ids).to_csv(complet, index=False)
+    reference = DataProcessor(complet).executer_pipeline_complet(utiliser_cache=False, mode='serve')
+    assert len(nouveau) == len(reference)
+    assert nouveau.rapport_nettoyage['rejets_par_regle']['doublons'] > 0
+    
+    # Le cube fusionné avec le delta donne les KPI d'un cube reconstruit
+    frais = Instantane(nouveau.df, nouveau.version)
+    _comparer_kpis(nouveau.kpis, frais.kpis)
+    debut, fin = nouveau.df['Date'].quantile(0.3), nouveau.df['Date'].quantile(0.6)
+    categorie = nouveau.df['Categorie'].iloc[0]
+    _comparer_kpis(nouveau.cube.calculer_kpis(debut, fin, categorie), frais.cube.calculer_kpis(debut, fin, categorie))
+
+
+def test_doublons_entre_fichiers_malgre_le_type_des_identifiants(tmp_path):
+    """Deux exports des mêmes transactions (identifiants flottants / entiers) ne dédoublent ni lignes ni clients"""
+    df = generer_donnees_brutes(1500, seed=11)
+    ids = pd.to_numeric(df['ID_Client'], errors='coerce')
+    (tmp_path / 'exports').mkdir()
+    df.assign(ID_Client=ids).to_csv(tmp_path / 'exports' / 'a.csv', index=False)
+    # Second export sans identifiant manquant : colonne lue en entiers
+    ecrire_source(df.assign(ID_Client=ids.astype('Int64'))[ids.notna()], str(tmp_path / 'exports' / 'b.xlsx'))
+    
+    processor = DataProcessor(str(tmp_path / 'exports'))
+    assert processor.charger_et_nettoyer_sources(nb_processus=2)
+    seul = _nettoyer(str(tmp_path / 'exports' / 'a.csv'))
+    
+    assert processor.rapport_nettoyage['doublons_inter_fichiers'] == len(seul.df_clean)
+    assert len(processor.df_clean) == len(seul.df_clean)
+    assert processor.df_clean['ID_Client'].nunique() == seul.df_clean['ID_Client'].nunique()
+
+
+def test_mode_approche_revient_au_calcul_exact_si_echantillon_insuffisant(monkeypatch):
+    """Sélection étroite en mode approché : indicateurs clients exacts, non marqués comme approchés"""
+    import agregats
+    from rechargement import Instantane
+    
+    df = DataProcessor('data/data_kpi.xlsx').executer_pipeline_complet(mode='serve')
+    exact, approche = Instantane(df, 'exact'), Instantane(df, 'approche', approche=True)
+    debut, fin = df['Date'].min(), df['Date'].min() + pd.Timedelta(days=5)
+    categorie = df['Categorie'].iloc[0]
+    assert len(approche.esquisses.clients_echantillon(debut, fin, categorie)) < agregats.MIN_CLIENTS_ECHANTILLON
+    
+    vue, reference = approche.obtenir_vue(debut, fin, categorie), exact.obtenir_vue(debut, fin, categorie)
+    assert len(vue.client_data) == len(reference.client_data) > 0
+    assert not vue.approche and 'approche' not in vue.kpis
+    assert vue.kpis['taux_recurrence'] == reference.kpis['taux_recurrence']
+    
+    # Échantillon suffisant : les indicateurs clients viennent des esquisses
+    monkeypatch.setattr(agregats, 'MIN_CLIENTS_ECHANTILLON', 1)
+    vue = approche.obtenir_vue(None, None, 'ALL')
+    assert vue.kpis['approche'] and vue.approche
+    assert len(vue.client_data) < len(exact.obtenir_vue(None, None, 'ALL').client_data)
+
+
+
+def test_montants_en_centimes_affiches_en_euros(tmp_path):
+    """Nettoyage avec montant_en_centimes : l'instantané sert les mêmes KPI et le même profil qu'en euros"""
+    from rechargement import Instantane
+    
+    chemin = str(tmp_path / 'source.csv')
+    generer_donnees_brutes(1500, seed=5).to_csv(chemin, index=False)
+    euros = DataProcessor(chemin).executer_pipeline_complet(utiliser_cache=False, mode='serve')
+    processor = DataProcessor(chemin, montant_en_centimes=True)
+    centimes = processor.executer_pipeline_complet(utiliser_cache=False, mode='serve')
+    assert 'Montant_Centimes' in centimes.columns
+    
+    servi, reference = Instantane(centimes, 'centimes', processor.rapport_nettoyage), Instantane(euros, 'euros')
+    _comparer_kpis(servi.kpis, reference.kpis)
+    assert np.isclose(servi.profil['colonnes']['Montant']['moyenne'],
+                      reference.profil['colonnes']['Montant']['moyenne'])
+    assert 'profil' in processor.rapport_nettoyage
+
+
+def test_resolution_des_entetes_memoisee(tmp_path, monkeypatch):
+    """Résolution calculée une fois par empreinte, relue depuis entetes.json, recalculée si le vocabulaire change"""
+    import entetes
+    from data_processing import MAPPING_COLONNES
+    
+    monkeypatch.setattr(entetes, '_memoire', {})
+    entetes_fichier = ['Date de la transaction', 'client id', 'Catégorie_Produit', 'Montant (€)', 'Colonne libre']
+    mapping, scores, depuis_cache = entetes.ResolveurEntetes(MAPPING_COLONNES, str(tmp_path)).resoudre(entetes_fichier)
+    assert not depuis_cache
+    assert (tmp_path / entetes.NOM_CACHE).exists()
+    assert mapping['client id'] == 'ID_Client' and mapping['Catégorie_Produit'] == 'Categorie'
+    assert 'Colonne libre' not in mapping and set(scores) == set(mapping)
+    
+    # Même en-tête, nouveau processus (mémoire vidée) : résolution relue depuis le fichier
+    entetes._memoire.clear()
+    resolveur = entetes.ResolveurEntetes(MAPPING_COLONNES, str(tmp_path))
+    assert resolveur.resoudre(entetes_fichier) == (mapping, scores, True)
+    assert resolveur.resoudre(entetes_fichier) == (mapping, scores, True)
+    
+    # En-têtes réordonnés ou vocabulaire différent : nouvelle empreinte, résolution recalculée
+    assert not resolveur.resoudre(entetes_fichier[::-1])[2]
+    autre = entetes.ResolveurEntetes({**MAPPING_COLONNES, 'Colonne libre': 'Commentaire'}, str(tmp_path))
+    mapping_autre, _, depuis_cache = autre.resoudre(entetes_fichier)
+    assert not depuis_cache and mapping_autre['Colonne libre'] == 'Commentaire'
+
+
+def test_filtre_de_periode_identique_sur_transactions_et_cube():
+    """Transactions horodatées : le jour de fin est inclus en entier par l'index des lignes comme par le cube"""
+    from rechargement import Instantane
+    
+    df = DataProcessor('data/data_kpi.xlsx').executer_pipeline_complet(mode='serve')
+    heures = np.random.default_rng(0).integers(0, 24 * 3600, len(df))
+    df = df.assign(Date=df['Date'].dt.normalize() + pd.to_timedelta(heures, unit='s'))
+    donnees = Instantane(df, 'horodate')
+    jours = df['Date'].dt.normalize()
+    
+    premier = jours.min()
+    debut, fin = premier + pd.Timedelta(days=3), premier + pd.Timedelta(days=12)
+    for debut, fin in ((f"{debut:%Y-%m-%d}", f"{fin:%Y-%m-%d}"),
+                       (f"{debut:%Y-%m-%d}T15:00:00", f"{fin:%Y-%m-%d}T08:00:00")):
+        for categorie in ('ALL', df['Categorie'].iloc[0]):
+            attendu = (jours >= pd.Timestamp(debut).normalize()) & (jours <= pd.Timestamp(fin).normalize())
+            if categorie != 'ALL':
+                attendu &= df['Categorie'] == categorie
+            vue = donnees.obtenir_vue(debut, fin, categorie)
+            assert vue.kpis['nb_transactions'] == len(vue.transactions) == attendu.sum() > 0
+            assert vue.client_data['Nb_Transactions'].sum() == attendu.sum()
+
+
+def test_ajouts_concurrents_au_magasin_serialises(tmp_path):
+    """Deux ajouts simultanés au magasin (deux workers) : aucun fichier perdu, filigrane vérifié au chargement"""
+    import threading
+    
+    df = generer_donnees_brutes(3000, seed=13)
+    historique, f, g = (str(tmp_path / nom) for nom in ('historique.csv', 'f.csv', 'g.csv'))
+    df.iloc[:1000].to_csv(historique, index=False)
+    df.iloc[1000:2000].to_csv(f, index=False)
+    df.iloc[2000:].to_csv(g, index=False)
+    assert DataProcessor(historique).executer_pipeline_incremental() is not None
+    
+    worker_a = DataProcessor(historique)
+    worker_b = threading.Thread(target=lambda: DataProcessor(historique).executer_pipeline_incremental([g]))
+    with worker_a.verrou_magasin():
+        assert worker_a.charger_magasin()
+        worker_b.start()
+        worker_b.join(0.5)
+        # B attend la fin du cycle de A au lieu de repartir de la même copie du magasin
+        assert worker_b.is_alive()
+        assert worker_a.ajouter_fichier(f) is not None
+    worker_b.join()
+    
+    magasin = DataProcessor(historique)
+    assert magasin.charger_magasin()
+    assert magasin.filigrane['fichiers'][1:] == [os.path.abspath(f), os.path.abspath(g)]
+    complet = str(tmp_path / 'complet.csv')
+    df.to_csv(complet, index=False)
+    assert len(magasin.df_clean) == len(_nettoyer(complet).df_clean)
+    
+    # Données remplacées sans le filigrane correspondant (sauvegarde interrompue) : magasin rejeté
+    chemin_donnees, _, _ = magasin._chemins_magasin()
+    feather_partiel = magasin.df_clean.iloc[:10].reset_index(drop=True)
+    feather_partiel.to_feather(chemin_donnees)
+    assert not DataProcessor(historique).charger_magasin()
+
+
+def _transactions(nb_lignes=5000, seed=21):
+    """Transactions nettoyées et compactées (types servis au dashboard) d'un export synthétique"""
+    processor = DataProcessor('synthetique.csv')
+    processor.df_raw = generer_donnees_brutes(nb_lignes, seed)
+    processor.nettoyer_donnees()
+    processor.compacter_schema()
+    return processor.df_clean
+
+
+def _filtres_aleatoires(df, nb, seed=0):
+    """(début, fin, catégorie, masque booléen de référence) tirés au hasard, plus la sélection complète"""
+    rng = np.random.default_rng(seed)
+    jours = df['Date'].dt.normalize()
+    dates = np.sort(jours.unique())
+    categories = ['ALL'] + [str(c) for c in df['Categorie'].cat.categories]
+    yield None, None, 'ALL', np.ones(len(df), dtype=bool)
+    for _ in range(nb):
+        debut, fin = (pd.Timestamp(d) for d in np.sort(rng.choice(dates, 2)))
+        categorie = categories[rng.integers(len(categories))]
+        masque = ((jours >= debut) & (jours <= fin)).to_numpy()
+        if categorie != 'ALL':
+            masque &= (df['Categorie'] == categorie).to_numpy()
+        yield debut, fin, categorie, masque
+
+
+def test_kpis_du_cube_identiques_au_calcul_exact():
+    """CubeKPI.calculer_kpis (tranche du cube + grand livre) = calcul sur les transactions filtrées"""
+    from agregats import CubeKPI
+    from benchmarks.reference import calculer_kpis
+    
+    df = _transactions()
+    cube = CubeKPI(df)
+    for debut, fin, categorie, masque in _filtres_aleatoires(df, 30):
+        if not masque.any():
+            continue
+        kpis, reference = cube.calculer_kpis(debut, fin, categorie), calculer_kpis(df[masque])
+        for nom, valeur in reference.items():
+            if isinstance(valeur, pd.Series):
+                # value_counts d'une colonne category garde les modalités absentes (effectif nul)
+                texte = lambda serie: serie[serie != 0].set_axis(serie[serie != 0].index.astype(str)).sort_index()
+                pd.testing.assert_series_equal(texte(kpis[nom]), texte(valeur), check_names=False,
+                                               check_dtype=False, check_index_type=False)
+            elif isinstance(valeur, (float, np.floating)):
+                assert np.isclose(kpis[nom], valeur), (nom, debut, fin, categorie)
+            else:
+                assert kpis[nom] == valeur, (nom, debut, fin, categorie)
+
+
+def test_cache_invalide_si_source_ou_regles_changent(tmp_path, monkeypatch):
+    """Le cache Feather est relu tel quel, et ignoré dès que le contenu du fichier ou VERSION_NETTOYAGE change"""
+    import data_processing
+    
+    chemin = str(tmp_path / 'source.csv')
+    generer_donnees_brutes(1000, seed=1).to_csv(chemin, index=False)
+    premier = DataProcessor(chemin)
+    premier.executer_pipeline_complet(mode='serve')
+    relu = DataProcessor(chemin)
+    assert relu.charger_depuis_cache()
+    pd.testing.assert_frame_equal(relu.df_clean, premier.df_clean)
+    assert relu.version_donnees == premier.version_donnees
+    
+    monkeypatch.setattr(data_processing, 'VERSION_NETTOYAGE', data_processing.VERSION_NETTOYAGE + 1)
+    assert not DataProcessor(chemin).charger_depuis_cache()
+    monkeypatch.undo()
+    assert DataProcessor(chemin).charger_depuis_cache()
+    
+    # Un chiffre modifié, même taille et même date de modification : l'empreinte du contenu change
+    cle, stat = relu.calculer_cle_cache(), os.stat(chemin)
+    with open(chemin, 'r+b') as f:
+        contenu = f.read()
+        position = contenu.rindex(b'1')
+        f.seek(position)
+        f.write(b'2')
+    os.utime(chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    modifie = DataProcessor(chemin)
+    assert not modifie.charger_depuis_cache()
+    nouvelle_cle = modifie.calculer_cle_cache()
+    assert (nouvelle_cle['mtime_ns'], nouvelle_cle['taille']) == (cle['mtime_ns'], cle['taille'])
+    assert nouvelle_cle['sha256'] != cle['sha256']
+
+
+def test_masque_unique_identique_aux_filtres_chaines():
+    """nettoyer_donnees (masque de validité unique) = ancienne chaîne de filtres, rejets comptés par règle"""
+    from benchmarks.bench_nettoyage import nettoyer_chaine
+    
+    df_raw = generer_donnees_brutes(20000, seed=4)
+    processor = DataProcessor('synthetique.csv')
+    processor.df_raw = df_raw
+    processor.nettoyer_donnees()
+    
+    pd.testing.assert_frame_equal(processor.df_clean, nettoyer_chaine(df_raw), check_exact=True)
+    rapport = processor.rapport_nettoyage
+    assert sum(rapport['rejets_par_regle'].values()) == rapport['lignes_supprimees'] == len(df_raw) - len(processor.df_clean)
+
+
+def test_index_temporel_identique_au_masque_booleen():
+    """IndexTemporel.filtrer / positions donnent les lignes d'un filtre booléen, triées par date"""
+    from index_donnees import IndexTemporel
+    
+    df = _transactions()
+    heures = np.random.default_rng(2).integers(0, 24 * 3600, len(df))
+    df = df.assign(Date=df['Date'] + pd.to_timedelta(heures, unit='s')).sample(frac=1, random_state=2)
+    index = IndexTemporel(df)
+    assert index.table['Date'].is_monotonic_increasing
+    
+    for debut, fin, categorie, masque in _filtres_aleatoires(df, 50, seed=3):
+        tranche = index.filtrer(debut, fin, categorie)
+        attendu = df[masque].sort_values('Date', kind='mergesort')
+        pd.testing.assert_frame_equal(tranche, attendu)
+        positions = index.positions(debut, fin, categorie)
+        assert (positions.stop - positions.start if isinstance(positions, slice) else len(positions)) == masque.sum()
+
+
+def test_vue_filtree_partagee_entre_callbacks():
+    """Mêmes filtres dans update_kpis, render_content et update_table : une seule vue construite, compteurs exportés"""
+    import app
+    
+    donnees = app.instantane_courant()
+    premier = donnees.df['Date'].min()
+    debut, fin = f"{premier + pd.Timedelta(days=2):%Y-%m-%d}", f"{premier + pd.Timedelta(days=9):%Y-%m-%d}"
+    vues = donnees.vues_filtrees
+    misses, hits = vues.misses, vues.hits
+    
+    app.update_kpis(debut, fin, 'ALL')
+    # Même sélection écrite autrement par le sélecteur de dates
+    app.render_content('tab-2', f"{debut}T00:00:00", fin, 'ALL')
+    app.update_table(0, 20, [], '', debut, fin, 'ALL')
+    assert (vues.misses - misses, vues.hits - hits) == (1, 2)
+    
+    texte = app.server.test_client().get('/metrics').get_data(as_text=True)
+    assert f'dashboard_cache_misses_total{{cache="vues_filtrees"}} {vues.misses}' in texte
+    assert f'dashboard_cache_hits_total{{cache="vues_filtrees"}} {vues.hits}' in texte
+
+
+def test_cache_lru_borne_en_entrees_et_en_octets():
+    """Éviction du moins récemment utilisé, borne en octets, valeur trop grosse jamais conservée"""
+    from cache import CacheLRU
+    
+    cache = CacheLRU(taille_max=3)
+    for cle in 'abc':
+        cache.obtenir(cle, lambda: cle.upper())
+    cache.obtenir('a', lambda: 'recalcul')
+    assert cache.obtenir('d', lambda: 'D') == 'D'
+    assert len(cache) == 3 and cache.evictions == 1
+    # 'b' (le plus ancien accès) a été évincé, 'a' a été conservé
+    assert cache.obtenir('a', lambda: 'recalcul') == 'A'
+    assert cache.obtenir('b', lambda: 'B2') == 'B2'
+    assert (cache.hits, cache.misses) == (2, 5)
+    
+    cache = CacheLRU(taille_max=100, taille_max_octets=10, taille_valeur=len)
+    cache.obtenir(1, lambda: 'x' * 4)
+    cache.obtenir(2, lambda: 'y' * 4)
+    cache.obtenir(3, lambda: 'z' * 4)
+    assert len(cache) == 2 and cache.octets == 8
+    assert cache.obtenir(4, lambda: 'w' * 11) == 'w' * 11
+    assert len(cache) == 2 and 4 not in cache._entrees
+
+
+def test_version_du_rendu_invalide_les_onglets_memoises(monkeypatch):
+    """Onglet mémoïsé servi sans recalcul, recalculé quand VERSION_RENDU change"""
+    import app
+    
+    appels = []
+    construire_onglet = app.construire_onglet
+    monkeypatch.setattr(app, 'construire_onglet', lambda *args: appels.append(args) or construire_onglet(*args))
+    premier = app.instantane_courant().df['Date'].min()
+    debut, fin = f"{premier + pd.Timedelta(days=1):%Y-%m-%d}", f"{premier + pd.Timedelta(days=11):%Y-%m-%d}"
+    
+    contenu = app.render_content('tab-3', debut, fin, 'ALL')
+    assert app.render_content('tab-3', debut, fin, 'ALL') == contenu
+    assert len(appels) == 1
+    monkeypatch.setattr(app, 'VERSION_RENDU', app.VERSION_RENDU + 1)
+    app.render_content('tab-3', debut, fin, 'ALL')
+    assert len(appels) == 2
+
+
+def test_cache_sqlite_partage_entre_processus(tmp_path):
+    """CacheSQLite : aller-retour, éviction par taille, entrée calculée par un autre processus relue sans recalcul"""
+    import subprocess
+    import sys
+    from cache import CacheSQLite, vider_cache_partage
+    
+    chemin = str(tmp_path / 'cache.sqlite')
+    cache = CacheSQLite(chemin, 'onglets', taille_max_octets=10)
+    assert cache.obtenir(('tab-1', 'v1'), lambda: 'abcd') == 'abcd'
+    assert cache.obtenir(('tab-1', 'v1'), lambda: 'recalcul') == 'abcd'
+    cache.obtenir(('tab-2', 'v1'), lambda: 'efgh')
+    cache.obtenir(('tab-3', 'v1'), lambda: 'ijkl')
+    # 12 octets > 10 : l'entrée la moins récemment lue (tab-1) est évincée
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.obtenir(('tab-1', 'v1'), lambda: 'recalcul') == 'recalcul'
+    
+    # Un autre worker calcule une entrée : ce processus la lit sans la recalculer
+    code = ("from cache import CacheSQLite; "
+            f"CacheSQLite({chemin!r}, 'onglets').obtenir(('tab-4', 'v1'), lambda: 'worker')")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert CacheSQLite(chemin, 'onglets').obtenir(('tab-4', 'v1'), lambda: 'recalcul') == 'worker'
+    
+    # Démarrage du serveur : toutes les tables vidées
+    assert vider_cache_partage(chemin) == 1
+    assert len(cache) == 0
+
+
+def test_rechargement_remplace_l_instantane_d_un_bloc(tmp_path):
+    """Nouveau fichier : nouvel instantané publié, l'ancien reste intact ; fichier invalide : rien ne change"""
+    from rechargement import construire_instantane, Rechargeur
+    
+    chemin = str(tmp_path / 'source.csv')
+    generer_donnees_brutes(1000, seed=8).to_csv(chemin, index=False)
+    courant = [construire_instantane(chemin)]
+    ancien = courant[0]
+    kpis_anciens = ancien.obtenir_vue(None, None, 'ALL').kpis
+    rechargeur = Rechargeur(chemin, lambda: courant[0], lambda nouveau: courant.__setitem__(0, nouveau),
+                            intervalle=0.01)
+    assert rechargeur.verifier() is None
+    
+    generer_donnees_brutes(2000, seed=9).to_csv(chemin, index=False)
+    nouveau = rechargeur.verifier()
+    assert nouveau is courant[0] and nouveau.version != ancien.version
+    assert len(nouveau) == len(_nettoyer(chemin).df_clean)
+    # Un callback encore en cours sur l'ancien instantané termine sur des données cohérentes
+    assert ancien.obtenir_vue(None, None, 'ALL').kpis is kpis_anciens
+    assert kpis_anciens['nb_transactions'] == len(ancien) != len(nouveau)
+    
+    with open(chemin, 'w', encoding='utf-8') as f:
+        f.write("colonne,inconnue\n1,2\n")
+    assert rechargeur.verifier() is None
+    assert courant[0] is nouveau
+
+
+def test_metriques_prometheus_additionnees_entre_workers(tmp_path):
+    """Texte Prometheus valide ; compteurs et histogrammes d'un autre worker (processus terminé) additionnés"""
+    import re
+    import subprocess
+    import sys
+    from metriques import RegistreMetriques
+    
+    dossier = str(tmp_path / 'metriques')
+    code = ("from metriques import RegistreMetriques; "
+            f"r = RegistreMetriques({dossier!r}); "
+            "r.observer('dashboard_callback_duree_secondes', 0.02, callback='update_kpis'); "
+            "r.observer('dashboard_callback_duree_secondes', 3.0, callback='update_kpis'); "
+            "r.incrementer('dashboard_cache_requetes_total', callback='update_kpis', resultat='hit'); "
+            "r._ecrire_si_necessaire(forcer=True)")
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    
+    registre = RegistreMetriques(dossier)
+    with registre.mesurer('update_kpis') as mesure:
+        mesure['cache'] = 'hit'
+    texte = registre.exposer()
+    
+    for ligne in texte.splitlines():
+        assert ligne.startswith('# HELP ') or ligne.startswith('# TYPE ') or re.fullmatch(
+            r'[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? -?[0-9.e+-]+', ligne), ligne
+    assert 'dashboard_cache_requetes_total{callback="update_kpis",resultat="hit"} 2' in texte
+    assert 'dashboard_callback_duree_secondes_count{callback="update_kpis"} 3' in texte
+    # Buckets cumulatifs : 0,02 s dans le bucket 0,025, 3 s seulement dans 5 et +Inf
+    assert 'dashboard_callback_duree_secondes_bucket{callback="update_kpis",le="0.025"} 2' in texte
+    assert 'dashboard_callback_duree_secondes_bucket{callback="update_kpis",le="2.5"} 2' in texte
+    assert 'dashboard_callback_duree_secondes_bucket{callback="update_kpis",le="+Inf"} 3' in texte
+    # Mémoire : seuls les workers encore en vie (le processus du premier worker est terminé)
+    pids = set(re.findall(r'dashboard_memoire_octets\{pid="(\d+)"', texte))
+    assert pids == {str(os.getpid())}
+
+
+def test_reduction_des_series_et_des_nuages():
+    """LTTB : extrémités conservées, budget respecté ; min/max : pics conservés ; nuage borné, total conservé"""
+    from reduction import agreger_nuage, lttb, minmax, reduire_serie
+    
+    rng = np.random.default_rng(6)
+    y = np.cumsum(rng.normal(size=10_000))
+    y[4321] = y.max() + 50
+    x = np.arange(len(y))
+    for nb_points in (3, 10, 800):
+        indices = lttb(x, y, nb_points)
+        assert len(indices) == nb_points and indices[0] == 0 and indices[-1] == len(y) - 1
+        assert (np.diff(indices) > 0).all()
+    assert len(lttb(x[:50], y[:50], 800)) == 50
+    assert 4321 in minmax(y, 100) and len(minmax(y, 100)) <= 200
+    
+    serie = pd.DataFrame({'Date': pd.date_range('2020-01-01', periods=len(y), freq='h'), 'Montant': y})
+    reduite = reduire_serie(serie, 'Date', 'Montant', largeur_px=500)
+    assert len(reduite) == 500 and reduite['Date'].iloc[[0, -1]].tolist() == serie['Date'].iloc[[0, -1]].tolist()
+    
+    nuage = pd.DataFrame({'CLV': rng.gamma(2, 100, 50_000), 'Nb_Transactions': rng.integers(1, 30, 50_000)})
+    agrege, reduit = agreger_nuage(nuage, 'Nb_Transactions', 'CLV', nb_cellules_y=40)
+    assert reduit and len(agrege) <= 29 * 40 and agrege['Nb_Points'].sum() == len(nuage)
+
+
+def test_serie_des_ventes_identique_a_un_reechantillonnage():
+    """CubeKPI.serie_ventes (cumuls par granularité + bords) = regroupement des transactions filtrées, à chaque grain"""
+    from agregats import CubeKPI, GRAINS
+    
+    df = _transactions()
+    cube = CubeKPI(df)
+    for debut, fin, categorie, masque in _filtres_aleatoires(df, 20, seed=5):
+        # Sans filtre de période, le grain dépend de l'étendue des données
+        etendue = (debut, fin) if debut is not None else (df['Date'].min(), df['Date'].max())
+        nb_jours = (etendue[1] - etendue[0]).days + 1
+        selection = df[masque]
+        for grain, budget in (('jour', nb_jours), ('semaine', nb_jours // 7 + 1), ('mois', 1)):
+            if grain == 'semaine' and nb_jours // 7 + 1 >= nb_jours:
+                continue
+            serie, retenu = cube.serie_ventes(debut, fin, categorie, budget=budget)
+            assert retenu == grain
+            debuts = selection['Date'].dt.to_period(GRAINS[grain][0]).dt.start_time
+            attendu = selection.groupby(debuts)['Montant'].sum()
+            assert serie['Date'].tolist() == attendu.index.tolist(), (grain, debut, fin, categorie)
+            assert np.allclose(serie['Montant'], attendu.to_numpy())
+
+
+def test_table_paginee_filtree_et_triee_cote_serveur():
+    """Pages, tri (date par tranche, autres colonnes par argpartition) et filter_query = calcul pandas complet"""
+    from index_donnees import IndexTemporel
+    from table_transactions import filtrer, formater_page, page_transactions, positions_page
+    
+    table = IndexTemporel(_transactions()).table
+    n, taille = len(table), 97
+    
+    # Tri par défaut (date décroissante) : la concaténation des pages redonne toute la table
+    enregistrements, nb_pages, nb_lignes, erreur = page_transactions(table, 0, taille)
+    assert (nb_pages, nb_lignes, erreur) == (-(-n // taille), n, None)
+    pages = [page_transactions(table, page, taille)[0] for page in range(nb_pages)]
+    assert sum(pages, []) == formater_page(table.iloc[::-1])
+    # Page au-delà de la dernière : dernière page
+    assert page_transactions(table, nb_pages + 5, taille)[0] == pages[-1]
+    
+    reference = table.reset_index(drop=True)
+    for colonne in ('Montant', 'Categorie', 'ID_Client', 'Date'):
+        cles = reference[colonne].astype(str) if colonne in ('Categorie', 'ID_Client') else reference[colonne]
+        for direction in ('asc', 'desc'):
+            if colonne == 'Date':
+                # Tri par date : ordre de la table (chronologique) ou son inverse exact
+                ordre = np.arange(n) if direction == 'asc' else np.arange(n)[::-1]
+            else:
+                ordre = cles.sort_values(ascending=direction == 'asc', kind='stable').index.to_numpy()
+            for page in (0, 3, nb_pages - 1):
+                positions = positions_page(table, page, taille, [{'column_id': colonne, 'direction': direction}])
+                attendu = ordre[page * taille:(page + 1) * taille]
+                assert (cles.to_numpy()[positions] == cles.to_numpy()[attendu]).all(), (colonne, direction, page)
+    
+    categorie = str(table['Categorie'].iloc[0])
+    client = str(table['ID_Client'].iloc[0])
+    jour = table['Date'].iloc[n // 2]
+    requetes = {
+        '{Montant} > 100 && {Montant} <= 250': (table['Montant'] > 100) & (table['Montant'] <= 250),
+        f'{{Categorie}} icontains {categorie[:3].lower()}':
+            table['Categorie'].astype(str).str.lower().str.contains(categorie[:3].lower(), regex=False),
+        f'{{ID_Client}} = "{client}"': table['ID_Client'].astype(str) == client,
+        f'{{Date}} datestartswith {jour:%Y-%m}': table['Date'].dt.to_period('M') == jour.to_period('M'),
+        f'{{Date}} = {jour:%d/%m/%Y}': table['Date'].dt.normalize() == jour.normalize(),
+    }
+    for requete, masque in requetes.items():
+        filtree, erreur = filtrer(table, requete)
+        assert erreur is None and masque.any(), requete
+        pd.testing.assert_frame_equal(filtree, table[masque.to_numpy()])
+    filtree, erreur = filtrer(table, '{Inconnue} > 3')
+    assert len(filtree) == 0 and erreur.startswith('Filtre non reconnu')
+
+
+def test_grand_livre_identique_a_un_groupby():
+    """GrandLivreClients.donnees_clients = groupby client des transactions filtrées (une ou plusieurs catégories)"""
+    from agregats import CubeKPI
+    
+    df = _transactions()
+    grand_livre = CubeKPI(df).grand_livre
+    categories = [str(c) for c in df['Categorie'].cat.categories]
+    filtres = list(_filtres_aleatoires(df, 30, seed=7))
+    jours = df['Date'].dt.normalize()
+    # Liste de catégories (forme acceptée par le grand livre, pas par l'index)
+    debut, fin = filtres[1][:2]
+    filtres.append((debut, fin, categories[:2],
+                    ((jours >= debut) & (jours <= fin) & df['Categorie'].isin(categories[:2])).to_numpy()))
+    
+    for debut, fin, categorie, masque in filtres:
+        clients = grand_livre.donnees_clients(debut, fin, categorie)
+        attendu = df[masque].groupby('ID_Client', observed=True)['Montant'].agg(['sum', 'count'])
+        assert len(clients) == len(attendu), (debut, fin, categorie)
+        clients = clients.set_index(clients['ID_Client'].astype(str)).sort_index()
+        attendu = attendu.set_axis(attendu.index.astype(str)).sort_index()
+        assert (clients.index == attendu.index).all()
+        assert np.allclose(clients['CLV'], attendu['sum'])
+        assert (clients['Nb_Transactions'].to_numpy() == attendu['count'].to_numpy()).all()
+
+
+def test_profil_de_qualite_des_colonnes(tmp_path, monkeypatch):
+    """profiler_colonnes : effectifs exacts par type de colonne ; profil conservé dans le cache et relu sans recalcul"""
+    import data_processing
+    from data_processing import profiler_colonnes
+    
+    df = _transactions()
+    df.loc[df.index[:7], 'Montant'] = np.nan
+    profil = profiler_colonnes(df, nb_modalites=2)
+    
+    categorie = profil['Categorie']
+    assert categorie['manquants'] == df['Categorie'].isna().sum()
+    assert categorie['distincts'] == df['Categorie'].nunique()
+    assert categorie['modalites'] == {str(k): int(v) for k, v in df['Categorie'].value_counts().head(2).items()}
+    montant = profil['Montant']
+    assert (montant['manquants'], montant['distincts']) == (7, df['Montant'].nunique())
+    assert np.isclose(montant['moyenne'], df['Montant'].mean()) and np.isclose(montant['q3'], df['Montant'].quantile(0.75))
+    assert sum(montant['histogramme']['effectifs']) == df['Montant'].notna().sum()
+    dates = profil['Date']
+    assert dates['distincts'] == df['Date'].nunique() and sum(dates['par_mois'].values()) == len(df)
+    assert profil['Annee']['min'] == df['Annee'].min()
+    
+    chemin = str(tmp_path / 'source.csv')
+    generer_donnees_brutes(800, seed=12).to_csv(chemin, index=False)
+    premier = DataProcessor(chemin)
+    premier.executer_pipeline_complet(mode='serve')
+    # Relecture du cache : le profil vient du rapport, aucun nouveau parcours des colonnes
+    monkeypatch.setattr(data_processing, 'profiler_colonnes', None)
+    relu = DataProcessor(chemin)
+    assert relu.charger_depuis_cache()
+    assert relu.rapport_nettoyage['profil'] == premier.rapport_nettoyage['profil']
+    assert relu.rapport_nettoyage['profil']['nb_lignes'] == len(relu.df_clean)
+
+
+def test_chaque_ecrivain_restitue_les_donnees(tmp_path):
+    """Chaque format de ECRIVAINS relu donne les mêmes lignes (types conservés par Parquet et Feather)"""
+    import pyarrow.parquet as pq
+    from ecriture import ECRIVAINS, ecrire_formats
+    
+    df = _transactions(600)
+    attendu = df.reset_index(drop=True)
+    mesures = ecrire_formats(df, str(tmp_path / 'propre'), list(ECRIVAINS))
+    assert [m['format'] for m in mesures] == list(ECRIVAINS)
+    assert all('erreur' not in m and m['lignes'] == len(df) and m['octets'] > 0 for m in mesures)
+    chemins = {m['format']: m['chemin'] for m in mesures}
+    
+    pd.testing.assert_frame_equal(pd.read_parquet(chemins['parquet']), attendu)
+    pd.testing.assert_frame_equal(pd.read_feather(chemins['feather']), attendu)
+    
+    # Partitions Annee=/Mois= : colonnes reconstituées depuis les dossiers, lignes regroupées par mois
+    table = pq.read_table(chemins['parquet_mois'])
+    mois = table.to_pandas()
+    assert len(mois) == len(df)
+    assert (mois['Annee'].astype(int) * 100 + mois['Mois'].astype(int)
+            == mois['Date'].dt.year * 100 + mois['Date'].dt.month).all()
+    ordre = ['Date', 'ID_Client', 'Montant', 'Categorie', 'Mode_Paiement']
+    relu = mois[attendu.columns].astype({'Annee': attendu['Annee'].dtype, 'Mois': attendu['Mois'].dtype})
+    pd.testing.assert_frame_equal(relu.sort_values(ordre, ignore_index=True),
+                                  attendu.sort_values(ordre, ignore_index=True), check_categorical=False)
+    
+    # Excel : ni catégories ni entiers courts, valeurs identiques (la catégorie texte 'None' n'est pas un manquant)
+    excel = pd.read_excel(chemins['excel'], keep_default_na=False, na_values=[''])
+    assert list(excel.columns) == list(attendu.columns)
+    for colonne in attendu.columns:
+        if isinstance(attendu[colonne].dtype, pd.CategoricalDtype):
+            assert (excel[colonne].astype(str) == attendu[colonne].astype(str)).all(), colonne
+        else:
+            assert (excel[colonne].to_numpy() == attendu[colonne].to_numpy()).all(), colonne
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     df_propre = tester_traitement()
     
     if df_propre is not None:
         print("\n💡 CONSEILS:")
-        print("  1. Vérifiez le fichier 'data/data_kpi_clean.xlsx' créé")
+        print("  1. Vérifiez le fichier 'data/data_kpi_clean.parquet' créé")
         print("  2. Les données sont maintenant prêtes pour l'analyse")
         print("  3. Utilisez ce fichier nettoyé dans votre dashboard")
\ No newline at end of file